@@ -1,118 +1,118 @@
-"""initial
-
-Revision ID: 001
-Revises: 
-Create Date: 2024-03-20 06:15:00.000000
-
-"""
-from alembic import op
-import sqlalchemy as sa
-from sqlalchemy.dialects import postgresql
-
-# revision identifiers, used by Alembic.
-revision = '001'
-down_revision = None
-branch_labels = None
-depends_on = None
-
-def upgrade() -> None:
-    # Create enum types
-    op.execute("CREATE TYPE userrole AS ENUM ('admin', 'store', 'manufacturer')")
-    op.execute("CREATE TYPE orderstatus AS ENUM ('pending', 'confirmed', 'shipped', 'delivered', 'cancelled')")
-
-    # Create user table
-    op.create_table(
-        'user',
-        sa.Column('id', sa.Integer(), nullable=False),
-        sa.Column('email', sa.String(), nullable=False),
-        sa.Column('hashed_password', sa.String(), nullable=False),
-        sa.Column('full_name', sa.String(), nullable=True),
-        sa.Column('role', postgresql.ENUM('admin', 'store', 'manufacturer', name='userrole'), nullable=False),
-        sa.Column('is_active', sa.Boolean(), nullable=True),
-        sa.Column('company_name', sa.String(), nullable=True),
-        sa.Column('phone', sa.String(), nullable=True),
-        sa.Column('address', sa.String(), nullable=True),
-        sa.Column('created_at', sa.DateTime(), nullable=True),
-        sa.Column('updated_at', sa.DateTime(), nullable=True),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
-    op.create_index(op.f('ix_user_id'), 'user', ['id'], unique=False)
-
-    # Create product table
-    op.create_table(
-        'product',
-        sa.Column('id', sa.Integer(), nullable=False),
-        sa.Column('name', sa.String(), nullable=False),
-        sa.Column('description', sa.Text(), nullable=True),
-        sa.Column('sku', sa.String(), nullable=False),
-        sa.Column('barcode', sa.String(), nullable=False),
-        sa.Column('price', sa.Float(), nullable=False),
-        sa.Column('cost', sa.Float(), nullable=True),
-        sa.Column('quantity', sa.Integer(), nullable=True),
-        sa.Column('min_quantity', sa.Integer(), nullable=True),
-        sa.Column('manufacturer_id', sa.Integer(), nullable=False),
-        sa.Column('is_active', sa.Boolean(), nullable=True),
-        sa.Column('created_at', sa.DateTime(), nullable=True),
-        sa.Column('updated_at', sa.DateTime(), nullable=True),
-        sa.ForeignKeyConstraint(['manufacturer_id'], ['user.id'], ),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_product_id'), 'product', ['id'], unique=False)
-    op.create_index(op.f('ix_product_sku'), 'product', ['sku'], unique=True)
-    op.create_index(op.f('ix_product_barcode'), 'product', ['barcode'], unique=True)
-
-    # Create order table
-    op.create_table(
-        'order',
-        sa.Column('id', sa.Integer(), nullable=False),
-        sa.Column('order_number', sa.String(), nullable=False),
-        sa.Column('store_id', sa.Integer(), nullable=False),
-        sa.Column('status', postgresql.ENUM('pending', 'confirmed', 'shipped', 'delivered', 'cancelled', name='orderstatus'), nullable=False),
-        sa.Column('total_amount', sa.Float(), nullable=False),
-        sa.Column('shipping_address', sa.String(), nullable=False),
-        sa.Column('notes', sa.String(), nullable=True),
-        sa.Column('created_at', sa.DateTime(), nullable=True),
-        sa.Column('updated_at', sa.DateTime(), nullable=True),
-        sa.ForeignKeyConstraint(['store_id'], ['user.id'], ),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_order_id'), 'order', ['id'], unique=False)
-    op.create_index(op.f('ix_order_order_number'), 'order', ['order_number'], unique=True)
-
-    # Create order_item table
-    op.create_table(
-        'orderitem',
-        sa.Column('id', sa.Integer(), nullable=False),
-        sa.Column('order_id', sa.Integer(), nullable=False),
-        sa.Column('product_id', sa.Integer(), nullable=False),
-        sa.Column('quantity', sa.Integer(), nullable=False),
-        sa.Column('unit_price', sa.Float(), nullable=False),
-        sa.Column('subtotal', sa.Float(), nullable=False),
-        sa.ForeignKeyConstraint(['order_id'], ['order.id'], ),
-        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_orderitem_id'), 'orderitem', ['id'], unique=False)
-
-def downgrade() -> None:
-    # Drop tables
-    op.drop_index(op.f('ix_orderitem_id'), table_name='orderitem')
-    op.drop_table('orderitem')
-    
-    op.drop_index(op.f('ix_order_order_number'), table_name='order')
-    op.drop_index(op.f('ix_order_id'), table_name='order')
-    op.drop_table('order')
-    
-    op.drop_index(op.f('ix_product_barcode'), table_name='product')
-    op.drop_index(op.f('ix_product_sku'), table_name='product')
-    op.drop_index(op.f('ix_product_id'), table_name='product')
-    op.drop_table('product')
-    
-    op.drop_index(op.f('ix_user_id'), table_name='user')
-    op.drop_index(op.f('ix_user_email'), table_name='user')
-    op.drop_table('user')
-    
-    # Drop enum types
-    op.execute('DROP TYPE orderstatus')
+"""initial
+
+Revision ID: 001
+Revises: 
+Create Date: 2024-03-20 06:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Create enum types
+    op.execute("CREATE TYPE userrole AS ENUM ('admin', 'store', 'manufacturer')")
+    op.execute("CREATE TYPE orderstatus AS ENUM ('pending', 'confirmed', 'shipped', 'delivered', 'cancelled')")
+
+    # Create user table
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('role', postgresql.ENUM('admin', 'store', 'manufacturer', name='userrole'), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('company_name', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('address', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+    op.create_index(op.f('ix_user_id'), 'user', ['id'], unique=False)
+
+    # Create product table
+    op.create_table(
+        'product',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('sku', sa.String(), nullable=False),
+        sa.Column('barcode', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('cost', sa.Float(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+        sa.Column('min_quantity', sa.Integer(), nullable=True),
+        sa.Column('manufacturer_id', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['manufacturer_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_id'), 'product', ['id'], unique=False)
+    op.create_index(op.f('ix_product_sku'), 'product', ['sku'], unique=True)
+    op.create_index(op.f('ix_product_barcode'), 'product', ['barcode'], unique=True)
+
+    # Create order table
+    op.create_table(
+        'order',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_number', sa.String(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('status', postgresql.ENUM('pending', 'confirmed', 'shipped', 'delivered', 'cancelled', name='orderstatus'), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('shipping_address', sa.String(), nullable=False),
+        sa.Column('notes', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['store_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_id'), 'order', ['id'], unique=False)
+    op.create_index(op.f('ix_order_order_number'), 'order', ['order_number'], unique=True)
+
+    # Create order_item table
+    op.create_table(
+        'orderitem',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.Column('subtotal', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['order.id'], ),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_orderitem_id'), 'orderitem', ['id'], unique=False)
+
+def downgrade() -> None:
+    # Drop tables
+    op.drop_index(op.f('ix_orderitem_id'), table_name='orderitem')
+    op.drop_table('orderitem')
+    
+    op.drop_index(op.f('ix_order_order_number'), table_name='order')
+    op.drop_index(op.f('ix_order_id'), table_name='order')
+    op.drop_table('order')
+    
+    op.drop_index(op.f('ix_product_barcode'), table_name='product')
+    op.drop_index(op.f('ix_product_sku'), table_name='product')
+    op.drop_index(op.f('ix_product_id'), table_name='product')
+    op.drop_table('product')
+    
+    op.drop_index(op.f('ix_user_id'), table_name='user')
+    op.drop_index(op.f('ix_user_email'), table_name='user')
+    op.drop_table('user')
+    
+    # Drop enum types
+    op.execute('DROP TYPE orderstatus')
     op.execute('DROP TYPE userrole') 
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""stock events
+
+Revision ID: 002
+Revises: 001
+Create Date: 2024-04-02 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'stockevent',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.String(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity_change', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stockevent_id'), 'stockevent', ['id'], unique=False)
+    op.create_index(op.f('ix_stockevent_event_id'), 'stockevent', ['event_id'], unique=True)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stockevent_event_id'), table_name='stockevent')
+    op.drop_index(op.f('ix_stockevent_id'), table_name='stockevent')
+    op.drop_table('stockevent')
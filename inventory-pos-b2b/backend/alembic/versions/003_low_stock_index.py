@@ -0,0 +1,28 @@
+"""low stock partial index
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-04-09 14:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_product_low_stock',
+        'product',
+        ['manufacturer_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text('quantity <= min_quantity'),
+        sqlite_where=sa.text('quantity <= min_quantity'),
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_product_low_stock', table_name='product')
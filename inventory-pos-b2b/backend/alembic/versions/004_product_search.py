@@ -0,0 +1,79 @@
+"""product search indexes
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-04-16 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+TRIGRAM_COLUMNS = ['name', 'description', 'sku', 'barcode']
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE product_search USING fts5(
+        name, description, sku, barcode,
+        content='product', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER product_search_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_search(rowid, name, description, sku, barcode)
+        VALUES (new.id, new.name, new.description, new.sku, new.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER product_search_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_search(product_search, rowid, name, description, sku, barcode)
+        VALUES ('delete', old.id, old.name, old.description, old.sku, old.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER product_search_au
+    AFTER UPDATE OF name, description, sku, barcode ON product BEGIN
+        INSERT INTO product_search(product_search, rowid, name, description, sku, barcode)
+        VALUES ('delete', old.id, old.name, old.description, old.sku, old.barcode);
+        INSERT INTO product_search(rowid, name, description, sku, barcode)
+        VALUES (new.id, new.name, new.description, new.sku, new.barcode);
+    END
+    """,
+    """
+    INSERT INTO product_search(product_search, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0, 5.0, 5.0)')
+    """,
+    "INSERT INTO product_search(product_search) VALUES ('rebuild')",
+]
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in TRIGRAM_COLUMNS:
+            op.create_index(
+                f'ix_product_{column}_trgm',
+                'product',
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+            )
+    elif dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for column in TRIGRAM_COLUMNS:
+            op.drop_index(f'ix_product_{column}_trgm', table_name='product')
+    elif dialect == 'sqlite':
+        for trigger in ('product_search_ai', 'product_search_ad', 'product_search_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS product_search')
@@ -0,0 +1,90 @@
+"""daily sales rollups
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-04-23 16:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('orderitem', sa.Column('unit_cost', sa.Float(), nullable=True))
+    op.execute(
+        'UPDATE orderitem SET unit_cost = '
+        '(SELECT cost FROM product WHERE product.id = orderitem.product_id)'
+    )
+    
+    op.create_table(
+        'dailyproductsales',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('manufacturer_id', sa.Integer(), nullable=True),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('margin', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['manufacturer_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id', 'day')
+    )
+    op.create_index(op.f('ix_dailyproductsales_id'), 'dailyproductsales', ['id'], unique=False)
+    op.create_index(
+        'ix_dailyproductsales_manufacturer_id_day',
+        'dailyproductsales',
+        ['manufacturer_id', 'day'],
+        unique=False,
+    )
+    
+    op.create_table(
+        'dailymanufacturersales',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('manufacturer_id', sa.Integer(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('margin', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['manufacturer_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('manufacturer_id', 'day')
+    )
+    op.create_index(op.f('ix_dailymanufacturersales_id'), 'dailymanufacturersales', ['id'], unique=False)
+    
+    op.create_table(
+        'dailystoresales',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('margin', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['store_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('store_id', 'day')
+    )
+    op.create_index(op.f('ix_dailystoresales_id'), 'dailystoresales', ['id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_dailystoresales_id'), table_name='dailystoresales')
+    op.drop_table('dailystoresales')
+    op.drop_index(op.f('ix_dailymanufacturersales_id'), table_name='dailymanufacturersales')
+    op.drop_table('dailymanufacturersales')
+    op.drop_index('ix_dailyproductsales_manufacturer_id_day', table_name='dailyproductsales')
+    op.drop_index(op.f('ix_dailyproductsales_id'), table_name='dailyproductsales')
+    op.drop_table('dailyproductsales')
+    op.drop_column('orderitem', 'unit_cost')
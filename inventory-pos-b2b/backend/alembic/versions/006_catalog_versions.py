@@ -0,0 +1,29 @@
+"""catalog versions
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-04-30 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'catalogversion',
+        sa.Column('manufacturer_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['manufacturer_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('manufacturer_id')
+    )
+
+def downgrade() -> None:
+    op.drop_table('catalogversion')
@@ -0,0 +1,71 @@
+"""stock movement ledger and sharded stock counters
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-05-07 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+REASONS = ('initial', 'adjustment', 'sale', 'pos', 'import')
+
+def upgrade() -> None:
+    op.add_column(
+        'product',
+        sa.Column('stock_shards', sa.Integer(), nullable=False, server_default='0'),
+    )
+    
+    op.create_table(
+        'stockmovement',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity_change', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.Enum(*REASONS, name='stockmovementreason'), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['order.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stockmovement_id'), 'stockmovement', ['id'], unique=False)
+    op.create_index(
+        'ix_stockmovement_product_id_id', 'stockmovement', ['product_id', 'id'], unique=False
+    )
+    # Open the ledger with the current stock so it sums to product.quantity
+    op.execute(
+        "INSERT INTO stockmovement (product_id, quantity_change, reason, created_at, updated_at) "
+        "SELECT id, quantity, 'initial', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+        "FROM product WHERE quantity <> 0"
+    )
+    
+    op.create_table(
+        'stockshard',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id', 'shard')
+    )
+    op.create_index(op.f('ix_stockshard_id'), 'stockshard', ['id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stockshard_id'), table_name='stockshard')
+    op.drop_table('stockshard')
+    op.drop_index('ix_stockmovement_product_id_id', table_name='stockmovement')
+    op.drop_index(op.f('ix_stockmovement_id'), table_name='stockmovement')
+    op.drop_table('stockmovement')
+    sa.Enum(name='stockmovementreason').drop(op.get_bind(), checkfirst=True)
+    op.drop_column('product', 'stock_shards')
@@ -0,0 +1,33 @@
+"""composite indexes for order and product listings
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-05-14 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns); checked by `python -m app.cli check-plans`
+INDEXES = [
+    ('ix_order_created_at_id', 'order', ['created_at', 'id']),
+    ('ix_order_store_id_created_at_id', 'order', ['store_id', 'created_at', 'id']),
+    ('ix_order_status_created_at_id', 'order', ['status', 'created_at', 'id']),
+    ('ix_orderitem_order_id_product_id', 'orderitem', ['order_id', 'product_id']),
+    ('ix_orderitem_product_id', 'orderitem', ['product_id']),
+    ('ix_product_manufacturer_id_id', 'product', ['manufacturer_id', 'id']),
+]
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
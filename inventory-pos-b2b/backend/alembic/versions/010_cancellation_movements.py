@@ -0,0 +1,27 @@
+"""stock movements of cancelled orders
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-06-04 14:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # SQLite stores the reason as plain text
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TYPE stockmovementreason ADD VALUE IF NOT EXISTS 'cancellation'")
+
+def downgrade() -> None:
+    # PostgreSQL can't drop a value from an enum type; rows using it are
+    # recorded as adjustments instead
+    op.execute(
+        "UPDATE stockmovement SET reason = 'adjustment' WHERE reason = 'cancellation'"
+    )
@@ -0,0 +1,32 @@
+"""catalog changes
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-06-11 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'catalogchange',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('manufacturer_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        op.f('ix_catalogchange_manufacturer_id'), 'catalogchange', ['manufacturer_id'], unique=False
+    )
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_catalogchange_manufacturer_id'), table_name='catalogchange')
+    op.drop_table('catalogchange')
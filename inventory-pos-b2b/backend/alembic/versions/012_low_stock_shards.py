@@ -0,0 +1,37 @@
+"""low stock index holds sharded products
+
+Revision ID: 012
+Revises: 011
+Create Date: 2024-06-18 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.drop_index('ix_product_low_stock', table_name='product')
+    op.create_index(
+        'ix_product_low_stock',
+        'product',
+        ['manufacturer_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text('quantity <= min_quantity OR stock_shards > 0'),
+        sqlite_where=sa.text('quantity <= min_quantity OR stock_shards > 0'),
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_product_low_stock', table_name='product')
+    op.create_index(
+        'ix_product_low_stock',
+        'product',
+        ['manufacturer_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text('quantity <= min_quantity'),
+        sqlite_where=sa.text('quantity <= min_quantity'),
+    )
@@ -1,60 +1,103 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from pydantic import ValidationError
-from sqlalchemy.orm import Session
-from app.core import security
-from app.core.config import settings
-from app.core.database import get_db
-from app.crud import crud_user
-from app.models.user import User
-from app.schemas.token import TokenPayload
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
-
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-) -> User:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
-    user = crud_user.get(db, id=token_data.sub)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
-
-def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
-    if not crud_user.is_active(current_user):
-        raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
-
-def get_current_store_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
-    if current_user.role != "store":
-        raise HTTPException(
-            status_code=403,
-            detail="The user doesn't have enough privileges"
-        )
-    return current_user
-
-def get_current_manufacturer_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
-    if current_user.role != "manufacturer":
-        raise HTTPException(
-            status_code=403,
-            detail="The user doesn't have enough privileges"
-        )
-    return current_user 
\ No newline at end of file
+import hashlib
+import time
+from typing import Generator, Optional
+from fastapi import Depends, HTTPException, Response, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import jwt, JWTError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import security
+from app.core.cache import principal_cache, token_cache
+from app.core.config import settings
+from app.core.database import get_db, replicas
+from app.crud.crud_user import user as crud_user
+from app.models.user import User
+from app.schemas.token import TokenPayload
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+async def get_read_db(db: AsyncSession = Depends(get_db)) -> AsyncSession:
+    """
+    The request's session, reading from a replica in rotation if there is
+    one. Only for read-only endpoints: a replica can be up to
+    REPLICA_MAX_LAG_SECONDS behind writes made by earlier requests.
+    """
+    if not db.sync_session.pinned:
+        db.sync_session.replica = replicas.choose()
+    return db
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    # Tokens that already verified skip the decode until they expire
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    user_id = token_cache.get(token_key)
+    if user_id is None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            token_data = TokenPayload(**payload)
+        except (JWTError, ValidationError):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials",
+            )
+        user_id = token_data.sub
+        if "exp" in payload:
+            token_cache.set(token_key, user_id, ttl=payload["exp"] - time.time())
+    
+    cached_user = principal_cache.get(user_id)
+    if cached_user is not None:
+        # Attach a copy to this request's session without a round trip
+        return await db.merge(cached_user, load=False)
+    user = await crud_user.get(db, id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    principal_cache.set(user_id, user)
+    return user
+
+async def get_current_active_user(
+    current_user: User = Depends(get_current_user),
+) -> User:
+    if not crud_user.is_active(current_user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+async def get_current_store_user(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    if current_user.role != "store":
+        raise HTTPException(
+            status_code=403,
+            detail="The user doesn't have enough privileges"
+        )
+    return current_user
+
+async def get_current_manufacturer_user(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    if current_user.role != "manufacturer":
+        raise HTTPException(
+            status_code=403,
+            detail="The user doesn't have enough privileges"
+        )
+    return current_user
+
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=403,
+            detail="The user doesn't have enough privileges"
+        )
+    return current_user
\ No newline at end of file
@@ -1,9 +1,10 @@
-from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, products, orders
-
-api_router = APIRouter()
-
-api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
-api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(products.router, prefix="/products", tags=["products"])
-api_router.include_router(orders.router, prefix="/orders", tags=["orders"]) 
\ No newline at end of file
+from fastapi import APIRouter
+from app.api.v1.endpoints import auth, dashboard, products, orders, reports
+
+api_router = APIRouter()
+
+api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
+api_router.include_router(products.router, prefix="/products", tags=["products"])
+api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
+api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
\ No newline at end of file
@@ -1,77 +1,142 @@
-from datetime import timedelta
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.core import security
-from app.core.config import settings
-from app.core.database import get_db
-from app.crud import crud_user
-from app.schemas.token import Token
-
-router = APIRouter()
-
-@router.post("/login", response_model=Token)
-def login(
-    db: Session = Depends(get_db),
-    form_data: OAuth2PasswordRequestForm = Depends()
-) -> Any:
-    """
-    OAuth2 compatible token login, get an access token for future requests
-    """
-    user = crud_user.authenticate(
-        db, email=form_data.username, password=form_data.password
-    )
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-        )
-    elif not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user",
-        )
-    
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
-
-@router.post("/register")
-def register(
-    *,
-    db: Session = Depends(get_db),
-    email: str,
-    password: str,
-    full_name: str,
-    role: str,
-    company_name: str = None,
-    phone: str = None,
-    address: str = None,
-) -> Any:
-    """
-    Register new user
-    """
-    user = crud_user.get_by_email(db, email=email)
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered",
-        )
-    
-    user_in = {
-        "email": email,
-        "password": password,
-        "full_name": full_name,
-        "role": role,
-        "company_name": company_name,
-        "phone": phone,
-        "address": address,
-    }
-    
-    user = crud_user.create(db, obj_in=user_in)
-    return {"message": "User created successfully"} 
\ No newline at end of file
+from datetime import timedelta
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app.core import security
+from app.core.dashboard import dashboard_cache
+from app.core.product_cache import product_cache
+from app.core.cache import principal_cache, token_cache
+from app.core.config import settings
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.core.startup import startup_timer
+from app.core.database import get_db, replicas
+from app.crud.crud_user import user as crud_user
+from app.models.user import User
+from app.schemas.token import Token
+
+router = APIRouter()
+
+@router.post("/login", response_model=Token)
+async def login(
+    db: AsyncSession = Depends(get_db),
+    form_data: OAuth2PasswordRequestForm = Depends()
+) -> Any:
+    """
+    OAuth2 compatible token login, get an access token for future requests
+    """
+    try:
+        user = await crud_user.authenticate(
+            db, email=form_data.username, password=form_data.password
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, please retry",
+            headers={"Retry-After": "1"},
+        )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+    elif not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user",
+        )
+    
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_access_token(
+            user.id, expires_delta=access_token_expires
+        ),
+        "token_type": "bearer",
+    }
+
+@router.post("/register")
+async def register(
+    *,
+    db: AsyncSession = Depends(get_db),
+    email: str,
+    password: str,
+    full_name: str,
+    role: str,
+    company_name: str = None,
+    phone: str = None,
+    address: str = None,
+) -> Any:
+    """
+    Register new user
+    """
+    user = await crud_user.get_by_email(db, email=email)
+    if user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
+        )
+    
+    user_in = {
+        "email": email,
+        "password": password,
+        "full_name": full_name,
+        "role": role,
+        "company_name": company_name,
+        "phone": phone,
+        "address": address,
+    }
+    
+    try:
+        user = await crud_user.create(db, obj_in=user_in)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent registrations, please retry",
+            headers={"Retry-After": "1"},
+        )
+    return {"message": "User created successfully"}
+
+@router.get("/cache-stats")
+async def read_cache_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Hit/miss counters of the authenticated principal caches, the product
+    cache (barcode scans included) and the dashboard summaries
+    """
+    return {
+        "principals": principal_cache.stats(),
+        "tokens": token_cache.stats(),
+        "products": product_cache.stats(),
+        "dashboard": dashboard_cache.stats(),
+    }
+
+@router.get("/hashing-stats")
+async def read_hashing_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Queue depth and throughput of the password hashing executor
+    """
+    return password_hasher.stats()
+
+@router.get("/startup-stats")
+async def read_startup_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Duration of the startup phases of this worker and the time from import
+    to its first response
+    """
+    return startup_timer.report()
+
+@router.get("/replica-stats")
+async def read_replica_stats(
+    current_user: User = Depends(deps.get_current_admin_user),
+) -> Any:
+    """
+    Lag and rotation state of the read replicas, and how many reads this
+    worker sent to each
+    """
+    return replicas.stats()
\ No newline at end of file
@@ -0,0 +1,30 @@
+from typing import Any
+from fastapi import APIRouter, Depends
+from app.api import deps
+from app.core.dashboard import dashboard_cache, dashboard_key
+from app.core.database import SessionLocal
+from app.crud.crud_dashboard import dashboard as crud_dashboard
+from app.models.user import User
+from app.schemas.dashboard import DashboardSummary
+
+router = APIRouter()
+
+@router.get("/summary", response_model=DashboardSummary)
+async def read_dashboard_summary(
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Product, stock, order and revenue figures for the caller's dashboard.
+
+    Served from a per-tenant cache that is refreshed in the background, so
+    figures can lag writes by up to DASHBOARD_CACHE_TTL_SECONDS.
+    """
+    role = current_user.role.value
+    user_id = current_user.id
+    
+    async def load():
+        # Own session: a background refresh outlives this request
+        async with SessionLocal() as db:
+            return await crud_dashboard.summarize(db, role=role, user_id=user_id)
+    
+    return await dashboard_cache.get(dashboard_key(role, user_id), load)
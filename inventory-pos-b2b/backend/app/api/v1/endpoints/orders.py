@@ -1,111 +1,201 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.api import deps
-from app.crud import crud_order, crud_product
-from app.models.user import User
-from app.models.order import OrderStatus
-from app.schemas.order import Order, OrderCreate, OrderUpdate
-
-router = APIRouter()
-
-@router.get("/", response_model=List[Order])
-def read_orders(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user),
-) -> Any:
-    """
-    Retrieve orders.
-    """
-    if current_user.role == "store":
-        orders = crud_order.get_by_store(
-            db, store_id=current_user.id, skip=skip, limit=limit
-        )
-    elif current_user.role == "manufacturer":
-        # For manufacturers, get orders containing their products
-        orders = crud_order.get_by_status(
-            db, status=OrderStatus.PENDING, skip=skip, limit=limit
-        )
-    else:
-        orders = crud_order.get_multi(db, skip=skip, limit=limit)
-    return orders
-
-@router.post("/", response_model=Order)
-def create_order(
-    *,
-    db: Session = Depends(deps.get_db),
-    order_in: OrderCreate,
-    current_user: User = Depends(deps.get_current_store_user),
-) -> Any:
-    """
-    Create new order.
-    """
-    # Verify all products exist and have sufficient stock
-    for item in order_in.items:
-        product = crud_product.get(db, id=item.product_id)
-        if not product:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Product with ID {item.product_id} not found.",
-            )
-        if product.quantity < item.quantity:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Insufficient stock for product {product.name}.",
-            )
-    
-    # Create order with items
-    order = crud_order.create_with_items(
-        db, obj_in=order_in, items=[item.dict() for item in order_in.items]
-    )
-    return order
-
-@router.get("/{order_id}", response_model=Order)
-def read_order(
-    *,
-    db: Session = Depends(deps.get_db),
-    order_id: int,
-    current_user: User = Depends(deps.get_current_active_user),
-) -> Any:
-    """
-    Get order by ID.
-    """
-    order = crud_order.get(db, id=order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    if current_user.role == "store" and order.store_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return order
-
-@router.put("/{order_id}/status")
-def update_order_status(
-    *,
-    db: Session = Depends(deps.get_db),
-    order_id: int,
-    status: OrderStatus,
-    current_user: User = Depends(deps.get_current_manufacturer_user),
-) -> Any:
-    """
-    Update order status.
-    """
-    order = crud_order.get(db, id=order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    # Update order status
-    order = crud_order.update_status(db, order_id=order_id, status=status)
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    
-    # If order is confirmed, update product quantities
-    if status == OrderStatus.CONFIRMED:
-        for item in order.items:
-            product = crud_product.get(db, id=item.product_id)
-            if product:
-                crud_product.update_stock(
-                    db, product_id=product.id, quantity_change=-item.quantity
-                )
-    
+from collections import defaultdict
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app.core import export
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.serialization import json_list_response
+from app.crud.crud_order import (
+    ORDER_EXPORT_COLUMNS,
+    ORDER_ITEM_EXPORT_COLUMNS,
+    InvalidStatusTransitionError,
+    order as crud_order,
+)
+from app.crud.crud_product import InsufficientStockError, product as crud_product
+from app.models.user import User
+from app.models.order import OrderStatus
+from app.schemas.order import Order, OrderCreate, OrderUpdate
+
+router = APIRouter()
+
+@router.get("/", response_model=List[Order])
+async def read_orders(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve orders, newest first.
+
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
+    """
+    if current_user.role == "store":
+        orders = await crud_order.get_by_store(
+            db, store_id=current_user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    elif current_user.role == "manufacturer":
+        # For manufacturers, get orders containing their products
+        orders = await crud_order.get_by_manufacturer(
+            db, manufacturer_id=current_user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    else:
+        orders = await crud_order.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor
+        )
+    deps.set_next_cursor(response, crud_order.next_cursor(orders, limit))
+    if settings.FAST_LIST_RESPONSES:
+        return json_list_response(Order, orders, response)
+    return orders
+
+@router.post("/", response_model=Order)
+async def create_order(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    order_in: OrderCreate,
+    current_user: User = Depends(deps.get_current_store_user),
+) -> Any:
+    """
+    Create new order.
+    """
+    # Load every referenced product in one query and total the requested
+    # quantity per product, so repeated lines are checked together
+    requested = defaultdict(int)
+    for item in order_in.items:
+        requested[item.product_id] += item.quantity
+    products = {
+        product.id: product
+        for product in await crud_product.get_multi_by_ids(db, ids=list(requested))
+    }
+    
+    # Verify all products exist and have sufficient stock
+    for product_id, quantity in requested.items():
+        product = products.get(product_id)
+        if not product:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Product with ID {product_id} not found.",
+            )
+        if product.quantity < quantity:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock for product {product.name}.",
+            )
+    
+    # Create order with items, recording each product's current cost so
+    # sales margins don't shift when the cost is edited later
+    order = await crud_order.create_with_items(
+        db,
+        obj_in=order_in,
+        items=[
+            {**item.dict(), "unit_cost": products[item.product_id].cost}
+            for item in order_in.items
+        ],
+    )
+    return order
+
+@router.get("/export")
+async def export_orders(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    status: Optional[OrderStatus] = None,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stream orders as CSV (one row per order line) or NDJSON (one object per
+    order with its items), scoped like the order listing. Rows are read
+    from a server-side cursor in batches.
+    """
+    scope = {}
+    if current_user.role == "store":
+        scope["store_id"] = current_user.id
+    elif current_user.role == "manufacturer":
+        scope["manufacturer_id"] = current_user.id
+    
+    async def batches():
+        # Own session: the response body is produced after this handler returns
+        async with SessionLocal() as db:
+            async for batch in crud_order.stream_export(
+                db, status=status, batch_size=export.EXPORT_BATCH_SIZE, **scope
+            ):
+                yield batch
+    
+    if fmt == "csv":
+        fieldnames = [
+            column.key for column in ORDER_EXPORT_COLUMNS + ORDER_ITEM_EXPORT_COLUMNS
+        ]
+        content = export.encode_csv(batches(), fieldnames)
+    else:
+        content = export.encode_ndjson(
+            export.nest_lines(batches(), key="id", prefix="item_", name="items")
+        )
+    return export.export_response(content, fmt=fmt, filename="orders")
+
+@router.get("/{order_id}", response_model=Order)
+async def read_order(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    order_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get order by ID.
+    """
+    order = await crud_order.get(db, id=order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if current_user.role == "store" and order.store_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if current_user.role == "manufacturer" and not await crud_order.has_products_of(
+        db, order_id=order_id, manufacturer_id=current_user.id
+    ):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return order
+
+@router.put("/{order_id}/status")
+async def update_order_status(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    order_id: int,
+    status: OrderStatus,
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Update order status.
+    """
+    order = await crud_order.get(db, id=order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    # Confirming an order takes its stock in the same transaction
+    if status == OrderStatus.CONFIRMED:
+        try:
+            order = await crud_order.confirm(
+                db, order_id=order_id, user_id=current_user.id
+            )
+        except InsufficientStockError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock for product {e.product_id}.",
+            )
+        if not order:
+            raise HTTPException(
+                status_code=400,
+                detail="Only pending orders can be confirmed.",
+            )
+        return {"message": "Order status updated successfully"}
+    
+    # Update order status
+    try:
+        order = await crud_order.update_status(
+            db, order_id=order_id, status=status, user_id=current_user.id
+        )
+    except InvalidStatusTransitionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
     return {"message": "Order status updated successfully"} 
\ No newline at end of file
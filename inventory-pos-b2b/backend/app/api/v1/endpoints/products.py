@@ -1,142 +1,370 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.api import deps
-from app.crud import crud_product
-from app.models.user import User
-from app.schemas.product import Product, ProductCreate, ProductUpdate
-
-router = APIRouter()
-
-@router.get("/", response_model=List[Product])
-def read_products(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user),
-) -> Any:
-    """
-    Retrieve products.
-    """
-    if current_user.role == "manufacturer":
-        products = crud_product.get_by_manufacturer(
-            db, manufacturer_id=current_user.id, skip=skip, limit=limit
-        )
-    else:
-        products = crud_product.get_multi(db, skip=skip, limit=limit)
-    return products
-
-@router.post("/", response_model=Product)
-def create_product(
-    *,
-    db: Session = Depends(deps.get_db),
-    product_in: ProductCreate,
-    current_user: User = Depends(deps.get_current_manufacturer_user),
-) -> Any:
-    """
-    Create new product.
-    """
-    product = crud_product.get_by_sku(db, sku=product_in.sku)
-    if product:
-        raise HTTPException(
-            status_code=400,
-            detail="Product with this SKU already exists.",
-        )
-    product = crud_product.get_by_barcode(db, barcode=product_in.barcode)
-    if product:
-        raise HTTPException(
-            status_code=400,
-            detail="Product with this barcode already exists.",
-        )
-    product = crud_product.create(db, obj_in=product_in)
-    return product
-
-@router.put("/{product_id}", response_model=Product)
-def update_product(
-    *,
-    db: Session = Depends(deps.get_db),
-    product_id: int,
-    product_in: ProductUpdate,
-    current_user: User = Depends(deps.get_current_manufacturer_user),
-) -> Any:
-    """
-    Update a product.
-    """
-    product = crud_product.get(db, id=product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    if product.manufacturer_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    product = crud_product.update(db, db_obj=product, obj_in=product_in)
-    return product
-
-@router.get("/{product_id}", response_model=Product)
-def read_product(
-    *,
-    db: Session = Depends(deps.get_db),
-    product_id: int,
-    current_user: User = Depends(deps.get_current_active_user),
-) -> Any:
-    """
-    Get product by ID.
-    """
-    product = crud_product.get(db, id=product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
-
-@router.delete("/{product_id}", response_model=Product)
-def delete_product(
-    *,
-    db: Session = Depends(deps.get_db),
-    product_id: int,
-    current_user: User = Depends(deps.get_current_manufacturer_user),
-) -> Any:
-    """
-    Delete a product.
-    """
-    product = crud_product.get(db, id=product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    if product.manufacturer_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    product = crud_product.remove(db, id=product_id)
-    return product
-
-@router.get("/low-stock/", response_model=List[Product])
-def read_low_stock_products(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(deps.get_current_manufacturer_user),
-) -> Any:
-    """
-    Retrieve products with low stock.
-    """
-    products = crud_product.get_low_stock(
-        db, manufacturer_id=current_user.id, skip=skip, limit=limit
-    )
-    return products
-
-@router.post("/{product_id}/update-stock")
-def update_product_stock(
-    *,
-    db: Session = Depends(deps.get_db),
-    product_id: int,
-    quantity_change: int,
-    current_user: User = Depends(deps.get_current_manufacturer_user),
-) -> Any:
-    """
-    Update product stock quantity.
-    """
-    product = crud_product.get(db, id=product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    if product.manufacturer_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    product = crud_product.update_stock(
-        db, product_id=product_id, quantity_change=quantity_change
-    )
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return {"message": "Stock updated successfully"} 
\ No newline at end of file
+import asyncio
+import hashlib
+import json
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app.core import conditional, export, product_import
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.serialization import json_list_response
+from app.core.low_stock import low_stock_notifier
+from app.core.search import MIN_TRIGRAM_QUERY_LENGTH
+from app.crud.crud_catalog import catalog_version as crud_catalog_version
+from app.crud.crud_product import EXPORT_COLUMNS, product as crud_product
+from app.crud.crud_stock import stock as crud_stock
+from app.crud.crud_stock_event import DuplicateStockEventError, stock_event as crud_stock_event
+from app.models.user import User
+from app.schemas.product import Product, ProductCreate, ProductImportResult, ProductUpdate
+from app.schemas.stock_event import StockEventBatch, StockEventBatchResult
+from app.schemas.stock_movement import StockMovement
+
+router = APIRouter()
+
+@router.get("/", response_model=List[Product])
+async def read_products(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve products.
+
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
+    Send the page's ETag back as If-None-Match to get a 304 while the
+    catalog hasn't changed.
+    """
+    manufacturer_id = current_user.id if current_user.role == "manufacturer" else None
+    version, last_modified = await crud_catalog_version.get(
+        db, manufacturer_id=manufacturer_id
+    )
+    page = hashlib.sha1(f"{skip}:{limit}:{cursor}".encode()).hexdigest()[:16]
+    etag = conditional.make_etag("catalog", manufacturer_id or "all", version, page)
+    headers = conditional.validator_headers(etag, last_modified)
+    if conditional.is_not_modified(request, etag, last_modified):
+        return conditional.not_modified(headers)
+    response.headers.update(headers)
+    
+    if current_user.role == "manufacturer":
+        products = await crud_product.get_by_manufacturer(
+            db, manufacturer_id=current_user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    else:
+        products = await crud_product.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor
+        )
+    deps.set_next_cursor(response, crud_product.next_cursor(products, limit))
+    if settings.FAST_LIST_RESPONSES:
+        return json_list_response(Product, products, response)
+    return products
+
+@router.post("/", response_model=Product)
+async def create_product(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    product_in: ProductCreate,
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Create new product.
+    """
+    product = await crud_product.get_by_sku(db, sku=product_in.sku)
+    if product:
+        raise HTTPException(
+            status_code=400,
+            detail="Product with this SKU already exists.",
+        )
+    product = await crud_product.get_by_barcode(db, barcode=product_in.barcode)
+    if product:
+        raise HTTPException(
+            status_code=400,
+            detail="Product with this barcode already exists.",
+        )
+    product = await crud_product.create(db, obj_in=product_in, user_id=current_user.id)
+    return product
+
+@router.put("/{product_id}", response_model=Product)
+async def update_product(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    product_id: int,
+    product_in: ProductUpdate,
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Update a product.
+    """
+    product = await crud_product.get(db, id=product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.manufacturer_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    product = await crud_product.update(
+        db, db_obj=product, obj_in=product_in, user_id=current_user.id
+    )
+    return product
+
+@router.post("/import", response_model=ProductImportResult)
+async def import_products(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Bulk create or update products from the request body.
+
+    Send CSV with a header row (text/csv) or one JSON object per line
+    (application/x-ndjson), or pass `format`. Rows are upserted by SKU and
+    committed in chunks as the body streams in; rows that fail are listed
+    with their row number and don't stop the import.
+    """
+    fmt = fmt or product_import.import_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass format",
+        )
+    return await product_import.import_products(
+        db,
+        product_import.read_records(request.stream(), fmt),
+        manufacturer_id=current_user.id,
+    )
+
+@router.get("/export")
+async def export_products(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stream the catalog as CSV or NDJSON; manufacturers get their own
+    products. Rows are read from a server-side cursor in batches.
+    """
+    manufacturer_id = current_user.id if current_user.role == "manufacturer" else None
+    
+    async def batches():
+        # Own session: the response body is produced after this handler returns
+        async with SessionLocal() as db:
+            async for batch in crud_product.stream_export(
+                db, manufacturer_id=manufacturer_id, batch_size=export.EXPORT_BATCH_SIZE
+            ):
+                yield batch
+    
+    if fmt == "csv":
+        fieldnames = [column.key for column in EXPORT_COLUMNS]
+        content = export.encode_csv(batches(), fieldnames)
+    else:
+        content = export.encode_ndjson(batches())
+    return export.export_response(content, fmt=fmt, filename="products")
+
+@router.get("/search", response_model=List[Product])
+async def search_products(
+    db: AsyncSession = Depends(deps.get_db),
+    q: str = Query(..., min_length=MIN_TRIGRAM_QUERY_LENGTH, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Search products by name, description, SKU or barcode, best match first.
+    """
+    return await crud_product.search(db, query=q, limit=limit)
+
+@router.get("/barcode/{code}", response_model=Product)
+async def read_product_by_barcode(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    code: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get product by barcode (POS scan lookup).
+    """
+    product = await crud_product.get_by_barcode_cached(db, barcode=code)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+@router.get("/{product_id}", response_model=Product)
+async def read_product(
+    *,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    product_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get product by ID, served from the product cache. Supports
+    If-None-Match and If-Modified-Since.
+    """
+    product = await crud_product.get_cached(db, id=product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.updated_at is not None:
+        # Writes to the stock shards of a product leave updated_at alone
+        etag = conditional.make_etag(
+            "product",
+            product_id,
+            conditional.timestamp_tag(product.updated_at),
+            product.quantity,
+        )
+        headers = conditional.validator_headers(etag, product.updated_at)
+        if conditional.is_not_modified(request, etag, product.updated_at):
+            return conditional.not_modified(headers)
+        response.headers.update(headers)
+    return product
+
+@router.delete("/{product_id}", response_model=Product)
+async def delete_product(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    product_id: int,
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Delete a product.
+    """
+    product = await crud_product.get(db, id=product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.manufacturer_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    product = await crud_product.remove(db, id=product_id)
+    return product
+
+@router.get("/low-stock/", response_model=List[Product])
+async def read_low_stock_products(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Retrieve products with low stock.
+    """
+    products = await crud_product.get_low_stock(
+        db, manufacturer_id=current_user.id, skip=skip, limit=limit, cursor=cursor
+    )
+    deps.set_next_cursor(response, crud_product.next_cursor(products, limit))
+    return products
+
+@router.get("/low-stock/events")
+async def stream_low_stock_events(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Server-sent events for products crossing their minimum stock level.
+
+    Emits "low-stock" when a product drops to or below min_quantity and
+    "restocked" when it goes back above. Only writes handled by this worker
+    are seen; use GET /low-stock/ to resynchronise after reconnecting.
+    """
+    manufacturer_id = current_user.id
+    # Don't hold a pooled connection for the lifetime of the stream
+    await db.close()
+    queue = low_stock_notifier.subscribe(manufacturer_id)
+    
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.LOW_STOCK_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            low_stock_notifier.unsubscribe(manufacturer_id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/{product_id}/update-stock")
+async def update_product_stock(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    product_id: int,
+    quantity_change: int,
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Update product stock quantity.
+    """
+    product = await crud_product.get(db, id=product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.manufacturer_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    product = await crud_product.update_stock(
+        db, product_id=product_id, quantity_change=quantity_change, user_id=current_user.id
+    )
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return {"message": "Stock updated successfully"}
+
+@router.get("/{product_id}/stock-movements", response_model=List[StockMovement])
+async def read_stock_movements(
+    response: Response,
+    product_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Stock ledger of a product, newest first: every change with its reason,
+    order and user.
+    """
+    product = await crud_product.get_cached(db, id=product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.manufacturer_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    movements = await crud_stock.get_movements(
+        db, product_id=product_id, skip=skip, limit=limit, cursor=cursor
+    )
+    deps.set_next_cursor(response, crud_stock.next_cursor(movements, limit))
+    return movements
+
+@router.post("/stock-events", response_model=StockEventBatchResult)
+async def ingest_stock_events(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    batch_in: StockEventBatch,
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Apply a batch of POS scan/sale events in one transaction.
+
+    Events are identified by `event_id`; resending a batch (after a network
+    failure, for example) only applies the events not seen before.
+    """
+    try:
+        return await crud_stock_event.ingest(
+            db,
+            events=batch_in.events,
+            manufacturer_id=current_user.id,
+            user_id=current_user.id,
+        )
+    except DuplicateStockEventError:
+        raise HTTPException(
+            status_code=409,
+            detail="Some events are being applied by a concurrent request, retry the batch.",
+        )
\ No newline at end of file
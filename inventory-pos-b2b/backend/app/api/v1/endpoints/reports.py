@@ -0,0 +1,66 @@
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api import deps
+from app.crud.crud_sales import sales as crud_sales
+from app.models.user import User
+from app.schemas.report import DailySales, ProductSales
+
+router = APIRouter()
+
+DEFAULT_REPORT_DAYS = 30
+MAX_REPORT_DAYS = 366
+
+def report_period(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_REPORT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_REPORT_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Reports cover at most {MAX_REPORT_DAYS} days",
+        )
+    return start, end
+
+@router.get("/sales/daily", response_model=List[DailySales])
+async def read_daily_sales(
+    db: AsyncSession = Depends(deps.get_db),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    store_id: Optional[int] = None,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Daily sales totals, by default for the last 30 days.
+
+    Stores and manufacturers see their own sales; admins see every store
+    or the one given by store_id.
+    """
+    start, end = report_period(start, end)
+    if current_user.role == "store":
+        return await crud_sales.get_daily(
+            db, start=start, end=end, store_id=current_user.id
+        )
+    if current_user.role == "manufacturer":
+        return await crud_sales.get_daily(
+            db, start=start, end=end, manufacturer_id=current_user.id
+        )
+    return await crud_sales.get_daily(db, start=start, end=end, store_id=store_id)
+
+@router.get("/sales/products", response_model=List[ProductSales])
+async def read_product_sales(
+    db: AsyncSession = Depends(deps.get_db),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(deps.get_current_manufacturer_user),
+) -> Any:
+    """
+    Best-selling products by revenue, by default over the last 30 days.
+    """
+    start, end = report_period(start, end)
+    return await crud_sales.get_top_products(
+        db, manufacturer_id=current_user.id, start=start, end=end, limit=limit
+    )
@@ -0,0 +1,148 @@
+"""
+Maintenance commands, run from the backend directory:
+
+    python -m app.cli seed
+    python -m app.cli backfill-sales [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+    python -m app.cli import-products FILE --manufacturer EMAIL [--format csv|ndjson]
+    python -m app.cli shard-stock (--product ID ... | --top N) --shards N
+    python -m app.cli check-plans
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, List, Optional
+from app.core import plan_check, product_import
+from app.core.database import SessionLocal, engine, init_models
+from app.core.init_db import init_db
+from app.crud.crud_product import product as crud_product
+from app.crud.crud_sales import sales as crud_sales
+from app.crud.crud_user import user as crud_user
+# Registers every model so the relationships between them resolve
+from app.models import catalog, order, product, sales, stock_event, stock_movement, user
+
+async def seed(args: argparse.Namespace) -> None:
+    # Local SQLite databases are not managed by alembic
+    if engine.url.get_backend_name() == "sqlite":
+        await init_models()
+    async with SessionLocal() as db:
+        await init_db(db)
+    print("sample users and products are in place")
+
+async def backfill_sales(args: argparse.Namespace) -> None:
+    async with SessionLocal() as db:
+        counts = await crud_sales.backfill(db, start=args.start, end=args.end)
+    for table, rows in counts.items():
+        print(f"{table}: {rows} rows")
+
+async def read_file(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+async def import_products(args: argparse.Namespace) -> None:
+    fmt = args.format or ("ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv")
+    async with SessionLocal() as db:
+        manufacturer = await crud_user.get_by_email(db, email=args.manufacturer)
+        if manufacturer is None or manufacturer.role != "manufacturer":
+            sys.exit(f"{args.manufacturer} is not a manufacturer")
+        result = await product_import.import_products(
+            db,
+            product_import.read_records(read_file(args.file), fmt),
+            manufacturer_id=manufacturer.id,
+        )
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if result["failed"] or result["aborted"]:
+        sys.exit(1)
+
+async def shard_stock(args: argparse.Namespace) -> None:
+    async with SessionLocal() as db:
+        product_ids = args.product
+        if args.top:
+            end = datetime.utcnow().date()
+            top = await crud_sales.get_top_products(
+                db, start=end - timedelta(days=args.days - 1), end=end, limit=args.top
+            )
+            product_ids = [row["product_id"] for row in top]
+        for product_id in product_ids:
+            quantity = await crud_product.set_stock_shards(
+                db, product_id=product_id, shards=args.shards
+            )
+            if quantity is None:
+                print(f"product {product_id}: not found")
+            else:
+                print(f"product {product_id}: {quantity} in {args.shards} shards")
+
+async def check_plans(args: argparse.Namespace) -> None:
+    async with SessionLocal() as db:
+        results = await plan_check.check_plans(db)
+    failed = 0
+    for result in results:
+        if result["skipped"]:
+            print(f"skip {result['name']} ({result['skipped']})")
+            continue
+        status = "FAIL" if result["problems"] else "ok"
+        print(f"{status:4} {result['name']} ({result['index']})")
+        if result["problems"] or args.verbose:
+            for problem in result["problems"]:
+                print(f"     {problem}")
+            for line in result["plan"]:
+                print(f"       {line}")
+        failed += bool(result["problems"])
+    if failed:
+        sys.exit(f"{failed} of {len(results)} plan checks failed")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    seeder = commands.add_parser("seed", help="create the sample users and products")
+    seeder.set_defaults(handler=seed)
+    
+    backfill = commands.add_parser(
+        "backfill-sales", help="rebuild the daily sales rollups from the orders"
+    )
+    backfill.add_argument("--start", type=date.fromisoformat, help="first day (inclusive)")
+    backfill.add_argument("--end", type=date.fromisoformat, help="last day (inclusive)")
+    backfill.set_defaults(handler=backfill_sales)
+    
+    importer = commands.add_parser(
+        "import-products", help="create or update products from a CSV or NDJSON file"
+    )
+    importer.add_argument("file")
+    importer.add_argument("--manufacturer", required=True, help="manufacturer email")
+    importer.add_argument(
+        "--format", choices=["csv", "ndjson"], help="default: from the file extension"
+    )
+    importer.set_defaults(handler=import_products)
+    
+    sharder = commands.add_parser(
+        "shard-stock", help="spread the stock of hot products over counter rows"
+    )
+    targets = sharder.add_mutually_exclusive_group(required=True)
+    targets.add_argument("--product", type=int, action="append", help="product id")
+    targets.add_argument("--top", type=int, help="best sellers by revenue over --days")
+    sharder.add_argument("--days", type=int, default=7)
+    sharder.add_argument(
+        "--shards", type=int, required=True, help="counter rows per product, 0 to merge back"
+    )
+    sharder.set_defaults(handler=shard_stock)
+    
+    planner = commands.add_parser(
+        "check-plans",
+        help="check that the listing queries are served by their indexes "
+        "(needs representative data)",
+    )
+    planner.add_argument("--verbose", action="store_true", help="print every plan")
+    planner.set_defaults(handler=check_plans)
+    
+    args = parser.parse_args(argv)
+    asyncio.run(args.handler(args))
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,119 @@
-from typing import List
-from pydantic_settings import BaseSettings
-from pydantic import AnyHttpUrl, validator
-
-class Settings(BaseSettings):
-    API_V1_STR: str = "/api/v1"
-    PROJECT_NAME: str = "Inventory POS B2B System"
-    
-    # CORS Configuration
-    CORS_ORIGINS: List[AnyHttpUrl] = ["http://localhost:3000"]
-    
-    @validator("CORS_ORIGINS", pre=True)
-    def assemble_cors_origins(cls, v: str | List[str]) -> List[str] | str:
-        if isinstance(v, str) and not v.startswith("["):
-            return [i.strip() for i in v.split(",")]
-        elif isinstance(v, (list, str)):
-            return v
-        raise ValueError(v)
-    
-    # Database Configuration
-    POSTGRES_SERVER: str = "localhost"
-    POSTGRES_USER: str = "postgres"
-    POSTGRES_PASSWORD: str = "postgres"
-    POSTGRES_DB: str = "inventory_pos_b2b"
-    SQLALCHEMY_DATABASE_URI: str = ""
-    
-    @validator("SQLALCHEMY_DATABASE_URI", pre=True)
-    def assemble_db_connection(cls, v: str, values: dict[str, any]) -> any:
-        if isinstance(v, str):
-            return v
-        return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}"
-    
-    # JWT Configuration
-    SECRET_KEY: str = "your-secret-key-here"  # Change in production
-    ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    
-    class Config:
-        case_sensitive = True
-        env_file = ".env"
-
+import os
+from typing import List, Optional
+from pydantic_settings import BaseSettings
+from pydantic import AnyHttpUrl, validator
+
+class Settings(BaseSettings):
+    API_V1_STR: str = "/api/v1"
+    PROJECT_NAME: str = "Inventory POS B2B System"
+    
+    # CORS Configuration
+    CORS_ORIGINS: List[AnyHttpUrl] = ["http://localhost:3000"]
+    
+    @validator("CORS_ORIGINS", pre=True)
+    def assemble_cors_origins(cls, v: str | List[str]) -> List[str] | str:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",")]
+        elif isinstance(v, (list, str)):
+            return v
+        raise ValueError(v)
+    
+    # Database Configuration
+    POSTGRES_SERVER: str = "localhost"
+    POSTGRES_USER: str = "postgres"
+    POSTGRES_PASSWORD: str = "postgres"
+    POSTGRES_DB: str = "inventory_pos_b2b"
+    SQLALCHEMY_DATABASE_URI: str = ""
+    
+    @validator("SQLALCHEMY_DATABASE_URI", pre=True, always=True)
+    def assemble_db_connection(cls, v: str, values: dict[str, any]) -> any:
+        if isinstance(v, str) and v:
+            return v
+        return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}"
+    
+    # Read replicas of the primary, comma-separated. Read-only endpoints use
+    # them while they lag at most REPLICA_MAX_LAG_SECONDS, measured every
+    # REPLICA_LAG_CHECK_SECONDS (see app.core.replicas).
+    SQLALCHEMY_REPLICA_URIS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 1.0
+    REPLICA_LAG_CHECK_SECONDS: float = 0.5
+    
+    # JWT Configuration
+    SECRET_KEY: str = "your-secret-key-here"  # Change in production
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    
+    # Password hashing. Hashes made with a different cost are rehashed on the
+    # next successful login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Authenticated principal cache (per worker process)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    
+    # Low-stock event stream: per-subscriber queue size and how often an
+    # idle stream sends a comment to keep proxies from closing it
+    LOW_STOCK_QUEUE_SIZE: int = 100
+    LOW_STOCK_KEEPALIVE_SECONDS: int = 15
+    
+    # Dashboard summaries: fresh for the TTL, then served stale for up to
+    # MAX_STALE while they are recomputed in the background
+    DASHBOARD_CACHE_SIZE: int = 10000
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    DASHBOARD_CACHE_MAX_STALE_SECONDS: int = 300
+    DASHBOARD_REVENUE_DAYS: int = 30
+    
+    # Serialize product and order lists straight to JSON, skipping the
+    # response_model validation pass (see app.core.serialization)
+    FAST_LIST_RESPONSES: bool = False
+    
+    # Product read cache, also serving POS barcode scans. "local" keeps an
+    # LRU per worker process, "shared" uses a store every worker sees:
+    # PRODUCT_CACHE_STORE names its factory as "module:callable", and an
+    # in-memory stand-in is used without one. The best sellers of the last
+    # WARM_DAYS are loaded in the background after startup (a WARM_COUNT of
+    # 0 turns that off).
+    PRODUCT_CACHE_BACKEND: str = "local"
+    PRODUCT_CACHE_STORE: Optional[str] = None
+    PRODUCT_CACHE_SIZE: int = 50000
+    PRODUCT_CACHE_TTL_SECONDS: int = 300
+    PRODUCT_CACHE_WARM_COUNT: int = 1000
+    PRODUCT_CACHE_WARM_DAYS: int = 7
+    
+    # How often the catalog changes appended by writers are folded into the
+    # catalog versions behind the product list ETags (see
+    # app.crud.crud_catalog); 0 turns the background fold off
+    CATALOG_FOLD_INTERVAL_SECONDS: int = 5
+    
+    # How often the quantity column of products whose stock is sharded is
+    # refreshed from their shards (lists, search and low-stock views read
+    # it); 0 turns the background refresh off
+    STOCK_SNAPSHOT_INTERVAL_SECONDS: int = 5
+    
+    # Query tracing for development and CI (see app.core.query_trace):
+    # statements are grouped per request, shapes repeated REPEAT_THRESHOLD
+    # times are logged as likely N+1 patterns, and requests over their
+    # budget are logged, or fail under STRICT. Statements slower than
+    # SLOW_QUERY_SECONDS are logged with their parameters either way (0
+    # turns that off).
+    QUERY_TRACE_ENABLED: bool = False
+    QUERY_TRACE_STRICT: bool = False
+    QUERY_TRACE_REPEAT_THRESHOLD: int = 5
+    SLOW_QUERY_SECONDS: float = 0.5
+    
+    # Time from import of the application to its first response; going over
+    # it is logged as a warning and fails benchmarks.startup
+    STARTUP_TARGET_SECONDS: float = 3.0
+    
+    # Bulk product import: rows validated and upserted per statement, and
+    # how many row errors the report lists
+    PRODUCT_IMPORT_CHUNK_SIZE: int = 1000
+    PRODUCT_IMPORT_MAX_ERRORS: int = 1000
+    
+    class Config:
+        case_sensitive = True
+        env_file = ".env"
+
 settings = Settings() 
\ No newline at end of file
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ADMIN_KEY: Tuple = ("admin",)
+
+def dashboard_key(role: str, user_id: int) -> Tuple:
+    """
+    Cache key of the dashboard a user sees. Admins share one dashboard,
+    stores and manufacturers each get their own.
+    """
+    if role in ("store", "manufacturer"):
+        return (role, user_id)
+    return ADMIN_KEY
+
+class SummaryCache:
+    """
+    Per-tenant cache of dashboard summaries, refreshed in the background.
+
+    An entry is served as is while fresh (ttl). Once stale it is still
+    served, up to max_stale, while a background task recomputes it, so
+    readers only wait on a cold or long-idle tenant. Concurrent misses for
+    a tenant share one computation. Invalidating a tenant drops its entry
+    and disowns any refresh already running, so a result computed before
+    the write is never stored. Like TTLCache this is per worker process.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_stale: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_stale = max(max_stale, ttl)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Summary for key, computing it with loader when missing or stale.
+        loader must open its own session: it may outlive the request.
+        """
+        now = time.monotonic()
+        entry = self._data.get(key)
+        if entry is not None and now < entry[1]:
+            self._data.move_to_end(key)
+            if now < entry[0]:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh(key, loader)
+            return entry[2]
+        self.misses += 1
+        # Shielded so a cancelled request doesn't abort a shared computation
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            task.add_done_callback(self._log_failure)
+            self._refreshing[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+            if self._refreshing.get(key) is task:
+                self._store(key, value)
+            return value
+        finally:
+            if self._refreshing.get(key) is task:
+                del self._refreshing[key]
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        self.refreshes += 1
+        self._data[key] = (now + self.ttl, now + self.max_stale, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Dashboard summary refresh failed", exc_info=task.exception())
+
+    def invalidate(
+        self,
+        *,
+        manufacturer_ids: Iterable[int] = (),
+        store_ids: Iterable[int] = (),
+        all_stores: bool = False,
+    ) -> None:
+        """
+        Drop the summaries a write affects. The admin dashboard covers every
+        tenant, so it is always dropped; all_stores is for catalog changes,
+        which every store's product count includes.
+        """
+        keys = [ADMIN_KEY]
+        keys += [("manufacturer", manufacturer_id) for manufacturer_id in manufacturer_ids]
+        keys += [("store", store_id) for store_id in store_ids]
+        if all_stores:
+            keys += [key for key in self._data if key[0] == "store"]
+        for key in keys:
+            dropped = self._data.pop(key, None) is not None
+            if self._refreshing.pop(key, None) is not None or dropped:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._refreshing.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "max_stale": self.max_stale,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refreshing": len(self._refreshing),
+            "invalidations": self.invalidations,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+dashboard_cache = SummaryCache(
+    maxsize=settings.DASHBOARD_CACHE_SIZE,
+    ttl=settings.DASHBOARD_CACHE_TTL_SECONDS,
+    max_stale=settings.DASHBOARD_CACHE_MAX_STALE_SECONDS,
+)
@@ -1,14 +1,111 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
-
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from sqlalchemy import Select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
+from app.core import query_trace
+from app.core.metrics import metrics
+from app.core.replicas import Replica, ReplicaRouter
+
+# Sync URLs (as used by alembic) mapped onto their asyncio drivers
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+def get_async_database_uri(uri: str) -> str:
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS and url.get_driver_name() != ASYNC_DRIVERS[backend]:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url.render_as_string(hide_password=False)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waits for a connection,
+    including opening a new one.
+    """
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.pool_wait.observe(time.perf_counter() - start)
+
+def engine_options(uri: str) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"pool_pre_ping": True}
+    # Local SQLite files use SQLAlchemy's default NullPool
+    if make_url(uri).get_backend_name() != "sqlite":
+        options["poolclass"] = TimedQueuePool
+    return options
+
+def create_engine(uri: str) -> AsyncEngine:
+    engine = create_async_engine(get_async_database_uri(uri), **engine_options(uri))
+    metrics.instrument_engine(engine.sync_engine)
+    query_trace.instrument_engine(engine.sync_engine)
+    return engine
+
+def replica_uris() -> List[str]:
+    return [uri.strip() for uri in settings.SQLALCHEMY_REPLICA_URIS.split(",") if uri.strip()]
+
+class RoutingSession(Session):
+    """
+    Session that reads from a replica once get_read_db() gave it one. Only
+    plain SELECTs go there: from the first write, flush, locking read or
+    raw connection on, the session is pinned to the primary, so a request
+    reads its own writes.
+    """
+
+    replica: Optional[AsyncEngine] = None
+    pinned = False
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Any:
+        if (
+            self._flushing
+            or not isinstance(clause, Select)
+            or clause._for_update_arg is not None
+        ):
+            self.pinned = True
+        elif self.replica is not None and not self.pinned:
+            return self.replica.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
+replicas = ReplicaRouter(
+    engine,
+    [Replica(repr(make_url(uri)), create_engine(uri)) for uri in replica_uris()],
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+)
+SessionLocal = async_sessionmaker(
+    bind=engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+)
+
+async def init_models() -> None:
+    """
+    Create all tables directly from the models. Only meant for local SQLite
+    databases; PostgreSQL schemas are managed by alembic.
+    """
+    # Importing the model modules registers their tables on Base.metadata
+    from app.models import (
+        catalog, order, product, replica, sales, stock_event, stock_movement, user
+    )
+    from app.models.base import Base
+    from app.core.search import create_sqlite_search_index
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_sqlite_search_index)
+
+# Dependency
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -0,0 +1,82 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Sequence
+from fastapi.responses import StreamingResponse
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows fetched from the server-side cursor per batch
+EXPORT_BATCH_SIZE = 1000
+
+Batch = Sequence[Dict[str, Any]]
+
+def plain(value: Any) -> Any:
+    """
+    JSON/CSV friendly form of a column value.
+    """
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+async def encode_csv(batches: AsyncIterator[Batch], fieldnames: List[str]) -> AsyncIterator[str]:
+    """
+    A header line, then one chunk of CSV lines per batch of rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    async for batch in batches:
+        writer.writerows({k: plain(v) for k, v in row.items()} for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def encode_ndjson(batches: AsyncIterator[Batch]) -> AsyncIterator[str]:
+    """
+    One chunk of JSON lines per batch of (possibly nested) rows.
+    """
+    async for batch in batches:
+        yield "".join(json.dumps(row, default=plain) + "\n" for row in batch)
+
+async def nest_lines(
+    batches: AsyncIterator[Batch], *, key: str, prefix: str, name: str
+) -> AsyncIterator[Batch]:
+    """
+    Fold consecutive rows sharing key into one row, with the columns
+    starting with prefix collected (prefix stripped) in a list under name.
+    Rows whose prefixed columns are all NULL (outer join misses) add no
+    entry. A parent split across batches is yielded once complete.
+    """
+    current: Dict[str, Any] = {}
+    async for batch in batches:
+        done = []
+        for row in batch:
+            if not current or row[key] != current[key]:
+                if current:
+                    done.append(current)
+                current = {k: v for k, v in row.items() if not k.startswith(prefix)}
+                current[name] = []
+            line = {k[len(prefix):]: v for k, v in row.items() if k.startswith(prefix)}
+            if any(v is not None for v in line.values()):
+                current[name].append(line)
+        if done:
+            yield done
+    if current:
+        yield [current]
+
+def export_response(content: AsyncIterator[str], *, fmt: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
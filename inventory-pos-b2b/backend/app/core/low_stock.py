@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def low_stock_event(
+    *,
+    product_id: int,
+    manufacturer_id: int,
+    quantity: int,
+    min_quantity: int,
+    previous_quantity: int,
+    previous_min_quantity: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Event for a product whose stock crossed its minimum level, or None if it
+    stayed on the same side.
+    """
+    if previous_min_quantity is None:
+        previous_min_quantity = min_quantity
+    was_low = previous_quantity <= previous_min_quantity
+    is_low = quantity <= min_quantity
+    if was_low == is_low:
+        return None
+    return {
+        "event": "low-stock" if is_low else "restocked",
+        "product_id": product_id,
+        "manufacturer_id": manufacturer_id,
+        "quantity": quantity,
+        "min_quantity": min_quantity,
+    }
+
+class LowStockNotifier:
+    """
+    Fans low-stock threshold crossings out to per-manufacturer subscribers.
+
+    Subscribers are local to the worker process, so a client only sees
+    crossings caused by writes handled by the same worker. Each subscriber
+    has a bounded queue; a subscriber that stops reading loses events
+    rather than holding memory.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, manufacturer_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[manufacturer_id].add(queue)
+        return queue
+
+    def unsubscribe(self, manufacturer_id: int, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(manufacturer_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[manufacturer_id]
+
+    def publish(self, events: Iterable[Optional[Dict[str, Any]]]) -> None:
+        for event in events:
+            if event is None:
+                continue
+            for queue in self._subscribers.get(event["manufacturer_id"], ()):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+                    logger.warning(
+                        "Dropping low-stock event for product %s, subscriber is not reading",
+                        event["product_id"],
+                    )
+
+low_stock_notifier = LowStockNotifier(queue_size=settings.LOW_STOCK_QUEUE_SIZE)
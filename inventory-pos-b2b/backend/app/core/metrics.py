@@ -0,0 +1,227 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Starlette appends the charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+Labels = Tuple[str, ...]
+
+class Histogram:
+    """
+    Prometheus-style histogram per label set. Everything runs on the event
+    loop thread (engine events included), so there is no locking.
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (last one is +Inf), sum, count]
+        self.series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            pairs = label_pairs(self.labels, labels)
+            prefix = f"{pairs}," if pairs else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{braces(pairs)} {total}")
+            lines.append(f"{self.name}_count{braces(pairs)} {count}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.series: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{braces(label_pairs(self.labels, labels))} {value}")
+        return lines
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def label_pairs(names: Labels, values: Labels) -> str:
+    return ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+def braces(pairs: str) -> str:
+    return f"{{{pairs}}}" if pairs else ""
+
+def gauge(name: str, help: str, value: float) -> List[str]:
+    return [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+class RequestStats:
+    """
+    SQL work done on behalf of one request, collected by the engine events.
+    """
+
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.seconds = 0.0
+
+# Stats of the request being handled, set by MetricsMiddleware. Tasks
+# started by a request inherit it.
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+class Metrics:
+    """
+    Request latencies, SQL statement counts and times, and connection pool
+    usage, rendered in the Prometheus text format.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.requests = Counter(
+            "http_requests_total", "Requests handled", ("method", "route", "status")
+        )
+        self.latency = Histogram(
+            "http_request_duration_seconds",
+            "Time to handle a request",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+        self.request_statements = Histogram(
+            "http_request_sql_statements",
+            "SQL statements executed per request",
+            ("method", "route"),
+            STATEMENT_BUCKETS,
+        )
+        self.request_sql_time = Histogram(
+            "http_request_sql_duration_seconds",
+            "Time spent executing SQL per request",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+        self.statement_time = Histogram(
+            "db_statement_duration_seconds", "Time to execute a SQL statement", (), SQL_BUCKETS
+        )
+        self.pool_wait = Histogram(
+            "db_pool_checkout_wait_seconds",
+            "Time spent waiting for a pooled connection",
+            (),
+            SQL_BUCKETS,
+        )
+
+    def observe_request(
+        self, method: str, route: str, status: int, seconds: float, stats: RequestStats
+    ) -> None:
+        self.requests.inc(method, route, str(status))
+        self.latency.observe(seconds, method, route)
+        self.request_statements.observe(stats.statements, method, route)
+        self.request_sql_time.observe(stats.seconds, method, route)
+
+    def observe_statement(self, seconds: float) -> None:
+        self.statement_time.observe(seconds)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += seconds
+
+    def instrument_engine(self, sync_engine: Any) -> None:
+        """
+        Time every statement the engine runs.
+        """
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info["metrics_query_start"] = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            start = conn.info.pop("metrics_query_start", None)
+            if start is not None:
+                self.observe_statement(time.perf_counter() - start)
+
+    def render(self, pool: Any) -> str:
+        lines = gauge("http_requests_in_flight", "Requests being handled", self.in_flight)
+        for metric in (
+            self.requests,
+            self.latency,
+            self.request_statements,
+            self.request_sql_time,
+            self.statement_time,
+            self.pool_wait,
+        ):
+            lines.extend(metric.render())
+        # NullPool (local SQLite) keeps no connections to report on
+        if isinstance(pool, QueuePool):
+            lines.extend(gauge("db_pool_size", "Connections the pool keeps open", pool.size()))
+            lines.extend(gauge("db_pool_checked_out", "Connections in use", pool.checkedout()))
+            lines.extend(gauge("db_pool_checked_in", "Idle pooled connections", pool.checkedin()))
+            lines.extend(
+                gauge("db_pool_overflow", "Connections open beyond the pool size", pool.overflow())
+            )
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request and labels it with its route template, so
+    /products/{product_id} is one series rather than one per product.
+    """
+
+    def __init__(self, app: Any, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.in_flight -= 1
+            request_stats.reset(token)
+            route = scope.get("route")
+            self.metrics.observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                elapsed,
+                stats,
+            )
+
+metrics = Metrics()
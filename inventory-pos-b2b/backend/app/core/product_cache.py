@@ -0,0 +1,330 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas.product import ProductSnapshot
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend:
+    """
+    Storage for product snapshots keyed by product id, and for the ids of
+    products by barcode.
+    """
+
+    async def get(self, product_id: int) -> Optional[ProductSnapshot]:
+        raise NotImplementedError
+
+    async def set(self, snapshot: ProductSnapshot) -> None:
+        raise NotImplementedError
+
+    async def get_product_id(self, barcode: str) -> Optional[int]:
+        raise NotImplementedError
+
+    async def set_product_id(self, barcode: str, product_id: int) -> None:
+        raise NotImplementedError
+
+    async def delete(self, product_ids: Iterable[int]) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+class LocalBackend(CacheBackend):
+    """
+    LRU in the worker process. Writes made by other workers are only
+    noticed once the entry expires.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.barcodes = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, product_id: int) -> Optional[ProductSnapshot]:
+        return self.entries.get(product_id)
+
+    async def set(self, snapshot: ProductSnapshot) -> None:
+        self.entries.set(snapshot.id, snapshot)
+
+    async def get_product_id(self, barcode: str) -> Optional[int]:
+        return self.barcodes.get(barcode)
+
+    async def set_product_id(self, barcode: str, product_id: int) -> None:
+        self.barcodes.set(barcode, product_id)
+
+    async def delete(self, product_ids: Iterable[int]) -> None:
+        for product_id in product_ids:
+            self.entries.pop(product_id)
+
+    async def clear(self) -> None:
+        self.entries.clear()
+        self.barcodes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.entries.stats()
+        return {
+            "size": stats["size"],
+            "barcodes": self.barcodes.stats()["size"],
+            "maxsize": stats["maxsize"],
+            "evictions": stats["evictions"],
+        }
+
+class KeyValueStore:
+    """
+    The subset of a shared key/value store (GET, SET with expiry, DEL)
+    the shared backend needs. Wrap a real client in this interface and name
+    its factory in PRODUCT_CACHE_STORE to plug it in.
+    """
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self, prefix: str) -> None:
+        raise NotImplementedError
+
+class MemoryStore(KeyValueStore):
+    """
+    Local stand-in for a shared store: values go through bytes like they
+    would over the network, but only this process sees them.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: Dict[str, Any] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if key not in self._data and len(self._data) >= self.maxsize:
+            # Like a store configured to evict the oldest keys
+            del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def clear(self, prefix: str) -> None:
+        for key in [key for key in self._data if key.startswith(prefix)]:
+            del self._data[key]
+
+class SharedBackend(CacheBackend):
+    """
+    Snapshots serialized to JSON in a store shared by all workers, so an
+    invalidation is seen everywhere at once.
+    """
+
+    def __init__(self, store: KeyValueStore, ttl: float, prefix: str = "product:"):
+        self.store = store
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, product_id: int) -> Optional[ProductSnapshot]:
+        value = await self.store.get(f"{self.prefix}{product_id}")
+        if value is None:
+            return None
+        return ProductSnapshot.model_validate_json(value)
+
+    async def set(self, snapshot: ProductSnapshot) -> None:
+        await self.store.set(
+            f"{self.prefix}{snapshot.id}", snapshot.model_dump_json().encode(), self.ttl
+        )
+
+    async def get_product_id(self, barcode: str) -> Optional[int]:
+        value = await self.store.get(f"{self.prefix}barcode:{barcode}")
+        return None if value is None else int(value)
+
+    async def set_product_id(self, barcode: str, product_id: int) -> None:
+        await self.store.set(
+            f"{self.prefix}barcode:{barcode}", str(product_id).encode(), self.ttl
+        )
+
+    async def delete(self, product_ids: Iterable[int]) -> None:
+        keys = [f"{self.prefix}{product_id}" for product_id in product_ids]
+        if keys:
+            await self.store.delete(*keys)
+
+    async def clear(self) -> None:
+        await self.store.clear(self.prefix)
+
+def load_store(path: Optional[str], maxsize: int) -> KeyValueStore:
+    """
+    Instantiate the store named by a "module:factory" path, or the
+    in-memory stand-in when none is configured.
+    """
+    if not path:
+        return MemoryStore(maxsize=maxsize)
+    module_name, _, factory = path.partition(":")
+    return getattr(importlib.import_module(module_name), factory)()
+
+def make_backend(name: str) -> CacheBackend:
+    if name == "local":
+        return LocalBackend(
+            maxsize=settings.PRODUCT_CACHE_SIZE, ttl=settings.PRODUCT_CACHE_TTL_SECONDS
+        )
+    if name == "shared":
+        return SharedBackend(
+            load_store(settings.PRODUCT_CACHE_STORE, settings.PRODUCT_CACHE_SIZE),
+            ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+        )
+    raise ValueError(f"Unknown product cache backend {name!r}")
+
+class ProductCache:
+    """
+    Read-through cache of product snapshots in front of the database, by id
+    and by barcode for POS scans. A barcode maps to a product id, and the
+    snapshot is only trusted while it still carries the scanned barcode, so
+    invalidating by id covers barcode lookups too.
+
+    Writers refresh or invalidate entries after their transaction commits.
+    A load that overlaps an invalidation is returned but not stored, so a
+    reader can't put back a row that was changed while it was reading.
+    With read replicas, a reader can still load a row from a replica that
+    has not applied the write yet, so changed entries are dropped a second
+    time once the replicas may lag no more.
+    Backend errors are logged and treated as misses; the database stays
+    the source of truth.
+    """
+
+    def __init__(self, backend: CacheBackend, replica_lag: float = 0):
+        self.backend = backend
+        self.replica_lag = replica_lag
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+        # Bumped by every refresh/invalidation, see get_or_load()
+        self._generation = 0
+        self._delayed: Set[asyncio.Task] = set()
+
+    async def get_or_load(
+        self, product_id: int, load: Callable[[], Awaitable[Any]]
+    ) -> Optional[ProductSnapshot]:
+        try:
+            snapshot = await self.backend.get(product_id)
+        except Exception:
+            self._log_error("read")
+            snapshot = None
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        return await self._load(load)
+
+    async def get_or_load_by_barcode(
+        self, barcode: str, load: Callable[[], Awaitable[Any]]
+    ) -> Optional[ProductSnapshot]:
+        try:
+            product_id = await self.backend.get_product_id(barcode)
+            snapshot = None if product_id is None else await self.backend.get(product_id)
+        except Exception:
+            self._log_error("read")
+            snapshot = None
+        if snapshot is not None and snapshot.barcode == barcode:
+            self.hits += 1
+            return snapshot
+        return await self._load(load)
+
+    async def _load(self, load: Callable[[], Awaitable[Any]]) -> Optional[ProductSnapshot]:
+        self.misses += 1
+        generation = self._generation
+        product = await load()
+        if product is None:
+            return None
+        snapshot = ProductSnapshot.model_validate(product)
+        if generation == self._generation:
+            await self._set(snapshot)
+        return snapshot
+
+    async def refresh(self, product: Any) -> ProductSnapshot:
+        """
+        Store a product just written by a committed transaction.
+        """
+        self._generation += 1
+        snapshot = ProductSnapshot.model_validate(product)
+        await self._set(snapshot)
+        self._invalidate_later([snapshot.id])
+        return snapshot
+
+    async def invalidate(self, product_ids: Iterable[int]) -> None:
+        product_ids = list(product_ids)
+        self._generation += 1
+        self.invalidations += len(product_ids)
+        try:
+            await self.backend.delete(product_ids)
+        except Exception:
+            self._log_error("invalidate")
+        self._invalidate_later(product_ids)
+
+    def _invalidate_later(self, product_ids: List[int]) -> None:
+        if self.replica_lag <= 0:
+            return
+        task = asyncio.create_task(self._invalidate_after(product_ids, self.replica_lag))
+        self._delayed.add(task)
+        task.add_done_callback(self._delayed.discard)
+
+    async def _invalidate_after(self, product_ids: List[int], delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._generation += 1
+        try:
+            await self.backend.delete(product_ids)
+        except Exception:
+            self._log_error("invalidate")
+
+    async def clear(self) -> None:
+        self._generation += 1
+        await self.backend.clear()
+
+    async def warm(self, products: Iterable[Any]) -> int:
+        warmed = 0
+        for product in products:
+            await self._set(ProductSnapshot.model_validate(product))
+            warmed += 1
+        return warmed
+
+    async def _set(self, snapshot: ProductSnapshot) -> None:
+        try:
+            await self.backend.set(snapshot)
+            await self.backend.set_product_id(snapshot.barcode, snapshot.id)
+        except Exception:
+            self._log_error("write")
+
+    def _log_error(self, operation: str) -> None:
+        self.errors += 1
+        logger.warning("Product cache %s failed", operation, exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            **self.backend.stats(),
+        }
+
+product_cache = ProductCache(
+    make_backend(settings.PRODUCT_CACHE_BACKEND),
+    replica_lag=settings.REPLICA_MAX_LAG_SECONDS if settings.SQLALCHEMY_REPLICA_URIS else 0,
+)
@@ -0,0 +1,344 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.low_stock import low_stock_event
+from app.crud.crud_catalog import catalog_version
+from app.crud.crud_product import product as crud_product
+from app.crud.crud_stock import movement, stock as crud_stock
+from app.models.stock_movement import StockMovementReason
+from app.schemas.product import ProductCreate
+
+# Request content types accepted by the import, mapped to their format
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+IMPORT_FIELDS = tuple(ProductCreate.model_fields)
+
+# Longest line accepted, so a file without line breaks can't exhaust memory
+MAX_LINE_LENGTH = 1 << 20
+# Longest CSV record accepted, as quoted fields may span lines: one stray
+# quote would otherwise pull the rest of the upload into a single record
+MAX_RECORD_LENGTH = MAX_LINE_LENGTH
+
+# Row number, parsed row, and the parse error if the row couldn't be read
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+class ImportFormatError(ValueError):
+    """
+    The input can't be read any further (bad encoding, missing header...).
+    """
+
+def import_format(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    return IMPORT_CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Decode a UTF-8 byte stream into lines, keeping the line endings.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+            if len(pending) > MAX_LINE_LENGTH:
+                raise ImportFormatError(f"Line longer than {MAX_LINE_LENGTH} characters")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise ImportFormatError(f"Input is not valid UTF-8: {e}")
+    if pending:
+        yield pending
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """
+    Rows of a CSV file with a header line, as dicts keyed by the header.
+    Quoted fields may span lines, up to MAX_RECORD_LENGTH per record.
+    """
+    header: Optional[List[str]] = None
+    row_number = 0
+    # Lines of the record being read, with their total length and quotes
+    parts: List[str] = []
+    length = quotes = 0
+    async for line in lines:
+        parts.append(line)
+        length += len(line)
+        quotes += line.count('"')
+        # An odd number of quotes means a quoted field continues on the next line
+        if quotes % 2:
+            if length > MAX_RECORD_LENGTH:
+                raise ImportFormatError(
+                    f"Record longer than {MAX_RECORD_LENGTH} characters"
+                    " (unterminated quoted field?)"
+                )
+            continue
+        record = "".join(parts)
+        parts, length, quotes = [], 0, 0
+        if not record.strip():
+            continue
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as e:
+            values, error = None, str(e)
+        if header is None:
+            if values is None:
+                raise ImportFormatError(f"Unreadable CSV header: {error}")
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if values is None:
+            yield row_number, None, error
+        elif len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            # Empty cells mean "not given", not an empty string
+            yield row_number, {k: v if v != "" else None for k, v in zip(header, values)}, None
+    if "".join(parts).strip():
+        yield row_number + 1, None, "Unterminated quoted field"
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    """
+    One JSON object per line; blank lines are skipped.
+    """
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, data, None
+
+def read_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Record]:
+    if fmt == "csv":
+        return iter_csv_records(iter_lines(chunks))
+    if fmt == "ndjson":
+        return iter_ndjson_records(iter_lines(chunks))
+    raise ValueError(f"Unknown import format {fmt!r}")
+
+class ProductImport:
+    """
+    Streams product records into the catalog in chunks: each chunk is
+    validated against ProductCreate, checked against existing SKUs and
+    barcodes with one query, upserted with one multi-row statement and
+    committed. Only the current chunk and the first max_errors errors are
+    kept in memory.
+    """
+
+    def __init__(self, manufacturer_id: int, chunk_size: int, max_errors: int):
+        self.manufacturer_id = manufacturer_id
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.aborted: Optional[str] = None
+
+    def fail(self, row: int, sku: Optional[str], errors: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "sku": sku, "errors": errors})
+
+    def validate(self, row: int, data: Dict[str, Any]) -> Optional[ProductCreate]:
+        data = {k: v for k, v in data.items() if k in IMPORT_FIELDS}
+        data["manufacturer_id"] = self.manufacturer_id
+        try:
+            return ProductCreate.model_validate(data)
+        except ValidationError as e:
+            self.fail(row, data.get("sku"), [
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            ])
+            return None
+
+    async def run(self, db: AsyncSession, records: AsyncIterator[Record]) -> Dict[str, Any]:
+        chunk: List[Tuple[int, ProductCreate]] = []
+        try:
+            async for row, data, error in records:
+                self.rows += 1
+                if error is not None:
+                    self.fail(row, None, [error])
+                    continue
+                product = self.validate(row, data)
+                if product is None:
+                    continue
+                chunk.append((row, product))
+                if len(chunk) >= self.chunk_size:
+                    await self.write(db, chunk)
+                    chunk = []
+        except ImportFormatError as e:
+            self.aborted = str(e)
+        if chunk:
+            await self.write(db, chunk)
+        if self.created or self.updated:
+            await crud_product.after_product_change(
+                manufacturer_ids=[self.manufacturer_id], all_stores=True
+            )
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "aborted": self.aborted,
+        }
+
+    async def record(self, db: AsyncSession, written: List[Tuple[ProductCreate, Any]]) -> None:
+        """
+        Ledger rows for the quantities just upserted, in the same
+        transaction. existing is the locked row read before the upsert.
+        """
+        created = [product.sku for product, existing in written if existing is None]
+        ids = {}
+        if created:
+            matches = await crud_product.get_import_matches(db, skus=created, barcodes=[])
+            ids = {
+                match.sku: match.id
+                for match in matches
+                if match.manufacturer_id == self.manufacturer_id
+            }
+        movements = []
+        for product, existing in written:
+            if existing is None:
+                product_id, previous = ids.get(product.sku), 0
+                reason = StockMovementReason.INITIAL
+            else:
+                product_id, previous = existing.id, existing.quantity
+                reason = StockMovementReason.IMPORT
+                if existing.stock_shards:
+                    # The upsert only overwrote the snapshot
+                    previous = await crud_stock.set_quantity(
+                        db, product_id=existing.id, quantity=product.quantity
+                    )
+            if product_id is not None and product.quantity != previous:
+                movements.append(movement(
+                    product_id,
+                    product.quantity - previous,
+                    reason,
+                    user_id=self.manufacturer_id,
+                ))
+        await crud_stock.record(db, movements=movements)
+
+    async def write(self, db: AsyncSession, chunk: List[Tuple[int, ProductCreate]]) -> None:
+        matches = await crud_product.get_import_matches(
+            db,
+            skus=[product.sku for _, product in chunk],
+            barcodes=[product.barcode for _, product in chunk],
+        )
+        by_sku = {match.sku: match for match in matches}
+        by_barcode = {match.barcode: match for match in matches}
+        
+        accepted: List[Tuple[int, ProductCreate, Any]] = []
+        sku_rows: Dict[str, int] = {}
+        barcode_rows: Dict[str, int] = {}
+        for row, product in chunk:
+            existing = by_sku.get(product.sku)
+            holder = by_barcode.get(product.barcode)
+            if existing is not None and existing.manufacturer_id != self.manufacturer_id:
+                self.fail(row, product.sku, ["sku: Used by another manufacturer"])
+            elif holder is not None and holder.sku != product.sku:
+                self.fail(row, product.sku, [f"barcode: Already used by SKU {holder.sku}"])
+            elif product.sku in sku_rows:
+                self.fail(row, product.sku, [f"sku: Repeats row {sku_rows[product.sku]}"])
+            elif product.barcode in barcode_rows:
+                self.fail(
+                    row, product.sku, [f"barcode: Repeats row {barcode_rows[product.barcode]}"]
+                )
+            else:
+                sku_rows[product.sku] = row
+                barcode_rows[product.barcode] = row
+                accepted.append((row, product, existing))
+        if not accepted:
+            return
+        
+        try:
+            await crud_product.upsert_many(
+                db, rows=[product.model_dump() for _, product, _ in accepted]
+            )
+            await self.record(db, [(product, existing) for _, product, existing in accepted])
+            await catalog_version.bump(db, manufacturer_ids=[self.manufacturer_id])
+            await db.commit()
+        except IntegrityError:
+            # A concurrent write, or barcodes swapped between products of
+            # the chunk: retry row by row to isolate the conflicting ones
+            await db.rollback()
+            written = []
+            for row, product, existing in accepted:
+                try:
+                    # The chunk's locks are gone, read the row again
+                    matches = await crud_product.get_import_matches(
+                        db, skus=[product.sku], barcodes=[]
+                    )
+                    existing = matches[0] if matches else None
+                    owner = existing.manufacturer_id if existing is not None else None
+                    if owner not in (None, self.manufacturer_id):
+                        await db.rollback()
+                        self.fail(row, product.sku, ["sku: Used by another manufacturer"])
+                        continue
+                    await crud_product.upsert_many(db, rows=[product.model_dump()])
+                    await self.record(db, [(product, existing)])
+                    await catalog_version.bump(db, manufacturer_ids=[self.manufacturer_id])
+                    await db.commit()
+                except IntegrityError:
+                    await db.rollback()
+                    self.fail(row, product.sku, ["Conflicts with another product"])
+                else:
+                    written.append((row, product, existing))
+            accepted = written
+        
+        if not accepted:
+            return
+        
+        updated = [(product, existing) for _, product, existing in accepted if existing]
+        self.updated += len(updated)
+        self.created += len(accepted) - len(updated)
+        # Dashboards are dropped once, after the last chunk
+        await crud_product.after_product_change(
+            product_ids=[existing.id for _, existing in updated],
+            events=[
+                low_stock_event(
+                    product_id=existing.id,
+                    manufacturer_id=self.manufacturer_id,
+                    quantity=product.quantity,
+                    min_quantity=product.min_quantity,
+                    previous_quantity=existing.quantity,
+                    previous_min_quantity=existing.min_quantity,
+                )
+                for product, existing in updated
+            ],
+        )
+
+async def import_products(
+    db: AsyncSession,
+    records: AsyncIterator[Record],
+    *,
+    manufacturer_id: int,
+    chunk_size: int = settings.PRODUCT_IMPORT_CHUNK_SIZE,
+    max_errors: int = settings.PRODUCT_IMPORT_MAX_ERRORS,
+) -> Dict[str, Any]:
+    """
+    Create or update a manufacturer's products from parsed records; see
+    read_records(). Rows are upserted by SKU and replace the whole product.
+    """
+    return await ProductImport(manufacturer_id, chunk_size, max_errors).run(db, records)
@@ -0,0 +1,172 @@
+"""
+Query tracing for development and CI.
+
+Every statement is timed by engine events; the slow ones are logged with
+their parameters. With QUERY_TRACE_ENABLED, statements are also grouped per
+request: statement shapes repeated QUERY_TRACE_REPEAT_THRESHOLD times or
+more (the signature of a per-row lookup) are logged, and a request running
+more statements than its route's entry in QUERY_BUDGETS is logged, or fails
+with QueryBudgetExceeded under QUERY_TRACE_STRICT. Tests can put a budget
+around any block with query_budget().
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Most statements each route may run, keyed by "METHOD route template".
+# Authentication is usually served from the principal cache; the budgets
+# leave room for a cache miss (one lookup).
+QUERY_BUDGETS: Dict[str, int] = {
+    "POST /api/v1/auth/login": 2,
+    "GET /api/v1/products/": 4,
+    "GET /api/v1/products/{product_id}": 2,
+    "GET /api/v1/products/barcode/{code}": 2,
+    "GET /api/v1/products/search": 3,
+    "POST /api/v1/products/": 8,
+    "PUT /api/v1/products/{product_id}": 8,
+    "POST /api/v1/products/{product_id}/update-stock": 6,
+    "GET /api/v1/orders/": 3,
+    "GET /api/v1/orders/{order_id}": 4,
+    "POST /api/v1/orders/": 7,
+    "PUT /api/v1/orders/{order_id}/status": 17,
+    "GET /api/v1/dashboard/summary": 5,
+}
+
+# Lists of placeholders, as rendered for IN (...) and multi-row VALUES
+_PLACEHOLDER = r"\s*(?:\?|\$\d+|%s|%\(\w+\)s)\s*"
+_PLACEHOLDER_LIST = re.compile(rf"\((?:{_PLACEHOLDER},)+{_PLACEHOLDER}\)")
+_WHITESPACE = re.compile(r"\s+")
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+def statement_shape(statement: str) -> str:
+    """
+    The statement with its whitespace normalized and placeholder lists
+    collapsed, so lookups differing only in how many ids they pass match.
+    """
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+class QueryTrace:
+    """
+    Statements run while the trace is active.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.statements: List[Tuple[str, float]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Statement shapes run at least threshold times, most frequent first.
+        """
+        shapes = Counter(statement_shape(statement) for statement, _ in self.statements)
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+    def summary(self) -> str:
+        lines = [f"{self.name}: {self.count} statements in {self.seconds * 1000:.1f} ms"]
+        for shape, count in Counter(
+            statement_shape(statement) for statement, _ in self.statements
+        ).most_common():
+            lines.append(f"  {count} x {shape[:300]}")
+        return "\n".join(lines)
+
+# Traces statements are recorded into; nested traces (a query_budget()
+# around a request) all see them
+_active: ContextVar[Tuple[QueryTrace, ...]] = ContextVar("query_traces", default=())
+
+@contextmanager
+def trace(name: str) -> Iterator[QueryTrace]:
+    current = QueryTrace(name)
+    token = _active.set(_active.get() + (current,))
+    try:
+        yield current
+    finally:
+        _active.reset(token)
+
+@contextmanager
+def query_budget(limit: int, name: str = "block") -> Iterator[QueryTrace]:
+    """
+    Fail with QueryBudgetExceeded if the block runs more than limit
+    statements, e.g. in a test:
+
+        with query_budget(3):
+            response = await client.get(f"/api/v1/orders/{order_id}")
+    """
+    with trace(name) as current:
+        yield current
+    if current.count > limit:
+        raise QueryBudgetExceeded(f"over the budget of {limit}\n{current.summary()}")
+
+def check_request(current: QueryTrace, budget: Optional[int]) -> None:
+    """
+    Log the repeated statements of a finished request, and the request if
+    it went over its budget.
+    """
+    for shape, count in current.repeated(settings.QUERY_TRACE_REPEAT_THRESHOLD):
+        logger.warning("%s ran the same statement %d times: %s", current.name, count, shape)
+    if budget is not None and current.count > budget:
+        message = f"over the budget of {budget}\n{current.summary()}"
+        if settings.QUERY_TRACE_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+def format_parameters(parameters: Any, limit: int = 500) -> str:
+    text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def instrument_engine(sync_engine: Any) -> None:
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_trace_start"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_trace_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if settings.SLOW_QUERY_SECONDS and elapsed >= settings.SLOW_QUERY_SECONDS:
+            logger.warning(
+                "Slow statement (%.3fs): %s parameters: %s",
+                elapsed,
+                _WHITESPACE.sub(" ", statement).strip(),
+                format_parameters(parameters),
+            )
+        for current in _active.get():
+            current.statements.append((statement, elapsed))
+
+class QueryTraceMiddleware:
+    """
+    Traces the statements of each request, see check_request(). Only
+    installed with QUERY_TRACE_ENABLED.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with trace(f"{scope['method']} {scope['path']}") as current:
+            await self.app(scope, receive, send)
+        route = getattr(scope.get("route"), "path", None)
+        key = f"{scope['method']} {route}"
+        check_request(current, QUERY_BUDGETS.get(key))
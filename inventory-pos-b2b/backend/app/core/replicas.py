@@ -0,0 +1,144 @@
+"""
+Read replicas for the read-only endpoints.
+
+The primary's heartbeat row is rewritten every REPLICA_LAG_CHECK_SECONDS
+and each replica's copy of it is read back: a replica that has not applied
+a heartbeat is missing every write made since, so its lag is the age of the
+oldest heartbeat it is missing. Replicas lagging more than
+REPLICA_MAX_LAG_SECONDS, or not answering, are taken out of rotation until
+they catch up; with none left, reads go to the primary.
+"""
+import asyncio
+import itertools
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.models.replica import ReplicaHeartbeat
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_ID = 1
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        # Seconds behind the primary, None until checked or when unreachable
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.reads = 0
+
+class ReplicaRouter:
+    """
+    Picks the replica a read-only request reads from, round robin over the
+    replicas in rotation.
+    """
+
+    def __init__(self, primary: AsyncEngine, replicas: List[Replica], max_lag: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.primary_reads = 0
+        self._turn = itertools.count()
+        # Heartbeats this worker wrote, oldest first
+        self._beats: Deque[datetime] = deque(maxlen=1000)
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """
+        Engine of a replica in rotation, or None to read from the primary.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.primary_reads += 1
+            return None
+        replica = healthy[next(self._turn) % len(healthy)]
+        replica.reads += 1
+        return replica.engine
+
+    async def beat(self) -> None:
+        now = datetime.utcnow()
+        async with self.primary.begin() as conn:
+            result = await conn.execute(
+                update(ReplicaHeartbeat)
+                .where(ReplicaHeartbeat.id == HEARTBEAT_ID)
+                .values(beat_at=now)
+            )
+            if result.rowcount == 0:
+                await conn.execute(
+                    insert(ReplicaHeartbeat).values(id=HEARTBEAT_ID, beat_at=now)
+                )
+        self._beats.append(now)
+
+    def lag(self, applied: Optional[datetime], now: datetime) -> Optional[float]:
+        """
+        Lag of a replica whose latest heartbeat is `applied`. Heartbeats of
+        other workers only tell that the replica got at least that far.
+        """
+        if applied is None:
+            return None
+        for written in self._beats:
+            if written > applied:
+                return (now - written).total_seconds()
+        return 0.0
+
+    async def _applied(self, engine: AsyncEngine) -> Optional[datetime]:
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(ReplicaHeartbeat.beat_at).where(ReplicaHeartbeat.id == HEARTBEAT_ID)
+            )
+            return result.scalar()
+
+    async def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                applied = await asyncio.wait_for(self._applied(replica.engine), self.max_lag)
+                replica.lag = self.lag(applied, datetime.utcnow())
+            except Exception:
+                if replica.healthy:
+                    logger.warning("Replica %s unreachable", replica.name, exc_info=True)
+                replica.lag = None
+            self._set_healthy(replica, replica.lag is not None and replica.lag <= self.max_lag)
+
+    def _set_healthy(self, replica: Replica, healthy: bool) -> None:
+        if healthy and not replica.healthy:
+            logger.info("Replica %s back in rotation", replica.name)
+        elif replica.healthy and not healthy:
+            logger.warning("Replica %s out of rotation (lag %s)", replica.name, replica.lag)
+        replica.healthy = healthy
+
+    async def run(self, interval: float) -> None:
+        """
+        Write a heartbeat, give the replicas an interval to apply it, then
+        check them; forever.
+        """
+        while True:
+            try:
+                await self.beat()
+            except Exception:
+                # Without heartbeats the lag can't be measured
+                logger.exception("Replica heartbeat failed")
+                for replica in self.replicas:
+                    replica.lag = None
+                    self._set_healthy(replica, False)
+                await asyncio.sleep(interval)
+                continue
+            await asyncio.sleep(interval)
+            await self.check()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_lag": self.max_lag,
+            "primary_reads": self.primary_reads,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag": replica.lag,
+                    "reads": replica.reads,
+                }
+                for replica in self.replicas
+            ],
+        }
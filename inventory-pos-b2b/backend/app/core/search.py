@@ -0,0 +1,143 @@
+import re
+from typing import List, Optional, Set
+from sqlalchemy import column, table, text
+from sqlalchemy.engine import Connection
+
+# Shortest query (and, on SQLite, query word) the trigram indexes can answer
+MIN_TRIGRAM_QUERY_LENGTH = 3
+
+# Upper bound on trigrams OR-ed into an FTS5 query so long inputs stay cheap
+MAX_QUERY_TRIGRAMS = 24
+
+# Minimum word_similarity for a fuzzy match, mirroring pg_trgm's
+# word_similarity_threshold default
+FUZZY_MATCH_THRESHOLD = 0.5
+
+# Fuzzy candidates fetched per requested result before filtering
+FUZZY_CANDIDATES_PER_RESULT = 5
+
+# SQLite keeps an external-content FTS5 index over the product columns.
+# The update trigger only fires for the indexed columns, so stock writes
+# never touch it.
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE product_search USING fts5(
+        name, description, sku, barcode,
+        content='product', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER product_search_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_search(rowid, name, description, sku, barcode)
+        VALUES (new.id, new.name, new.description, new.sku, new.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER product_search_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_search(product_search, rowid, name, description, sku, barcode)
+        VALUES ('delete', old.id, old.name, old.description, old.sku, old.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER product_search_au
+    AFTER UPDATE OF name, description, sku, barcode ON product BEGIN
+        INSERT INTO product_search(product_search, rowid, name, description, sku, barcode)
+        VALUES ('delete', old.id, old.name, old.description, old.sku, old.barcode);
+        INSERT INTO product_search(rowid, name, description, sku, barcode)
+        VALUES (new.id, new.name, new.description, new.sku, new.barcode);
+    END
+    """,
+    # Default rank weights for name, description, sku and barcode
+    """
+    INSERT INTO product_search(product_search, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0, 5.0, 5.0)')
+    """,
+]
+
+# The table-named column is the FTS5 MATCH target
+product_search = table(
+    "product_search", column("product_search"), column("rowid"), column("rank")
+)
+
+def create_sqlite_search_index(connection: Connection) -> None:
+    """
+    Create and populate the FTS5 product index on a SQLite database that
+    does not have it yet.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'product_search'")
+    ).first()
+    if exists:
+        return
+    for statement in SQLITE_SEARCH_DDL:
+        connection.execute(text(statement))
+    connection.execute(
+        text("INSERT INTO product_search(product_search) VALUES ('rebuild')")
+    )
+
+def escape_like(value: str, escape: str = "\\") -> str:
+    return (
+        value.replace(escape, escape * 2)
+        .replace("%", escape + "%")
+        .replace("_", escape + "_")
+    )
+
+def search_words(query: str) -> List[str]:
+    """
+    Lower-cased words of query long enough for the trigram index.
+    """
+    words = []
+    for word in query.lower().split():
+        if len(word) >= MIN_TRIGRAM_QUERY_LENGTH and word not in words:
+            words.append(word)
+    return words
+
+def trigrams(word: str) -> List[str]:
+    size = MIN_TRIGRAM_QUERY_LENGTH
+    return [word[i:i + size] for i in range(len(word) - size + 1)]
+
+def fts5_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def sqlite_exact_match(words: List[str]) -> str:
+    """
+    FTS5 expression matching products that contain every word as a substring.
+    """
+    return " AND ".join(fts5_phrase(word) for word in words)
+
+def sqlite_fuzzy_match(words: List[str]) -> str:
+    """
+    FTS5 expression matching products sharing any trigram with the words.
+    It over-matches on purpose; candidates are filtered with
+    word_similarity() afterwards.
+    """
+    terms: List[str] = []
+    for word in words:
+        for trigram in trigrams(word):
+            if trigram not in terms:
+                terms.append(trigram)
+    return " OR ".join(fts5_phrase(term) for term in terms[:MAX_QUERY_TRIGRAMS])
+
+def padded_trigrams(text: str) -> Set[str]:
+    """
+    Trigrams of each word in text, padded the way pg_trgm pads them so that
+    word starts and ends count as trigrams too.
+    """
+    result: Set[str] = set()
+    for word in re.findall(r"\w+", text.lower()):
+        result.update(trigrams(f"  {word} "))
+    return result
+
+def word_similarity(words: List[str], *texts: Optional[str]) -> float:
+    """
+    Share of the words' trigrams found in texts, averaged over the words.
+    A rough counterpart of pg_trgm's word_similarity for the SQLite path.
+    """
+    if not words:
+        return 0.0
+    haystack = padded_trigrams(" ".join(t for t in texts if t))
+    total = 0.0
+    for word in words:
+        word_trigrams = padded_trigrams(word)
+        total += len(word_trigrams & haystack) / len(word_trigrams)
+    return total / len(words)
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, get_args, get_origin
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+# Headers of the injected response that describe its own (empty) body
+BODY_HEADERS = {"content-length", "content-type"}
+
+# Per schema: (field name, nested schema or None, whether it is a list)
+FieldPlan = List[Tuple[str, Optional[Type[BaseModel]], bool]]
+
+_plans: Dict[Type[BaseModel], FieldPlan] = {}
+
+def field_plan(schema: Type[BaseModel]) -> FieldPlan:
+    """
+    The fields of schema in declaration order, built once per schema.
+    Fields holding a schema, or a list of them, are serialized recursively.
+    """
+    plan = _plans.get(schema)
+    if plan is None:
+        plan = []
+        for name, field in schema.model_fields.items():
+            many = get_origin(field.annotation) in (list, List)
+            inner = get_args(field.annotation)[0] if many else field.annotation
+            nested = inner if isinstance(inner, type) and issubclass(inner, BaseModel) else None
+            plan.append((name, nested, many))
+        _plans[schema] = plan
+    return plan
+
+def to_rows(schema: Type[BaseModel], items: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    Plain dicts of the schema's fields read off ORM objects.
+    """
+    plan = field_plan(schema)
+    rows = []
+    for item in items:
+        row = {}
+        for name, nested, many in plan:
+            value = getattr(item, name)
+            if nested is not None and value is not None:
+                value = to_rows(nested, value) if many else to_rows(nested, [value])[0]
+            row[name] = value
+        rows.append(row)
+    return rows
+
+def json_list_response(
+    schema: Type[BaseModel], items: Sequence[Any], response: Optional[Response] = None
+) -> Response:
+    """
+    Serialize ORM objects straight to JSON bytes with pydantic-core,
+    instead of FastAPI's response_model validation followed by
+    jsonable_encoder and json.dumps. Enabled with FAST_LIST_RESPONSES.
+
+    The rows are not validated: the schema only picks the fields, whose
+    columns already hold the documented types, so the body is the same.
+    Routes keep their response_model, and headers set on the injected
+    response are carried over.
+    """
+    result = Response(content=to_json(to_rows(schema, items)), media_type="application/json")
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in BODY_HEADERS:
+                result.headers[name] = value
+    return result
@@ -0,0 +1,80 @@
+import time
+
+# Taken before anything else is imported; app.main imports this module first
+IMPORTED_AT = time.perf_counter()
+
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class StartupTimer:
+    """
+    Durations of the startup phases, and the time from import of the
+    application until startup finished and until its first response went
+    out.
+    """
+
+    def __init__(self, started: float, target: float):
+        self.started = started
+        self.target = target
+        self.phases: Dict[str, float] = {}
+        self.ready: Optional[float] = None
+        self.first_request: Optional[float] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def mark_ready(self) -> None:
+        self.ready = self.elapsed()
+        logger.info(
+            "Startup finished in %.3fs (%s)",
+            self.ready,
+            ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases.items()),
+        )
+
+    def mark_first_request(self) -> None:
+        self.first_request = self.elapsed()
+        if self.first_request > self.target:
+            logger.warning(
+                "First request finished %.3fs after import, target is %.3fs",
+                self.first_request,
+                self.target,
+            )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "ready": round(self.ready, 4) if self.ready is not None else None,
+            "first_request": (
+                round(self.first_request, 4) if self.first_request is not None else None
+            ),
+            "target": self.target,
+        }
+
+class FirstRequestMiddleware:
+    """
+    Records when the first HTTP response has been sent, then stays out of
+    the way.
+    """
+
+    def __init__(self, app: Any, timer: StartupTimer):
+        self.app = app
+        self.timer = timer
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        await self.app(scope, receive, send)
+        if self.timer.first_request is None and scope["type"] == "http":
+            self.timer.mark_first_request()
+
+startup_timer = StartupTimer(IMPORTED_AT, target=settings.STARTUP_TARGET_SECONDS)
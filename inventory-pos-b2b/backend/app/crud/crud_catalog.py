@@ -0,0 +1,102 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.base import upsert
+from app.models.catalog import CatalogChange, CatalogVersion
+
+class CRUDCatalogVersion:
+    """
+    Versions of the manufacturers' catalogs, for ETags.
+
+    A writer appends a CatalogChange row in its own transaction (bump) and
+    fold() later adds them to the CatalogVersion rows and deletes them, in
+    one transaction. A catalog's version is its folded version plus its
+    pending changes: every committed change adds one, in whatever order the
+    writers commit, and folding leaves it unchanged. Writers never update a
+    shared row, so stock writes don't queue on their manufacturer's version.
+    """
+    
+    async def get(
+        self, db: AsyncSession, *, manufacturer_id: Optional[int] = None
+    ) -> Tuple[int, Optional[datetime]]:
+        """
+        Version and time of the last change of a manufacturer's products, or
+        of the whole catalog (the sum over all manufacturers). Read it before
+        the products so a concurrent change can only make it look older.
+
+        One statement, so a concurrent fold() is seen entirely or not at all.
+        """
+        versions = select(
+            func.coalesce(func.sum(CatalogVersion.version), 0).label("folded"),
+            func.max(CatalogVersion.updated_at).label("folded_at"),
+        )
+        changes = select(
+            func.count().label("pending"),
+            func.max(CatalogChange.created_at).label("changed_at"),
+        )
+        if manufacturer_id is not None:
+            versions = versions.where(CatalogVersion.manufacturer_id == manufacturer_id)
+            changes = changes.where(CatalogChange.manufacturer_id == manufacturer_id)
+        versions, changes = versions.subquery(), changes.subquery()
+        result = await db.execute(
+            select(versions, changes).select_from(versions.join(changes, true()))
+        )
+        folded, folded_at, pending, changed_at = result.one()
+        times = [time for time in (folded_at, changed_at) if time is not None]
+        return int(folded) + int(pending), max(times) if times else None
+    
+    async def bump(self, db: AsyncSession, *, manufacturer_ids: Iterable[int]) -> None:
+        """
+        Record a change to the products of manufacturers in the writer's
+        transaction: it commits or rolls back with the change, so no
+        committed change keeps an old ETag valid. Only inserts rows.
+        """
+        ids = sorted({i for i in manufacturer_ids if i is not None})
+        if ids:
+            await db.execute(insert(CatalogChange), [{"manufacturer_id": i} for i in ids])
+    
+    async def fold(self, db: AsyncSession) -> int:
+        """
+        Move the pending changes into the version rows and commit. Returns
+        how many were folded.
+        """
+        result = await db.execute(
+            delete(CatalogChange).returning(
+                CatalogChange.manufacturer_id, CatalogChange.created_at
+            )
+        )
+        counts: Dict[int, int] = Counter()
+        latest: Dict[int, datetime] = {}
+        for manufacturer_id, created_at in result.all():
+            counts[manufacturer_id] += 1
+            if manufacturer_id not in latest or created_at > latest[manufacturer_id]:
+                latest[manufacturer_id] = created_at
+        if counts:
+            table = CatalogVersion.__table__
+            stmt = upsert(db, table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.manufacturer_id],
+                set_={
+                    "version": table.c.version + stmt.excluded.version,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            # In id order, like the other writers of shared rows
+            await db.execute(
+                stmt,
+                [
+                    {
+                        "manufacturer_id": i,
+                        "version": counts[i],
+                        "created_at": latest[i],
+                        "updated_at": latest[i],
+                    }
+                    for i in sorted(counts)
+                ],
+            )
+        await db.commit()
+        return sum(counts.values())
+
+catalog_version = CRUDCatalogVersion()
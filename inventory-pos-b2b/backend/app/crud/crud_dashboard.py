@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.crud.crud_order import order as crud_order
+from app.crud.crud_product import product as crud_product
+from app.crud.crud_sales import sales as crud_sales
+from app.models.order import OrderStatus
+
+class CRUDDashboard:
+    async def summarize(
+        self, db: AsyncSession, *, role: str, user_id: int
+    ) -> Dict[str, Any]:
+        """
+        Dashboard figures for a role: manufacturers see their own products
+        and the orders containing them, stores their own orders against the
+        active catalog, admins everything. Revenue comes from the daily
+        sales rollups.
+        """
+        end = datetime.utcnow().date()
+        start = end - timedelta(days=settings.DASHBOARD_REVENUE_DAYS - 1)
+        if role == "manufacturer":
+            product_count = await crud_product.count(db, manufacturer_id=user_id)
+            low_stock_count = await crud_product.count(
+                db, manufacturer_id=user_id, low_stock=True
+            )
+            pending_orders = await crud_order.count(
+                db, status=OrderStatus.PENDING, manufacturer_id=user_id
+            )
+            sales = await crud_sales.get_totals(
+                db, start=start, end=end, manufacturer_id=user_id
+            )
+        elif role == "store":
+            product_count = await crud_product.count(db, active_only=True)
+            low_stock_count = None
+            pending_orders = await crud_order.count(
+                db, status=OrderStatus.PENDING, store_id=user_id
+            )
+            sales = await crud_sales.get_totals(db, start=start, end=end, store_id=user_id)
+        else:
+            product_count = await crud_product.count(db)
+            low_stock_count = await crud_product.count(db, low_stock=True)
+            pending_orders = await crud_order.count(db, status=OrderStatus.PENDING)
+            sales = await crud_sales.get_totals(db, start=start, end=end)
+        return {
+            "role": role,
+            "product_count": product_count,
+            "low_stock_count": low_stock_count,
+            "pending_orders": pending_orders,
+            "period_start": start,
+            "period_end": end,
+            "orders": sales["orders"],
+            "units": sales["units"],
+            "revenue": sales["revenue"],
+            "margin": sales["margin"],
+            "generated_at": datetime.utcnow(),
+        }
+
+dashboard = CRUDDashboard()
@@ -1,83 +1,406 @@
-from typing import List, Optional
-from datetime import datetime
-import uuid
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
-from app.models.order import Order, OrderItem, OrderStatus
-from app.schemas.order import OrderCreate, OrderUpdate
-
-class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
-    def get_by_order_number(self, db: Session, *, order_number: str) -> Optional[Order]:
-        return db.query(Order).filter(Order.order_number == order_number).first()
-    
-    def get_by_store(
-        self, db: Session, *, store_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Order]:
-        return (
-            db.query(Order)
-            .filter(Order.store_id == store_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-    
-    def get_by_status(
-        self, db: Session, *, status: OrderStatus, skip: int = 0, limit: int = 100
-    ) -> List[Order]:
-        return (
-            db.query(Order)
-            .filter(Order.status == status)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-    
-    def create_with_items(
-        self, db: Session, *, obj_in: OrderCreate, items: List[dict]
-    ) -> Order:
-        # Generate unique order number
-        order_number = f"ORD-{datetime.utcnow().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8]}"
-        
-        # Calculate total amount
-        total_amount = sum(item["subtotal"] for item in items)
-        
-        # Create order
-        db_obj = Order(
-            order_number=order_number,
-            store_id=obj_in.store_id,
-            status=OrderStatus.PENDING,
-            total_amount=total_amount,
-            shipping_address=obj_in.shipping_address,
-            notes=obj_in.notes
-        )
-        db.add(db_obj)
-        db.flush()  # Get the order ID
-        
-        # Create order items
-        for item in items:
-            order_item = OrderItem(
-                order_id=db_obj.id,
-                product_id=item["product_id"],
-                quantity=item["quantity"],
-                unit_price=item["unit_price"],
-                subtotal=item["subtotal"]
-            )
-            db.add(order_item)
-        
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
-    
-    def update_status(
-        self, db: Session, *, order_id: int, status: OrderStatus
-    ) -> Optional[Order]:
-        order = self.get(db, id=order_id)
-        if not order:
-            return None
-        order.status = status
-        db.add(order)
-        db.commit()
-        db.refresh(order)
-        return order
-
-order = CRUDOrder(Order) 
\ No newline at end of file
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime
+import uuid
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.crud.base import CRUDBase
+from app.crud.crud_catalog import catalog_version
+from app.crud.crud_product import InsufficientStockError, product as crud_product
+from app.crud.crud_sales import is_sale, sales as crud_sales
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.schemas.order import OrderCreate, OrderUpdate
+
+# Columns written by exports, in order; line columns are prefixed item_
+ORDER_EXPORT_COLUMNS = (
+    Order.id,
+    Order.order_number,
+    Order.store_id,
+    Order.status,
+    Order.total_amount,
+    Order.shipping_address,
+    Order.notes,
+    Order.created_at,
+    Order.updated_at,
+)
+ORDER_ITEM_EXPORT_COLUMNS = (
+    OrderItem.id.label("item_id"),
+    OrderItem.product_id.label("item_product_id"),
+    OrderItem.quantity.label("item_quantity"),
+    OrderItem.unit_price.label("item_unit_price"),
+    OrderItem.subtotal.label("item_subtotal"),
+)
+
+# Moves update_status() makes. Pending orders are confirmed with confirm(),
+# which takes their stock; nothing moves back, so stock is taken once
+STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: (OrderStatus.CANCELLED,),
+    OrderStatus.CONFIRMED: (OrderStatus.SHIPPED, OrderStatus.CANCELLED),
+    OrderStatus.SHIPPED: (OrderStatus.DELIVERED,),
+    OrderStatus.DELIVERED: (),
+    OrderStatus.CANCELLED: (),
+}
+
+class InvalidStatusTransitionError(Exception):
+    def __init__(self, current: OrderStatus, status: OrderStatus):
+        super().__init__(f"Cannot move an order from {current.value} to {status.value}.")
+        self.current = current
+        self.status = status
+
+class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
+    # Newest orders first
+    pagination_keys = (Order.created_at, Order.id)
+    pagination_descending = True
+    
+    # Order.items cannot be lazy-loaded under asyncio, so every query that
+    # returns orders loads their items up front
+    async def get(self, db: AsyncSession, id: int) -> Optional[Order]:
+        result = await db.execute(
+            select(Order)
+            .where(Order.id == id)
+            .options(selectinload(Order.items))
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+    
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Order]:
+        result = await db.execute(
+            self.paginate(
+                select(Order).options(selectinload(Order.items)),
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+        return result.scalars().all()
+    
+    async def get_by_order_number(self, db: AsyncSession, *, order_number: str) -> Optional[Order]:
+        result = await db.execute(
+            select(Order)
+            .where(Order.order_number == order_number)
+            .options(selectinload(Order.items))
+        )
+        return result.scalars().first()
+    
+    async def get_by_store(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Order]:
+        result = await db.execute(
+            self.paginate(
+                select(Order)
+                .where(Order.store_id == store_id)
+                .options(selectinload(Order.items)),
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+        return result.scalars().all()
+    
+    def _contains_products_of(self, manufacturer_id: int):
+        return (
+            select(OrderItem.id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(
+                OrderItem.order_id == Order.id,
+                Product.manufacturer_id == manufacturer_id,
+            )
+            .exists()
+        )
+    
+    async def get_by_manufacturer(
+        self,
+        db: AsyncSession,
+        *,
+        manufacturer_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Order]:
+        """
+        Orders with at least one line for the manufacturer's products.
+
+        The EXISTS semi-join keeps one row per order without a DISTINCT, so the
+        keyset ordering still comes straight from the index. Items are loaded
+        with one extra IN query: two statements for the whole page.
+        """
+        result = await db.execute(
+            self.paginate(
+                select(Order)
+                .where(self._contains_products_of(manufacturer_id))
+                .options(selectinload(Order.items)),
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+        return result.scalars().all()
+    
+    async def has_products_of(
+        self, db: AsyncSession, *, order_id: int, manufacturer_id: int
+    ) -> bool:
+        result = await db.execute(
+            select(Order.id).where(
+                Order.id == order_id, self._contains_products_of(manufacturer_id)
+            )
+        )
+        return result.first() is not None
+    
+    async def count(
+        self,
+        db: AsyncSession,
+        *,
+        status: Optional[OrderStatus] = None,
+        store_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None,
+    ) -> int:
+        stmt = select(func.count(Order.id))
+        if status is not None:
+            stmt = stmt.where(Order.status == status)
+        if store_id is not None:
+            stmt = stmt.where(Order.store_id == store_id)
+        if manufacturer_id is not None:
+            stmt = stmt.where(self._contains_products_of(manufacturer_id))
+        result = await db.execute(stmt)
+        return result.scalar_one()
+    
+    async def get_manufacturer_ids(self, db: AsyncSession, *, order_id: int) -> List[int]:
+        """
+        Manufacturers whose products the order contains.
+        """
+        result = await db.execute(
+            select(Product.manufacturer_id)
+            .join(OrderItem, OrderItem.product_id == Product.id)
+            .where(OrderItem.order_id == order_id)
+            .distinct()
+        )
+        return result.scalars().all()
+    
+    async def stream_export(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None,
+        status: Optional[OrderStatus] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        One row per order line (orders without lines get one row of NULL
+        line columns), ordered by order, in batches read from a server-side
+        cursor. Scoped like the order listing.
+        """
+        stmt = (
+            select(*ORDER_EXPORT_COLUMNS, *ORDER_ITEM_EXPORT_COLUMNS)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .order_by(Order.id, OrderItem.id)
+        )
+        if store_id is not None:
+            stmt = stmt.where(Order.store_id == store_id)
+        if manufacturer_id is not None:
+            stmt = stmt.where(self._contains_products_of(manufacturer_id))
+        if status is not None:
+            stmt = stmt.where(Order.status == status)
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+    
+    async def get_by_status(
+        self,
+        db: AsyncSession,
+        *,
+        status: OrderStatus,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Order]:
+        result = await db.execute(
+            self.paginate(
+                select(Order)
+                .where(Order.status == status)
+                .options(selectinload(Order.items)),
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+        return result.scalars().all()
+    
+    async def create_with_items(
+        self, db: AsyncSession, *, obj_in: OrderCreate, items: List[dict]
+    ) -> Order:
+        # Generate unique order number
+        order_number = f"ORD-{datetime.utcnow().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8]}"
+        
+        # Calculate total amount
+        total_amount = sum(item["subtotal"] for item in items)
+        
+        # Create order
+        db_obj = Order(
+            order_number=order_number,
+            store_id=obj_in.store_id,
+            status=OrderStatus.PENDING,
+            total_amount=total_amount,
+            shipping_address=obj_in.shipping_address,
+            notes=obj_in.notes
+        )
+        db.add(db_obj)
+        await db.flush()  # Get the order ID
+        
+        # Create order items with a single multi-row INSERT
+        if items:
+            await db.execute(
+                insert(OrderItem),
+                [
+                    {
+                        "order_id": db_obj.id,
+                        "product_id": item["product_id"],
+                        "quantity": item["quantity"],
+                        "unit_price": item["unit_price"],
+                        "unit_cost": item.get("unit_cost"),
+                        "subtotal": item["subtotal"],
+                    }
+                    for item in items
+                ],
+            )
+        
+        manufacturer_ids = await self.get_manufacturer_ids(db, order_id=db_obj.id)
+        await db.commit()
+        await crud_product.after_product_change(
+            manufacturer_ids=manufacturer_ids, store_ids=[db_obj.store_id]
+        )
+        return await self.get(db, id=db_obj.id)
+    
+    async def get_quantities(self, db: AsyncSession, *, order_id: int) -> Dict[int, int]:
+        """
+        Units ordered per product.
+        """
+        result = await db.execute(
+            select(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .where(OrderItem.order_id == order_id)
+            .group_by(OrderItem.product_id)
+        )
+        return dict(result.all())
+    
+    async def update_status(
+        self,
+        db: AsyncSession,
+        *,
+        order_id: int,
+        status: OrderStatus,
+        user_id: Optional[int] = None
+    ) -> Optional[Order]:
+        """
+        Move an order to status along STATUS_TRANSITIONS and keep the sales
+        rollups and stock in step: cancelling a confirmed order subtracts its
+        lines from the rollups and returns its stock.
+
+        Returns None if the order doesn't exist, or changed concurrently.
+        Raises InvalidStatusTransitionError for a move the table doesn't
+        allow, confirmations included.
+        """
+        result = await db.execute(
+            select(Order.status, Order.store_id)
+            .where(Order.id == order_id)
+            .with_for_update()
+        )
+        row = result.first()
+        if row is None:
+            await db.rollback()
+            return None
+        current, store_id = row
+        if status not in STATUS_TRANSITIONS[current]:
+            await db.rollback()
+            raise InvalidStatusTransitionError(current, status)
+        # Guard on the status we read in case the row lock is unavailable
+        # (SQLite); a concurrent change makes this a no-op
+        result = await db.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == current)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            await db.rollback()
+            return None
+        quantities: Dict[int, int] = {}
+        events = []
+        if is_sale(status) != is_sale(current):
+            await crud_sales.apply_order(
+                db, order_id=order_id, sign=1 if is_sale(status) else -1
+            )
+        if status == OrderStatus.CANCELLED and is_sale(current):
+            quantities = await self.get_quantities(db, order_id=order_id)
+            events = await crud_product.return_stock(
+                db, quantities=quantities, order_id=order_id, user_id=user_id
+            )
+        manufacturer_ids = await self.get_manufacturer_ids(db, order_id=order_id)
+        if quantities:
+            await catalog_version.bump(db, manufacturer_ids=manufacturer_ids)
+        await db.commit()
+        await crud_product.after_product_change(
+            product_ids=quantities,
+            manufacturer_ids=manufacturer_ids,
+            store_ids=[store_id],
+            events=events,
+        )
+        return await self.get(db, id=order_id)
+    
+    async def confirm(
+        self, db: AsyncSession, *, order_id: int, user_id: Optional[int] = None
+    ) -> Optional[Order]:
+        """
+        Confirm a pending order, take its stock and record the sale in a
+        single transaction.
+
+        Returns None if the order is not pending (already confirmed by a
+        concurrent request, for example). Raises InsufficientStockError and
+        leaves the order untouched if any product lacks stock.
+        """
+        result = await db.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == OrderStatus.PENDING)
+            .values(status=OrderStatus.CONFIRMED)
+            .returning(Order.store_id)
+            .execution_options(synchronize_session=False)
+        )
+        store_id = result.scalar_one_or_none()
+        if store_id is None:
+            await db.rollback()
+            return None
+        
+        quantities = await self.get_quantities(db, order_id=order_id)
+        try:
+            events = await crud_product.decrement_stock(
+                db, quantities=quantities, order_id=order_id, user_id=user_id
+            )
+        except InsufficientStockError:
+            await db.rollback()
+            raise
+        await crud_sales.apply_order(db, order_id=order_id, sign=1)
+        manufacturer_ids = await self.get_manufacturer_ids(db, order_id=order_id)
+        await catalog_version.bump(db, manufacturer_ids=manufacturer_ids)
+        await db.commit()
+        await crud_product.after_product_change(
+            product_ids=quantities,
+            manufacturer_ids=manufacturer_ids,
+            store_ids=[store_id],
+            events=events,
+        )
+        return await self.get(db, id=order_id)
+
+order = CRUDOrder(Order)
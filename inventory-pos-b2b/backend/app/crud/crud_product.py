@@ -1,51 +1,660 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
-from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
-
-class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
-    def get_by_sku(self, db: Session, *, sku: str) -> Optional[Product]:
-        return db.query(Product).filter(Product.sku == sku).first()
-    
-    def get_by_barcode(self, db: Session, *, barcode: str) -> Optional[Product]:
-        return db.query(Product).filter(Product.barcode == barcode).first()
-    
-    def get_by_manufacturer(
-        self, db: Session, *, manufacturer_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Product]:
-        return (
-            db.query(Product)
-            .filter(Product.manufacturer_id == manufacturer_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-    
-    def get_low_stock(
-        self, db: Session, *, manufacturer_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Product]:
-        return (
-            db.query(Product)
-            .filter(
-                Product.manufacturer_id == manufacturer_id,
-                Product.quantity <= Product.min_quantity
-            )
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-    
-    def update_stock(
-        self, db: Session, *, product_id: int, quantity_change: int
-    ) -> Optional[Product]:
-        product = self.get(db, id=product_id)
-        if not product:
-            return None
-        product.quantity += quantity_change
-        db.add(product)
-        db.commit()
-        db.refresh(product)
-        return product
-
-product = CRUDProduct(Product) 
\ No newline at end of file
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Union
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import case, delete, func, literal, or_, select
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
+from app.core.dashboard import dashboard_cache
+from app.core.low_stock import low_stock_event, low_stock_notifier
+from app.core.product_cache import product_cache
+from app.core.search import (
+    FUZZY_CANDIDATES_PER_RESULT,
+    FUZZY_MATCH_THRESHOLD,
+    escape_like,
+    product_search,
+    search_words,
+    sqlite_exact_match,
+    sqlite_fuzzy_match,
+    word_similarity,
+)
+from app.crud.base import CRUDBase, upsert
+from app.crud.crud_catalog import catalog_version
+from app.crud.crud_sales import sales as crud_sales
+from app.crud.crud_stock import available_quantity, is_low_stock, movement, stock as crud_stock
+from app.models.product import Product
+from app.models.stock_movement import StockMovementReason, StockShard
+from app.schemas.product import ProductCreate, ProductSnapshot, ProductUpdate
+
+# Columns written by exports, in order
+EXPORT_COLUMNS = (
+    Product.id,
+    Product.sku,
+    Product.barcode,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.cost,
+    available_quantity().label("quantity"),
+    Product.min_quantity,
+    Product.is_active,
+    Product.manufacturer_id,
+    Product.updated_at,
+)
+
+class InsufficientStockError(Exception):
+    def __init__(self, product_id: int):
+        super().__init__(f"Insufficient stock for product {product_id}")
+        self.product_id = product_id
+
+def with_stock(stmt: Select) -> Select:
+    """
+    stmt with the exact stock of each product as an extra column, for
+    exact_stock().
+    """
+    return stmt.add_columns(available_quantity())
+
+def exact_stock(result: Result) -> List[Product]:
+    """
+    The products of a with_stock() statement. Sharded ones get their shard
+    total as quantity instead of the snapshot in the column.
+    """
+    products = []
+    for product, quantity in result.all():
+        if product.stock_shards:
+            set_committed_value(product, "quantity", quantity)
+        products.append(product)
+    return products
+
+class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
+    """
+    Every read goes through with_stock()/exact_stock(), so sharded products
+    are shown and checked with their exact stock.
+    """
+    
+    async def get(self, db: AsyncSession, id: Any) -> Optional[Product]:
+        result = await db.execute(
+            with_stock(select(Product).where(Product.id == id))
+            .execution_options(populate_existing=True)
+        )
+        products = exact_stock(result)
+        return products[0] if products else None
+    
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Product]:
+        result = await db.execute(
+            self.paginate(with_stock(select(Product)), skip=skip, limit=limit, cursor=cursor)
+        )
+        return exact_stock(result)
+    
+    async def get_by_sku(self, db: AsyncSession, *, sku: str) -> Optional[Product]:
+        result = await db.execute(with_stock(select(Product).where(Product.sku == sku)))
+        products = exact_stock(result)
+        return products[0] if products else None
+    
+    async def get_by_barcode(self, db: AsyncSession, *, barcode: str) -> Optional[Product]:
+        result = await db.execute(
+            with_stock(select(Product).where(Product.barcode == barcode))
+        )
+        products = exact_stock(result)
+        return products[0] if products else None
+    
+    async def get_by_barcode_cached(
+        self, db: AsyncSession, *, barcode: str
+    ) -> Optional[ProductSnapshot]:
+        """
+        Scan lookup served from the product cache, loaded from the database
+        on a miss.
+        """
+        return await product_cache.get_or_load_by_barcode(
+            barcode, lambda: self.get_by_barcode(db, barcode=barcode)
+        )
+    
+    async def get_cached(self, db: AsyncSession, *, id: int) -> Optional[ProductSnapshot]:
+        """
+        Read-only copy of a product from the product cache, loaded from the
+        database on a miss. Use get() for a product that will be modified.
+        """
+        return await product_cache.get_or_load(id, lambda: self.get(db, id=id))
+    
+    async def warm_cache(self, db: AsyncSession, *, limit: int, days: int) -> int:
+        """
+        Load the best-selling products of the last `days` into the product
+        cache. Returns how many were loaded.
+        """
+        end = datetime.utcnow().date()
+        top = await crud_sales.get_top_products(
+            db, start=end - timedelta(days=days - 1), end=end, limit=limit
+        )
+        products = await self.get_multi_by_ids(db, ids=[row["product_id"] for row in top])
+        return await product_cache.warm(products)
+    
+    async def get_multi_by_ids(self, db: AsyncSession, *, ids: List[int]) -> List[Product]:
+        if not ids:
+            return []
+        result = await db.execute(with_stock(select(Product).where(Product.id.in_(ids))))
+        return exact_stock(result)
+    
+    async def get_by_manufacturer(
+        self,
+        db: AsyncSession,
+        *,
+        manufacturer_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Product]:
+        result = await db.execute(
+            self.paginate(
+                with_stock(select(Product))
+                .where(Product.manufacturer_id == manufacturer_id),
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+        return exact_stock(result)
+    
+    async def get_low_stock(
+        self,
+        db: AsyncSession,
+        *,
+        manufacturer_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Product]:
+        result = await db.execute(
+            self.paginate(
+                with_stock(select(Product))
+                .where(Product.manufacturer_id == manufacturer_id, is_low_stock()),
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+        return exact_stock(result)
+    
+    async def count(
+        self,
+        db: AsyncSession,
+        *,
+        manufacturer_id: Optional[int] = None,
+        low_stock: bool = False,
+        active_only: bool = False,
+    ) -> int:
+        stmt = select(func.count(Product.id))
+        if manufacturer_id is not None:
+            stmt = stmt.where(Product.manufacturer_id == manufacturer_id)
+        if low_stock:
+            # Narrowed by the partial index's predicate, so only it is read
+            stmt = stmt.where(is_low_stock())
+        if active_only:
+            stmt = stmt.where(Product.is_active.is_(True))
+        result = await db.execute(stmt)
+        return result.scalar_one()
+    
+    async def search(
+        self, db: AsyncSession, *, query: str, limit: int = 20
+    ) -> List[Product]:
+        """
+        Products ranked by how well name, description, SKU or barcode match
+        query. Uses the pg_trgm indexes on PostgreSQL and the FTS5 trigram
+        index on SQLite.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            return await self._search_sqlite(db, query=query, limit=limit)
+        if dialect != "postgresql":
+            raise NotImplementedError(f"Product search is not supported on {dialect}")
+        query = query.strip()
+        prefix = escape_like(query) + "%"
+        prefix_match = or_(
+            Product.sku.ilike(prefix, escape="\\"),
+            Product.barcode.ilike(prefix, escape="\\"),
+        )
+        # word_similarity scores the best matching extent of the text, so
+        # prefixes and misspelt words still rank close to exact matches
+        rank = func.greatest(
+            func.word_similarity(query, Product.name),
+            func.coalesce(func.word_similarity(query, Product.description), 0) * 0.5,
+        ) + case((prefix_match, 1.0), else_=0.0)
+        result = await db.execute(
+            with_stock(select(Product))
+            .where(
+                or_(
+                    literal(query).op("<%")(Product.name),
+                    literal(query).op("<%")(Product.description),
+                    prefix_match,
+                )
+            )
+            .order_by(rank.desc(), Product.id)
+            .limit(limit)
+        )
+        return exact_stock(result)
+    
+    async def _search_sqlite(
+        self, db: AsyncSession, *, query: str, limit: int
+    ) -> List[Product]:
+        words = search_words(query)
+        if not words:
+            return []
+        products = await self._match_sqlite(db, sqlite_exact_match(words), limit)
+        if len(products) < limit:
+            # Top up with fuzzy matches so a misspelt word still finds products
+            found = {p.id for p in products}
+            candidates = await self._match_sqlite(
+                db, sqlite_fuzzy_match(words), limit * FUZZY_CANDIDATES_PER_RESULT
+            )
+            products += [
+                p for p in candidates
+                if p.id not in found
+                and word_similarity(words, p.name, p.description, p.sku, p.barcode)
+                >= FUZZY_MATCH_THRESHOLD
+            ][:limit - len(products)]
+        return products
+    
+    async def _match_sqlite(
+        self, db: AsyncSession, match: str, limit: int
+    ) -> List[Product]:
+        ranked = (
+            select(product_search.c.rowid, product_search.c.rank)
+            .where(product_search.c.product_search.op("MATCH")(match))
+            .order_by(product_search.c.rank)
+            .limit(limit)
+            .subquery()
+        )
+        result = await db.execute(
+            with_stock(select(Product))
+            .join(ranked, ranked.c.rowid == Product.id)
+            .order_by(ranked.c.rank)
+        )
+        return exact_stock(result)
+    
+    async def stream_export(
+        self,
+        db: AsyncSession,
+        *,
+        manufacturer_id: Optional[int] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Product rows as plain dicts, in batches read from a server-side
+        cursor, so the export never holds more than one batch.
+        """
+        stmt = select(*EXPORT_COLUMNS).order_by(Product.id)
+        if manufacturer_id is not None:
+            stmt = stmt.where(Product.manufacturer_id == manufacturer_id)
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+    
+    async def create(
+        self, db: AsyncSession, *, obj_in: ProductCreate, user_id: Optional[int] = None
+    ) -> Product:
+        product = Product(**jsonable_encoder(obj_in))
+        db.add(product)
+        await db.flush()
+        if product.quantity:
+            await crud_stock.record(db, movements=[
+                movement(
+                    product.id, product.quantity, StockMovementReason.INITIAL, user_id=user_id
+                )
+            ])
+        await catalog_version.bump(db, manufacturer_ids=[product.manufacturer_id])
+        await db.commit()
+        await db.refresh(product)
+        await self.after_product_change(
+            products=[product], manufacturer_ids=[product.manufacturer_id], all_stores=True
+        )
+        return product
+    
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Product,
+        obj_in: Union[ProductUpdate, Dict[str, Any]],
+        user_id: Optional[int] = None
+    ) -> Product:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        previous_quantity, previous_min_quantity = db_obj.quantity, db_obj.min_quantity
+        previous_manufacturer_id = db_obj.manufacturer_id
+        quantity = update_data.get("quantity")
+        if quantity is not None:
+            # Lock the stock so the ledger records the exact change
+            previous_quantity = await crud_stock.set_quantity(
+                db, product_id=db_obj.id, quantity=quantity
+            )
+            if quantity != previous_quantity:
+                await crud_stock.record(db, movements=[
+                    movement(
+                        db_obj.id,
+                        quantity - previous_quantity,
+                        StockMovementReason.ADJUSTMENT,
+                        user_id=user_id,
+                    )
+                ])
+        manufacturer_ids = {
+            previous_manufacturer_id,
+            update_data.get("manufacturer_id") or previous_manufacturer_id,
+        }
+        # Committed together with the change by the update below
+        await catalog_version.bump(db, manufacturer_ids=manufacturer_ids)
+        product = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        if product.stock_shards:
+            # The refresh above read back the snapshot
+            product = await self.get(db, id=product.id)
+        await self.after_product_change(
+            products=[product],
+            manufacturer_ids=manufacturer_ids,
+            all_stores=True,
+            events=[
+                low_stock_event(
+                    product_id=product.id,
+                    manufacturer_id=product.manufacturer_id,
+                    quantity=product.quantity,
+                    min_quantity=product.min_quantity,
+                    previous_quantity=previous_quantity,
+                    previous_min_quantity=previous_min_quantity,
+                )
+            ],
+        )
+        return product
+    
+    async def remove(self, db: AsyncSession, *, id: int) -> Product:
+        await db.execute(delete(StockShard).where(StockShard.product_id == id))
+        product = await db.get(Product, id)
+        if product:
+            # Committed together with the delete below
+            await catalog_version.bump(db, manufacturer_ids=[product.manufacturer_id])
+        product = await super().remove(db, id=id)
+        await self.after_product_change(
+            product_ids=[id],
+            manufacturer_ids=[product.manufacturer_id] if product else (),
+            all_stores=True,
+        )
+        return product
+    
+    async def after_product_change(
+        self,
+        *,
+        product_ids: Iterable[int] = (),
+        products: Iterable[Product] = (),
+        manufacturer_ids: Iterable[int] = (),
+        store_ids: Iterable[int] = (),
+        all_stores: bool = False,
+        events: Iterable[Optional[Dict[str, Any]]] = (),
+    ) -> None:
+        """
+        Fan a committed write out to every reader of product data: cached
+        copies of product_ids are forgotten and products stored fresh, the
+        dashboards of manufacturer_ids and store_ids (all stores for catalog
+        changes) dropped, and low-stock events published.
+
+        Every writer calls it once its transaction has committed. The
+        catalog version is not bumped here: that has to happen inside the
+        transaction, with catalog_version.bump().
+        """
+        product_ids = list(product_ids)
+        if product_ids:
+            await product_cache.invalidate(product_ids)
+        for product in products:
+            await product_cache.refresh(product)
+        manufacturer_ids, store_ids = list(manufacturer_ids), list(store_ids)
+        if manufacturer_ids or store_ids or all_stores:
+            dashboard_cache.invalidate(
+                manufacturer_ids=manufacturer_ids, store_ids=store_ids, all_stores=all_stores
+            )
+        low_stock_notifier.publish(events)
+    
+    async def get_import_matches(
+        self, db: AsyncSession, *, skus: List[str], barcodes: List[str]
+    ) -> List[Any]:
+        """
+        id, sku, barcode, manufacturer_id, quantity (exact for sharded
+        products), min_quantity and stock_shards of the products sharing a
+        SKU or barcode with an import batch, locked until the caller's
+        transaction ends.
+        """
+        result = await db.execute(
+            select(
+                Product.id,
+                Product.sku,
+                Product.barcode,
+                Product.manufacturer_id,
+                available_quantity().label("quantity"),
+                Product.min_quantity,
+                Product.stock_shards,
+            )
+            .where(or_(Product.sku.in_(skus), Product.barcode.in_(barcodes)))
+            # Locked in id order, like every other stock writer, so the
+            # quantities stay exact until the import commits
+            .order_by(Product.id)
+            .with_for_update()
+        )
+        return result.all()
+    
+    async def upsert_many(self, db: AsyncSession, *, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert rows, updating the products that already have their SKU, with
+        one multi-row statement in the caller's transaction. Every row needs
+        the same keys. Products of another manufacturer are left untouched.
+        """
+        # Core table rather than the entity: ORM bulk inserts split the rows
+        # into one batch per distinct set of non-NULL columns
+        product_table = Product.__table__
+        stmt = upsert(db, product_table)
+        columns = {c: stmt.excluded[c] for c in rows[0] if c != "sku"}
+        columns["updated_at"] = datetime.utcnow()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[product_table.c.sku],
+            set_=columns,
+            where=product_table.c.manufacturer_id == stmt.excluded.manufacturer_id,
+        )
+        await db.execute(stmt, rows)
+    
+    async def get_low_stock_events(
+        self, db: AsyncSession, *, quantity_changes: Dict[int, int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Threshold crossings caused by quantity_changes, which must have been
+        applied in the current, still open transaction. The rows are locked by
+        those UPDATEs, so quantity - change is exactly the previous level.
+        """
+        if not quantity_changes:
+            return []
+        result = await db.execute(
+            select(
+                Product.id,
+                Product.manufacturer_id,
+                available_quantity(),
+                Product.min_quantity,
+            ).where(Product.id.in_(list(quantity_changes)))
+        )
+        events = []
+        for product_id, manufacturer_id, quantity, min_quantity in result.all():
+            event = low_stock_event(
+                product_id=product_id,
+                manufacturer_id=manufacturer_id,
+                quantity=quantity,
+                min_quantity=min_quantity,
+                previous_quantity=quantity - quantity_changes[product_id],
+            )
+            if event:
+                events.append(event)
+        return events
+    
+    async def update_stock(
+        self,
+        db: AsyncSession,
+        *,
+        product_id: int,
+        quantity_change: int,
+        user_id: Optional[int] = None
+    ) -> Optional[Product]:
+        row = await crud_stock.add(db, product_id=product_id, quantity_change=quantity_change)
+        if row is None:
+            await db.rollback()
+            return None
+        await crud_stock.record(db, movements=[
+            movement(
+                product_id, quantity_change, StockMovementReason.ADJUSTMENT, user_id=user_id
+            )
+        ])
+        manufacturer_id, quantity, min_quantity = row
+        await catalog_version.bump(db, manufacturer_ids=[manufacturer_id])
+        await db.commit()
+        product = await self.get(db, id=product_id)
+        await self.after_product_change(
+            product_ids=[product_id],
+            products=[product] if product else (),
+            manufacturer_ids=[manufacturer_id],
+            events=[
+                low_stock_event(
+                    product_id=product_id,
+                    manufacturer_id=manufacturer_id,
+                    quantity=quantity,
+                    min_quantity=min_quantity,
+                    previous_quantity=quantity - quantity_change,
+                )
+            ],
+        )
+        return product
+    
+    async def decrement_stock(
+        self,
+        db: AsyncSession,
+        *,
+        quantities: Dict[int, int],
+        order_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Take stock for several products inside the caller's transaction and
+        record the sale in the stock ledger.
+
+        The stock is taken by crud_stock.take_many() with conditional UPDATEs
+        that only match while enough stock is left, so concurrent writers
+        cannot drive quantities negative, and the statement count doesn't
+        grow with the order. Raises InsufficientStockError for the first
+        product that cannot be satisfied; the caller is responsible for
+        rolling back. Returns the low-stock events to publish once the
+        caller has committed.
+        """
+        levels = await crud_stock.take_many(db, quantities=quantities)
+        events = []
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            if product_id not in levels:
+                raise InsufficientStockError(product_id)
+            manufacturer_id, remaining, min_quantity = levels[product_id]
+            event = low_stock_event(
+                product_id=product_id,
+                manufacturer_id=manufacturer_id,
+                quantity=remaining,
+                min_quantity=min_quantity,
+                previous_quantity=remaining + quantity,
+            )
+            if event:
+                events.append(event)
+        await crud_stock.record(db, movements=[
+            movement(
+                product_id,
+                -quantity,
+                StockMovementReason.SALE,
+                order_id=order_id,
+                user_id=user_id,
+            )
+            for product_id, quantity in sorted(quantities.items())
+        ])
+        return events
+    
+    async def return_stock(
+        self,
+        db: AsyncSession,
+        *,
+        quantities: Dict[int, int],
+        order_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Put back stock taken by decrement_stock() inside the caller's
+        transaction and record it in the stock ledger. Products deleted since
+        are skipped. Returns the low-stock events to publish once the caller
+        has committed.
+        """
+        levels = await crud_stock.add_many(db, quantity_changes=quantities)
+        events = []
+        returned = {}
+        for product_id in sorted(levels):
+            quantity = quantities[product_id]
+            returned[product_id] = quantity
+            manufacturer_id, remaining, min_quantity = levels[product_id]
+            event = low_stock_event(
+                product_id=product_id,
+                manufacturer_id=manufacturer_id,
+                quantity=remaining,
+                min_quantity=min_quantity,
+                previous_quantity=remaining - quantity,
+            )
+            if event:
+                events.append(event)
+        await crud_stock.record(db, movements=[
+            movement(
+                product_id,
+                quantity,
+                StockMovementReason.CANCELLATION,
+                order_id=order_id,
+                user_id=user_id,
+            )
+            for product_id, quantity in sorted(returned.items())
+        ])
+        return events
+    
+    async def set_stock_shards(
+        self, db: AsyncSession, *, product_id: int, shards: int
+    ) -> Optional[int]:
+        """
+        Split a hot product's stock over `shards` counter rows (0 merges it
+        back). Returns its stock, or None if the product doesn't exist.
+        """
+        quantity = await crud_stock.set_shards(db, product_id=product_id, shards=shards)
+        if quantity is None:
+            await db.rollback()
+            return None
+        result = await db.execute(
+            select(Product.manufacturer_id).where(Product.id == product_id)
+        )
+        manufacturer_id = result.scalar_one()
+        await catalog_version.bump(db, manufacturer_ids=[manufacturer_id])
+        await db.commit()
+        await self.after_product_change(product_ids=[product_id])
+        return quantity
+    
+    async def refresh_stock_snapshots(self, db: AsyncSession) -> int:
+        """
+        Bring the quantity column of sharded products up to date. Returns
+        how many changed.
+        """
+        changed = await crud_stock.refresh_snapshots(db)
+        manufacturer_ids = {manufacturer_id for _, manufacturer_id in changed}
+        await catalog_version.bump(db, manufacturer_ids=manufacturer_ids)
+        await db.commit()
+        await self.after_product_change(
+            product_ids=[product_id for product_id, _ in changed],
+            manufacturer_ids=manufacturer_ids,
+        )
+        return len(changed)
+
+product = CRUDProduct(Product)
@@ -0,0 +1,275 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.base import upsert
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.sales import DailyManufacturerSales, DailyProductSales, DailyStoreSales
+
+# Statuses in which an order counts as a sale
+SALE_STATUSES = (OrderStatus.CONFIRMED, OrderStatus.SHIPPED, OrderStatus.DELIVERED)
+
+def is_sale(status: Optional[OrderStatus]) -> bool:
+    return status in SALE_STATUSES
+
+class CRUDSales:
+    """
+    Maintains the daily sales rollups and answers reports from them.
+    """
+    
+    def _line_margin(self):
+        # Lines of products without a cost count their whole revenue as margin
+        return OrderItem.subtotal - OrderItem.quantity * func.coalesce(OrderItem.unit_cost, 0)
+    
+    async def _upsert(
+        self,
+        db: AsyncSession,
+        model: Any,
+        keys: Tuple[str, ...],
+        rows: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Add rows onto the counters of existing rollup rows, creating the
+        missing ones.
+        """
+        stmt = upsert(db, model)
+        counters = [c for c in rows[0] if c not in keys and c != "manufacturer_id"]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={
+                c: getattr(model, c) + getattr(stmt.excluded, c) for c in counters
+            },
+        )
+        # Fixed row order keeps concurrent upserts from deadlocking
+        rows = sorted(rows, key=lambda row: tuple(row[k] for k in keys))
+        await db.execute(stmt, rows)
+    
+    async def apply_order(self, db: AsyncSession, *, order_id: int, sign: int) -> None:
+        """
+        Add (sign=1) or subtract (sign=-1) an order's lines in the rollups,
+        inside the caller's transaction.
+        """
+        result = await db.execute(
+            select(
+                Order.created_at,
+                Order.store_id,
+                OrderItem.product_id,
+                Product.manufacturer_id,
+                func.sum(OrderItem.quantity),
+                func.sum(OrderItem.subtotal),
+                func.sum(self._line_margin()),
+            )
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(Order.id == order_id)
+            .group_by(
+                Order.created_at,
+                Order.store_id,
+                OrderItem.product_id,
+                Product.manufacturer_id,
+            )
+        )
+        lines = result.all()
+        if not lines:
+            return
+        
+        day = lines[0][0].date()
+        store_id = lines[0][1]
+        store = {
+            "store_id": store_id,
+            "day": day,
+            "orders": sign,
+            "units": 0,
+            "revenue": 0.0,
+            "margin": 0.0,
+        }
+        manufacturers: Dict[int, Dict[str, Any]] = {}
+        products = []
+        for _, _, product_id, manufacturer_id, units, revenue, margin in lines:
+            units, revenue, margin = sign * units, sign * revenue, sign * margin
+            products.append({
+                "product_id": product_id,
+                "day": day,
+                "manufacturer_id": manufacturer_id,
+                "units": units,
+                "revenue": revenue,
+                "margin": margin,
+            })
+            totals = manufacturers.setdefault(manufacturer_id, {
+                "manufacturer_id": manufacturer_id,
+                "day": day,
+                "orders": sign,
+                "units": 0,
+                "revenue": 0.0,
+                "margin": 0.0,
+            })
+            for row in (totals, store):
+                row["units"] += units
+                row["revenue"] += revenue
+                row["margin"] += margin
+        
+        await self._upsert(db, DailyProductSales, ("product_id", "day"), products)
+        await self._upsert(
+            db,
+            DailyManufacturerSales,
+            ("manufacturer_id", "day"),
+            list(manufacturers.values()),
+        )
+        await self._upsert(db, DailyStoreSales, ("store_id", "day"), [store])
+    
+    async def backfill(
+        self, db: AsyncSession, *, start: Optional[date] = None, end: Optional[date] = None
+    ) -> Dict[str, int]:
+        """
+        Rebuild the rollups for orders placed between start and end
+        (inclusive; open-ended when omitted) straight from the order tables.
+        Returns the number of rows written per rollup table.
+        """
+        conditions = [Order.status.in_(SALE_STATUSES)]
+        if start:
+            conditions.append(Order.created_at >= datetime.combine(start, time.min))
+        if end:
+            conditions.append(
+                Order.created_at < datetime.combine(end + timedelta(days=1), time.min)
+            )
+        lines = (
+            select(
+                Order.id.label("order_id"),
+                Order.store_id,
+                OrderItem.product_id,
+                Product.manufacturer_id,
+                func.date(Order.created_at).label("day"),
+                OrderItem.quantity.label("units"),
+                OrderItem.subtotal.label("revenue"),
+                self._line_margin().label("margin"),
+            )
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .where(*conditions)
+            .subquery()
+        )
+        totals = (
+            func.sum(lines.c.units),
+            func.sum(lines.c.revenue),
+            func.sum(lines.c.margin),
+        )
+        orders = func.count(lines.c.order_id.distinct())
+        rollups = (
+            (
+                DailyProductSales,
+                lines.c.product_id,
+                "manufacturer_id",
+                func.max(lines.c.manufacturer_id),
+            ),
+            (DailyManufacturerSales, lines.c.manufacturer_id, "orders", orders),
+            (DailyStoreSales, lines.c.store_id, "orders", orders),
+        )
+        
+        counts = {}
+        for model, key, extra_name, extra in rollups:
+            stmt = delete(model)
+            if start:
+                stmt = stmt.where(model.day >= start)
+            if end:
+                stmt = stmt.where(model.day <= end)
+            await db.execute(stmt)
+            result = await db.execute(
+                insert(model).from_select(
+                    [key.name, "day", extra_name, "units", "revenue", "margin"],
+                    select(key, lines.c.day, extra, *totals).group_by(key, lines.c.day),
+                )
+            )
+            counts[model.__tablename__] = result.rowcount
+        await db.commit()
+        return counts
+    
+    def _scope(self, store_id: Optional[int], manufacturer_id: Optional[int]):
+        # Manufacturers read their own rollup; stores, or every store for
+        # admins, read the store rollup
+        if manufacturer_id is not None:
+            model = DailyManufacturerSales
+            return model, [model.manufacturer_id == manufacturer_id]
+        model = DailyStoreSales
+        return model, [model.store_id == store_id] if store_id is not None else []
+    
+    async def get_daily(
+        self,
+        db: AsyncSession,
+        *,
+        start: date,
+        end: date,
+        store_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Daily totals for one store, one manufacturer, or every store.
+        """
+        model, conditions = self._scope(store_id, manufacturer_id)
+        result = await db.execute(
+            select(
+                model.day,
+                func.sum(model.orders).label("orders"),
+                func.sum(model.units).label("units"),
+                func.sum(model.revenue).label("revenue"),
+                func.sum(model.margin).label("margin"),
+            )
+            .where(*conditions, model.day >= start, model.day <= end)
+            .group_by(model.day)
+            .order_by(model.day)
+        )
+        return [dict(row._mapping) for row in result.all()]
+    
+    async def get_totals(
+        self,
+        db: AsyncSession,
+        *,
+        start: date,
+        end: date,
+        store_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Totals over the whole period, scoped like get_daily().
+        """
+        model, conditions = self._scope(store_id, manufacturer_id)
+        result = await db.execute(
+            select(
+                func.coalesce(func.sum(model.orders), 0).label("orders"),
+                func.coalesce(func.sum(model.units), 0).label("units"),
+                func.coalesce(func.sum(model.revenue), 0.0).label("revenue"),
+                func.coalesce(func.sum(model.margin), 0.0).label("margin"),
+            ).where(*conditions, model.day >= start, model.day <= end)
+        )
+        return dict(result.one()._mapping)
+    
+    async def get_top_products(
+        self,
+        db: AsyncSession,
+        *,
+        start: date,
+        end: date,
+        manufacturer_id: Optional[int] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Products ranked by revenue over the period, optionally only those of
+        one manufacturer.
+        """
+        revenue = func.sum(DailyProductSales.revenue)
+        stmt = select(
+            DailyProductSales.product_id,
+            func.sum(DailyProductSales.units).label("units"),
+            revenue.label("revenue"),
+            func.sum(DailyProductSales.margin).label("margin"),
+        ).where(DailyProductSales.day >= start, DailyProductSales.day <= end)
+        if manufacturer_id is not None:
+            stmt = stmt.where(DailyProductSales.manufacturer_id == manufacturer_id)
+        result = await db.execute(
+            stmt.group_by(DailyProductSales.product_id)
+            .order_by(revenue.desc(), DailyProductSales.product_id)
+            .limit(limit)
+        )
+        return [dict(row._mapping) for row in result.all()]
+
+sales = CRUDSales()
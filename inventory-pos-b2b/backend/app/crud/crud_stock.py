@@ -0,0 +1,405 @@
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, bindparam, case, delete, func, insert, literal_column, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.pagination import next_cursor, paginate
+from app.models.product import Product
+from app.models.stock_movement import StockMovement, StockMovementReason, StockShard
+
+# (manufacturer_id, quantity, min_quantity) of a product after a change
+StockLevel = Tuple[int, int, int]
+
+def shard_total() -> Any:
+    """
+    Correlated subquery summing the shards of the enclosing Product row.
+    """
+    return (
+        select(func.coalesce(func.sum(StockShard.quantity), 0))
+        .where(StockShard.product_id == Product.id)
+        .scalar_subquery()
+    )
+
+def available_quantity() -> Any:
+    """
+    Exact stock of the enclosing Product row, sharded or not.
+    """
+    return case((Product.stock_shards > 0, shard_total()), else_=Product.quantity)
+
+def is_low_stock() -> Any:
+    """
+    Products at or below their minimum level, by their exact stock. The
+    first term is the predicate of the ix_product_low_stock partial index,
+    which holds every sharded product as their quantity column is only a
+    snapshot; the literal keeps it matching the index on SQLite.
+    """
+    return and_(
+        or_(
+            Product.quantity <= Product.min_quantity,
+            Product.stock_shards > literal_column("0"),
+        ),
+        available_quantity() <= Product.min_quantity,
+    )
+
+def split(quantity: int, parts: int) -> List[int]:
+    return [quantity // parts + (1 if i < quantity % parts else 0) for i in range(parts)]
+
+def movement(
+    product_id: int,
+    quantity_change: int,
+    reason: StockMovementReason,
+    *,
+    order_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    return {
+        "product_id": product_id,
+        "quantity_change": quantity_change,
+        "reason": reason,
+        "order_id": order_id,
+        "user_id": user_id,
+    }
+
+class CRUDStock:
+    """
+    Stock levels and the stock movement ledger. Every method works inside
+    the caller's transaction; committing (and invalidating caches) is left
+    to the caller.
+
+    A product's stock is its quantity column until it is split over
+    stock_shards rows with set_shards(). Each shard holds part of the
+    stock, so a sale only has to lock one random shard that can cover it;
+    the shards are only locked together when none can (rebalance). The
+    quantity column of a sharded product is a snapshot of their sum,
+    brought up to date by refresh_snapshots().
+    """
+
+    pagination_keys = (StockMovement.id,)
+
+    async def record(self, db: AsyncSession, *, movements: List[Dict[str, Any]]) -> None:
+        """
+        Append ledger rows built with movement().
+        """
+        if movements:
+            await db.execute(insert(StockMovement.__table__), movements)
+
+    async def take(
+        self, db: AsyncSession, *, product_id: int, quantity: int
+    ) -> Optional[StockLevel]:
+        """
+        Remove quantity if that much is in stock. Returns None if it isn't,
+        or if the product doesn't exist.
+        """
+        result = await db.execute(
+            update(Product)
+            .where(
+                Product.id == product_id,
+                Product.stock_shards == 0,
+                Product.quantity >= quantity,
+            )
+            .values(quantity=Product.quantity - quantity)
+            .returning(Product.manufacturer_id, Product.quantity, Product.min_quantity)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        if row is not None:
+            return tuple(row)
+        return await self._change_shards(db, product_id, -quantity, guarded=True)
+
+    async def add(
+        self, db: AsyncSession, *, product_id: int, quantity_change: int
+    ) -> Optional[StockLevel]:
+        """
+        Apply quantity_change without a stock check. Returns None if the
+        product doesn't exist.
+        """
+        result = await db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock_shards == 0)
+            .values(quantity=Product.quantity + quantity_change)
+            .returning(Product.manufacturer_id, Product.quantity, Product.min_quantity)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        if row is not None:
+            return tuple(row)
+        return await self._change_shards(db, product_id, quantity_change, guarded=False)
+
+    async def take_many(
+        self, db: AsyncSession, *, quantities: Dict[int, int]
+    ) -> Dict[int, StockLevel]:
+        """
+        take() for several products with a fixed number of statements: the
+        rows are locked in id order, then the unsharded products share one
+        conditional UPDATE; sharded ones go through take(). Returns the
+        levels of the products that had enough stock, so a product missing
+        from the result lacked stock or doesn't exist, and the caller has
+        to roll back what was taken.
+        """
+        shards = await self._lock_products(db, quantities)
+        plain = [product_id for product_id, count in shards.items() if not count]
+        levels = await self._change_plain(
+            db, {product_id: -quantities[product_id] for product_id in plain}, guarded=True
+        )
+        if len(levels) < len(plain):
+            return levels
+        for product_id, count in shards.items():
+            if count:
+                level = await self.take(db, product_id=product_id, quantity=quantities[product_id])
+                if level is None:
+                    break
+                levels[product_id] = level
+        return levels
+
+    async def add_many(
+        self, db: AsyncSession, *, quantity_changes: Dict[int, int]
+    ) -> Dict[int, StockLevel]:
+        """
+        add() for several products with a fixed number of statements, like
+        take_many(). Products that don't exist are left out of the result.
+        """
+        shards = await self._lock_products(db, quantity_changes)
+        levels = await self._change_plain(
+            db,
+            {
+                product_id: quantity_changes[product_id]
+                for product_id, count in shards.items()
+                if not count
+            },
+            guarded=False,
+        )
+        for product_id, count in shards.items():
+            if count:
+                level = await self.add(
+                    db, product_id=product_id, quantity_change=quantity_changes[product_id]
+                )
+                if level is not None:
+                    levels[product_id] = level
+        return levels
+
+    async def set_quantity(
+        self, db: AsyncSession, *, product_id: int, quantity: int
+    ) -> Optional[int]:
+        """
+        Lock a product's stock and overwrite it. Returns the quantity it
+        replaced, or None if the product doesn't exist.
+        """
+        result = await db.execute(
+            select(Product.quantity, Product.stock_shards)
+            .where(Product.id == product_id)
+            .with_for_update()
+        )
+        row = result.first()
+        if row is None:
+            return None
+        previous, shards = row
+        if shards:
+            previous = await self._reset_shards(db, product_id, quantity)
+        await db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(quantity=quantity)
+            .execution_options(synchronize_session=False)
+        )
+        return previous
+
+    async def set_shards(
+        self, db: AsyncSession, *, product_id: int, shards: int
+    ) -> Optional[int]:
+        """
+        Spread a product's stock over `shards` rows, or fold it back into
+        the quantity column with 0. Returns the stock, or None if the
+        product doesn't exist.
+        """
+        result = await db.execute(
+            select(Product.quantity, Product.stock_shards)
+            .where(Product.id == product_id)
+            .with_for_update()
+        )
+        row = result.first()
+        if row is None:
+            return None
+        quantity, current = row
+        if current:
+            quantity = await self._lock_shard_total(db, product_id)
+        await db.execute(delete(StockShard).where(StockShard.product_id == product_id))
+        if shards:
+            await db.execute(
+                insert(StockShard.__table__),
+                [
+                    {"product_id": product_id, "shard": shard, "quantity": share}
+                    for shard, share in enumerate(split(quantity, shards))
+                ],
+            )
+        await db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(quantity=quantity, stock_shards=shards)
+            .execution_options(synchronize_session=False)
+        )
+        return quantity
+
+    async def refresh_snapshots(self, db: AsyncSession) -> List[Tuple[int, int]]:
+        """
+        Copy the shard totals of sharded products into their quantity
+        column. Returns (id, manufacturer_id) of the products that changed.
+        """
+        total = shard_total()
+        result = await db.execute(
+            update(Product)
+            .where(Product.stock_shards > 0, Product.quantity != total)
+            .values(quantity=total)
+            .returning(Product.id, Product.manufacturer_id)
+            .execution_options(synchronize_session=False)
+        )
+        return [tuple(row) for row in result.all()]
+
+    async def get_movements(
+        self,
+        db: AsyncSession,
+        *,
+        product_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> List[StockMovement]:
+        """
+        A product's ledger, newest first.
+        """
+        result = await db.execute(
+            paginate(
+                select(StockMovement).where(StockMovement.product_id == product_id),
+                self.pagination_keys,
+                limit=limit,
+                skip=skip,
+                cursor=cursor,
+                descending=True,
+            )
+        )
+        return result.scalars().all()
+
+    def next_cursor(self, items: List[StockMovement], limit: int) -> Optional[str]:
+        return next_cursor(items, self.pagination_keys, limit)
+
+    async def _lock_products(
+        self, db: AsyncSession, product_ids: Iterable[int]
+    ) -> Dict[int, int]:
+        """
+        Lock the existing products among product_ids in id order, like every
+        other stock writer. Returns their stock_shards, in id order.
+        """
+        result = await db.execute(
+            select(Product.id, Product.stock_shards)
+            .where(Product.id.in_(list(product_ids)))
+            .order_by(Product.id)
+            .with_for_update()
+        )
+        return dict(result.all())
+
+    async def _change_plain(
+        self, db: AsyncSession, changes: Dict[int, int], *, guarded: bool
+    ) -> Dict[int, StockLevel]:
+        """
+        Apply the changes to unsharded products with one UPDATE. Guarded, a
+        product whose stock would go negative is left out.
+        """
+        if not changes:
+            return {}
+        change = case(changes, value=Product.id)
+        stmt = (
+            update(Product)
+            .where(Product.id.in_(list(changes)), Product.stock_shards == 0)
+            .values(quantity=Product.quantity + change)
+            .returning(
+                Product.id, Product.manufacturer_id, Product.quantity, Product.min_quantity
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if guarded:
+            stmt = stmt.where(Product.quantity + change >= 0)
+        result = await db.execute(stmt)
+        return {row[0]: tuple(row[1:]) for row in result.all()}
+
+    async def _change_shards(
+        self, db: AsyncSession, product_id: int, change: int, *, guarded: bool
+    ) -> Optional[StockLevel]:
+        result = await db.execute(
+            select(Product.manufacturer_id, Product.min_quantity, Product.stock_shards)
+            .where(Product.id == product_id)
+        )
+        product = result.first()
+        if product is None or not product.stock_shards:
+            return None
+        shards = random.sample(range(product.stock_shards), product.stock_shards)
+        if not guarded:
+            shards = shards[:1]
+        shard_table = StockShard.__table__
+        for shard in shards:
+            stmt = (
+                update(shard_table)
+                .where(shard_table.c.product_id == product_id, shard_table.c.shard == shard)
+                .values(quantity=shard_table.c.quantity + change)
+            )
+            if guarded:
+                stmt = stmt.where(shard_table.c.quantity + change >= 0)
+            result = await db.execute(stmt)
+            if result.rowcount == 1:
+                break
+        else:
+            if not guarded or not await self._rebalance(db, product_id, -change):
+                return None
+        result = await db.execute(
+            select(func.coalesce(func.sum(StockShard.quantity), 0)).where(
+                StockShard.product_id == product_id
+            )
+        )
+        return product.manufacturer_id, result.scalar_one(), product.min_quantity
+
+    async def _lock_shard_total(self, db: AsyncSession, product_id: int) -> int:
+        result = await db.execute(
+            select(StockShard.quantity)
+            .where(StockShard.product_id == product_id)
+            .order_by(StockShard.shard)
+            .with_for_update()
+        )
+        return sum(result.scalars().all())
+
+    async def _reset_shards(self, db: AsyncSession, product_id: int, quantity: int) -> int:
+        """
+        Lock every shard and spread quantity over them. Returns the previous
+        total.
+        """
+        result = await db.execute(
+            select(StockShard.shard, StockShard.quantity)
+            .where(StockShard.product_id == product_id)
+            .order_by(StockShard.shard)
+            .with_for_update()
+        )
+        rows = result.all()
+        if rows:
+            shard_table = StockShard.__table__
+            await db.execute(
+                update(shard_table)
+                .where(
+                    shard_table.c.product_id == product_id,
+                    shard_table.c.shard == bindparam("target_shard"),
+                )
+                .values(quantity=bindparam("share")),
+                [
+                    {"target_shard": shard, "share": share}
+                    for (shard, _), share in zip(rows, split(quantity, len(rows)))
+                ],
+            )
+        return sum(q for _, q in rows)
+
+    async def _rebalance(self, db: AsyncSession, product_id: int, quantity: int) -> bool:
+        """
+        Take quantity from the shards together when no single shard holds
+        enough, leaving the rest evenly spread.
+        """
+        total = await self._lock_shard_total(db, product_id)
+        if total < quantity:
+            return False
+        await self._reset_shards(db, product_id, total - quantity)
+        return True
+
+stock = CRUDStock()
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.crud_catalog import catalog_version
+from app.crud.crud_product import product as crud_product
+from app.crud.crud_stock import movement, stock as crud_stock
+from app.models.product import Product
+from app.models.stock_event import StockEvent
+from app.models.stock_movement import StockMovementReason
+from app.schemas.stock_event import StockEventCreate
+
+# Keep IN lists well below the bind parameter limits of every backend
+CHUNK_SIZE = 1000
+
+class DuplicateStockEventError(Exception):
+    pass
+
+def _chunks(values: Sequence, size: int = CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def _paired_chunks(first: Sequence, second: Sequence, size: int = CHUNK_SIZE):
+    for i in range(0, max(len(first), len(second)), size):
+        yield first[i:i + size], second[i:i + size]
+
+class CRUDStockEvent:
+    async def get_known_event_ids(
+        self, db: AsyncSession, *, event_ids: Sequence[str]
+    ) -> set:
+        known = set()
+        for chunk in _chunks(event_ids):
+            result = await db.execute(
+                select(StockEvent.event_id).where(StockEvent.event_id.in_(chunk))
+            )
+            known.update(result.scalars().all())
+        return known
+
+    async def ingest(
+        self,
+        db: AsyncSession,
+        *,
+        events: List[StockEventCreate],
+        manufacturer_id: int,
+        user_id: int,
+    ) -> dict:
+        """
+        Apply a batch of POS stock events in one transaction.
+
+        Events already seen (in this batch or a previous one) are skipped and
+        the remaining quantity changes are summed per product, so the number
+        of statements depends on the products touched rather than the events.
+        Applied event ids are recorded with one multi-row INSERT. A concurrent
+        replay of the same events trips the unique event_id index; the batch
+        is then rolled back and DuplicateStockEventError raised so the client
+        can retry it.
+        """
+        rejected = []
+        duplicates = 0
+        fresh: Dict[str, StockEventCreate] = {}
+        for event in events:
+            if event.event_id in fresh:
+                duplicates += 1
+            elif event.product_id is None and not event.barcode:
+                rejected.append(
+                    {"event_id": event.event_id, "detail": "Missing product_id or barcode"}
+                )
+            else:
+                fresh[event.event_id] = event
+
+        known = await self.get_known_event_ids(db, event_ids=list(fresh))
+        duplicates += len(known)
+        pending = [event for event_id, event in fresh.items() if event_id not in known]
+
+        # Resolve product ids and barcodes to the caller's products
+        product_ids = list({e.product_id for e in pending if e.product_id is not None})
+        barcodes = list({e.barcode for e in pending if e.product_id is None})
+        owned_ids = set()
+        id_by_barcode = {}
+        for ids_chunk, barcodes_chunk in _paired_chunks(product_ids, barcodes):
+            result = await db.execute(
+                select(Product.id, Product.barcode).where(
+                    Product.manufacturer_id == manufacturer_id,
+                    or_(Product.id.in_(ids_chunk), Product.barcode.in_(barcodes_chunk)),
+                )
+            )
+            for product_id, barcode in result.all():
+                owned_ids.add(product_id)
+                id_by_barcode[barcode] = product_id
+
+        events_by_product: Dict[int, List[StockEventCreate]] = defaultdict(list)
+        for event in pending:
+            if event.product_id is not None:
+                product_id = event.product_id if event.product_id in owned_ids else None
+            else:
+                product_id = id_by_barcode.get(event.barcode)
+            if product_id is None:
+                rejected.append({"event_id": event.event_id, "detail": "Product not found"})
+                continue
+            events_by_product[product_id].append(event)
+
+        deltas = {
+            product_id: sum(e.quantity_change for e in product_events)
+            for product_id, product_events in events_by_product.items()
+        }
+        try:
+            # One pass in product id order, the order every stock writer
+            # locks products in, so concurrent batches can't deadlock. Net
+            # decrements only apply while enough stock is left; a product
+            # that would go negative has all of its events rejected
+            for product_id in sorted(deltas):
+                delta = deltas[product_id]
+                if delta < 0:
+                    level = await crud_stock.take(db, product_id=product_id, quantity=-delta)
+                    detail = "Insufficient stock"
+                elif delta > 0:
+                    level = await crud_stock.add(
+                        db, product_id=product_id, quantity_change=delta
+                    )
+                    # Deleted since it was read
+                    detail = "Product not found"
+                else:
+                    continue
+                if level is None:
+                    del deltas[product_id]
+                    for event in events_by_product.pop(product_id):
+                        rejected.append({"event_id": event.event_id, "detail": detail})
+            applied = [
+                {
+                    "event_id": event.event_id,
+                    "product_id": product_id,
+                    "quantity_change": event.quantity_change,
+                    "user_id": user_id,
+                }
+                for product_id, product_events in events_by_product.items()
+                for event in product_events
+            ]
+            if applied:
+                await db.execute(insert(StockEvent), applied)
+                await crud_stock.record(db, movements=[
+                    movement(
+                        event["product_id"],
+                        event["quantity_change"],
+                        StockMovementReason.POS,
+                        user_id=user_id,
+                    )
+                    for event in applied
+                ])
+            events = await crud_product.get_low_stock_events(
+                db, quantity_changes={p: d for p, d in deltas.items() if d}
+            )
+            if applied:
+                await catalog_version.bump(db, manufacturer_ids=[manufacturer_id])
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise DuplicateStockEventError()
+        await crud_product.after_product_change(
+            product_ids=deltas, manufacturer_ids=[manufacturer_id], events=events
+        )
+
+        return {
+            "applied": len(applied),
+            "duplicates": duplicates,
+            "products_updated": len([d for d in deltas.values() if d]),
+            "rejected": rejected,
+        }
+
+stock_event = CRUDStockEvent()
@@ -1,57 +1,75 @@
-from typing import Any, Dict, Optional, Union
-from sqlalchemy.orm import Session
-from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
-from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
-
-class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
-    def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
-    
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        db_obj = User(
-            email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
-            full_name=obj_in.full_name,
-            role=obj_in.role,
-            company_name=obj_in.company_name,
-            phone=obj_in.phone,
-            address=obj_in.address,
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
-    
-    def update(
-        self,
-        db: Session,
-        *,
-        db_obj: User,
-        obj_in: Union[UserUpdate, Dict[str, Any]]
-    ) -> User:
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        if update_data.get("password"):
-            hashed_password = get_password_hash(update_data["password"])
-            del update_data["password"]
-            update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
-    
-    def authenticate(
-        self, db: Session, *, email: str, password: str
-    ) -> Optional[User]:
-        user = self.get_by_email(db, email=email)
-        if not user:
-            return None
-        if not verify_password(password, user.hashed_password):
-            return None
-        return user
-    
-    def is_active(self, user: User) -> bool:
-        return user.is_active
-
-user = CRUDUser(User) 
\ No newline at end of file
+from typing import Any, Dict, Optional, Union
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import principal_cache
+from app.core.security import password_hasher
+from app.crud.base import CRUDBase
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+
+class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+    
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        hashed_password = await password_hasher.hash(obj_in.password)
+        db_obj = User(
+            email=obj_in.email,
+            hashed_password=hashed_password,
+            full_name=obj_in.full_name,
+            role=obj_in.role,
+            company_name=obj_in.company_name,
+            phone=obj_in.phone,
+            address=obj_in.address,
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+    
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        if update_data.get("password"):
+            hashed_password = await password_hasher.hash(update_data["password"])
+            del update_data["password"]
+            update_data["hashed_password"] = hashed_password
+        # Drop the cached principal before and after the write, so no request
+        # picks up the half-updated instance or the old role/is_active
+        principal_cache.pop(db_obj.id)
+        user = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        principal_cache.pop(db_obj.id)
+        return user
+    
+    async def authenticate(
+        self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        user = await self.get_by_email(db, email=email)
+        if not user:
+            return None
+        verified, new_hash = await password_hasher.verify_and_update(
+            password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if new_hash:
+            # Stored hash used an outdated cost, replace it transparently
+            user.hashed_password = new_hash
+            db.add(user)
+            await db.commit()
+            principal_cache.pop(user.id)
+        return user
+    
+    def is_active(self, user: User) -> bool:
+        return user.is_active
+
+user = CRUDUser(User)
@@ -1,42 +1,126 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from app.core.config import settings
-from app.api.v1.api import api_router
-from app.core.init_db import init_db
-from app.core.database import engine, SessionLocal
-
-app = FastAPI(
-    title="Inventory POS B2B System",
-    description="A lightweight, POS-integrated inventory management system with B2B marketplace",
-    version="1.0.0",
-)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include API router
-app.include_router(api_router, prefix="/api/v1")
-
-@app.get("/")
-async def root():
-    return {
-        "message": "Welcome to Inventory POS B2B System",
-        "version": "1.0.0",
-        "docs_url": "/docs",
-        "redoc_url": "/redoc",
-    }
-
-@app.on_event("startup")
-async def startup_event():
-    # Initialize database with sample data
-    db = SessionLocal()
-    try:
-        init_db(db)
-    finally:
-        db.close() 
\ No newline at end of file
+# Imported first so the startup timer covers the imports below
+from app.core.startup import FirstRequestMiddleware, startup_timer
+import asyncio
+import logging
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from app.api.deps import NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.api.v1.api import api_router
+from app.crud.crud_catalog import catalog_version
+from app.crud.crud_product import product as crud_product
+from app.core.security import password_hasher
+from app.core.database import engine, init_models, replicas, SessionLocal
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, metrics
+from app.core.query_trace import QueryTraceMiddleware
+from app.crud.pagination import InvalidCursorError
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(
+    title="Inventory POS B2B System",
+    description="A lightweight, POS-integrated inventory management system with B2B marketplace",
+    version="1.0.0",
+)
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+)
+if settings.QUERY_TRACE_ENABLED:
+    app.add_middleware(QueryTraceMiddleware)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+app.add_middleware(FirstRequestMiddleware, timer=startup_timer)
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+# Include API router
+app.include_router(api_router, prefix="/api/v1")
+
+@app.get("/")
+async def root():
+    return {
+        "message": "Welcome to Inventory POS B2B System",
+        "version": "1.0.0",
+        "docs_url": "/docs",
+        "redoc_url": "/redoc",
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """
+    Request, SQL and connection pool metrics in the Prometheus text format
+    """
+    return Response(metrics.render(engine.sync_engine.pool), media_type=CONTENT_TYPE)
+
+async def warm_product_cache() -> None:
+    async with SessionLocal() as db:
+        warmed = await crud_product.warm_cache(
+            db,
+            limit=settings.PRODUCT_CACHE_WARM_COUNT,
+            days=settings.PRODUCT_CACHE_WARM_DAYS,
+        )
+    logger.info("Product cache warmed with %d products", warmed)
+
+async def refresh_stock_snapshots() -> None:
+    while True:
+        await asyncio.sleep(settings.STOCK_SNAPSHOT_INTERVAL_SECONDS)
+        try:
+            async with SessionLocal() as db:
+                await crud_product.refresh_stock_snapshots(db)
+        except Exception:
+            logger.exception("Stock snapshot refresh failed")
+
+async def fold_catalog_changes() -> None:
+    while True:
+        await asyncio.sleep(settings.CATALOG_FOLD_INTERVAL_SECONDS)
+        try:
+            async with SessionLocal() as db:
+                await catalog_version.fold(db)
+        except Exception:
+            logger.exception("Catalog change fold failed")
+
+@app.on_event("startup")
+async def startup_event():
+    # Startup only prepares what the first request needs; sample data is
+    # loaded with `python -m app.cli seed`, connections are opened on demand
+    startup_timer.phases["import"] = startup_timer.elapsed()
+    
+    # Local SQLite databases are not managed by alembic
+    if engine.url.get_backend_name() == "sqlite":
+        with startup_timer.phase("schema"):
+            await init_models()
+    
+    # Background tasks are only scheduled here and never awaited: reads fall
+    # back to the database until the product cache is warm. Each one can be
+    # turned off in the settings
+    with startup_timer.phase("background_tasks"):
+        if settings.PRODUCT_CACHE_WARM_COUNT > 0:
+            app.state.product_cache_task = asyncio.create_task(warm_product_cache())
+        if settings.STOCK_SNAPSHOT_INTERVAL_SECONDS > 0:
+            app.state.stock_snapshot_task = asyncio.create_task(refresh_stock_snapshots())
+        if settings.CATALOG_FOLD_INTERVAL_SECONDS > 0:
+            app.state.catalog_fold_task = asyncio.create_task(fold_catalog_changes())
+        if replicas.replicas:
+            app.state.replica_lag_task = asyncio.create_task(
+                replicas.run(settings.REPLICA_LAG_CHECK_SECONDS)
+            )
+    startup_timer.mark_ready()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for name in (
+        "product_cache_task", "stock_snapshot_task", "catalog_fold_task", "replica_lag_task"
+    ):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    password_hasher.shutdown()
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer
+from app.models.base import Base
+
+class CatalogVersion(Base):
+    # Number of changes to a manufacturer's products folded in from
+    # CatalogChange, so a catalog page can be revalidated without reading
+    # the products
+    manufacturer_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+class CatalogChange(Base):
+    # One row per committed change to a manufacturer's products, appended in
+    # the writer's transaction; writers only insert, so they never wait on
+    # each other. Folded into CatalogVersion in the background.
+    id = Column(Integer, primary_key=True)
+    manufacturer_id = Column(Integer, nullable=False, index=True)
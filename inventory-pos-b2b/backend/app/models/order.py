@@ -1,36 +1,52 @@
-from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, Enum, DateTime
-from sqlalchemy.orm import relationship
-from app.models.base import Base
-import enum
-
-class OrderStatus(str, enum.Enum):
-    PENDING = "pending"
-    CONFIRMED = "confirmed"
-    SHIPPED = "shipped"
-    DELIVERED = "delivered"
-    CANCELLED = "cancelled"
-
-class Order(Base):
-    id = Column(Integer, primary_key=True, index=True)
-    order_number = Column(String, unique=True, index=True)
-    store_id = Column(Integer, ForeignKey("user.id"))
-    status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
-    total_amount = Column(Float, nullable=False)
-    shipping_address = Column(String)
-    notes = Column(String)
-    
-    # Relationships
-    store = relationship("User", back_populates="orders")
-    items = relationship("OrderItem", back_populates="order")
-
-class OrderItem(Base):
-    id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("order.id"))
-    product_id = Column(Integer, ForeignKey("product.id"))
-    quantity = Column(Integer, nullable=False)
-    unit_price = Column(Float, nullable=False)
-    subtotal = Column(Float, nullable=False)
-    
-    # Relationships
-    order = relationship("Order", back_populates="items")
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, Enum, DateTime, Index
+from sqlalchemy.orm import relationship
+from app.models.base import Base
+import enum
+
+class OrderStatus(str, enum.Enum):
+    PENDING = "pending"
+    CONFIRMED = "confirmed"
+    SHIPPED = "shipped"
+    DELIVERED = "delivered"
+    CANCELLED = "cancelled"
+
+class Order(Base):
+    # Order listings are paginated newest first on (created_at, id), in
+    # full, per store or per status
+    __table_args__ = (
+        Index("ix_order_created_at_id", "created_at", "id"),
+        Index("ix_order_store_id_created_at_id", "store_id", "created_at", "id"),
+        Index("ix_order_status_created_at_id", "status", "created_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_number = Column(String, unique=True, index=True)
+    store_id = Column(Integer, ForeignKey("user.id"))
+    status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
+    total_amount = Column(Float, nullable=False)
+    shipping_address = Column(String)
+    notes = Column(String)
+    
+    # Relationships
+    store = relationship("User", back_populates="orders")
+    items = relationship("OrderItem", back_populates="order")
+
+class OrderItem(Base):
+    # Items are loaded by order, and orders are matched to manufacturers
+    # through their items' products
+    __table_args__ = (
+        Index("ix_orderitem_order_id_product_id", "order_id", "product_id"),
+        Index("ix_orderitem_product_id", "product_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("order.id"))
+    product_id = Column(Integer, ForeignKey("product.id"))
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    unit_cost = Column(Float)  # Product cost when ordered, for margins
+    subtotal = Column(Float, nullable=False)
+    
+    # Relationships
+    order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items") 
\ No newline at end of file
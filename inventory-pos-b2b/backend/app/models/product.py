@@ -1,20 +1,38 @@
-from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, Text
-from sqlalchemy.orm import relationship
-from app.models.base import Base
-
-class Product(Base):
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True, nullable=False)
-    description = Column(Text)
-    sku = Column(String, unique=True, index=True)
-    barcode = Column(String, unique=True, index=True)
-    price = Column(Float, nullable=False)
-    cost = Column(Float)  # Cost price for manufacturers
-    quantity = Column(Integer, default=0)
-    min_quantity = Column(Integer, default=0)  # Minimum stock level
-    manufacturer_id = Column(Integer, ForeignKey("user.id"))
-    is_active = Column(Boolean, default=True)
-    
-    # Relationships
-    manufacturer = relationship("User", back_populates="products")
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, Index, Text, or_
+from sqlalchemy.orm import relationship
+from app.models.base import Base
+
+class Product(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, index=True, nullable=False)
+    description = Column(Text)
+    sku = Column(String, unique=True, index=True)
+    barcode = Column(String, unique=True, index=True)
+    price = Column(Float, nullable=False)
+    cost = Column(Float)  # Cost price for manufacturers
+    quantity = Column(Integer, default=0)
+    min_quantity = Column(Integer, default=0)  # Minimum stock level
+    manufacturer_id = Column(Integer, ForeignKey("user.id"))
+    is_active = Column(Boolean, default=True)
+    # Number of stock_shard rows holding the stock of a hot product; while
+    # non-zero, quantity is a periodically refreshed snapshot of their sum
+    stock_shards = Column(Integer, nullable=False, default=0)
+    
+    # Partial index holding only the products at or below their minimum
+    # level, plus the sharded ones whose quantity is only a snapshot, so
+    # low-stock lookups never scan the rest of the catalog; the full
+    # catalog of a manufacturer is paginated by id
+    __table_args__ = (
+        Index("ix_product_manufacturer_id_id", manufacturer_id, id),
+        Index(
+            "ix_product_low_stock",
+            manufacturer_id,
+            id,
+            postgresql_where=or_(quantity <= min_quantity, stock_shards > 0),
+            sqlite_where=or_(quantity <= min_quantity, stock_shards > 0),
+        ),
+    )
+    
+    # Relationships
+    manufacturer = relationship("User", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product") 
\ No newline at end of file
@@ -0,0 +1,8 @@
+from sqlalchemy import Column, DateTime, Integer
+from app.models.base import Base
+
+class ReplicaHeartbeat(Base):
+    # Single row the primary rewrites on a timer; how old a replica's copy
+    # of it is tells how far that replica lags (see app.core.replicas)
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
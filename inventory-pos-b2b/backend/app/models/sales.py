@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Integer, UniqueConstraint
+from app.models.base import Base
+
+# Daily sales rollups, keyed by the day the order was placed. An order counts
+# while it is confirmed, shipped or delivered; cancelling it subtracts its
+# lines again. Reports read only these tables.
+
+class DailyProductSales(Base):
+    __table_args__ = (
+        UniqueConstraint("product_id", "day"),
+        Index("ix_dailyproductsales_manufacturer_id_day", "manufacturer_id", "day"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    manufacturer_id = Column(Integer, ForeignKey("user.id"))
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    margin = Column(Float, nullable=False, default=0)
+
+class DailyManufacturerSales(Base):
+    __table_args__ = (UniqueConstraint("manufacturer_id", "day"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    manufacturer_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    margin = Column(Float, nullable=False, default=0)
+
+class DailyStoreSales(Base):
+    __table_args__ = (UniqueConstraint("store_id", "day"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    store_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    margin = Column(Float, nullable=False, default=0)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.models.base import Base
+
+class StockEvent(Base):
+    # POS scan/sale events that were applied, kept so replays are ignored
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, unique=True, index=True, nullable=False)
+    product_id = Column(Integer, ForeignKey("product.id"), nullable=False)
+    quantity_change = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("user.id"))
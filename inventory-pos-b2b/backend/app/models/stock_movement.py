@@ -0,0 +1,40 @@
+import enum
+from sqlalchemy import Column, Enum, ForeignKey, Index, Integer, UniqueConstraint
+from app.models.base import Base
+
+class StockMovementReason(str, enum.Enum):
+    INITIAL = "initial"  # Stock a product was created or imported with
+    ADJUSTMENT = "adjustment"  # Manual edit or update-stock call
+    SALE = "sale"  # Taken by a confirmed order
+    POS = "pos"  # POS stock event
+    IMPORT = "import"  # Bulk import overwriting the quantity
+    CANCELLATION = "cancellation"  # Returned by a confirmed order that was cancelled
+
+class StockMovement(Base):
+    # Append-only ledger of every stock change; summed per product it gives
+    # the product's stock
+    __table_args__ = (
+        Index("ix_stockmovement_product_id_id", "product_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: the ledger outlives deleted products
+    product_id = Column(Integer, nullable=False)
+    quantity_change = Column(Integer, nullable=False)
+    # Stored by value, matching the type created by the migration
+    reason = Column(
+        Enum(StockMovementReason, values_callable=lambda reasons: [r.value for r in reasons]),
+        nullable=False,
+    )
+    order_id = Column(Integer, ForeignKey("order.id"))
+    user_id = Column(Integer, ForeignKey("user.id"))
+
+class StockShard(Base):
+    # Part of the stock of a product split with stock_shards > 0; writers
+    # update one random shard instead of all serializing on the product row
+    __table_args__ = (UniqueConstraint("product_id", "shard"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("product.id", ondelete="CASCADE"), nullable=False)
+    shard = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)
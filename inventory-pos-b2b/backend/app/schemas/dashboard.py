@@ -0,0 +1,17 @@
+from datetime import date, datetime
+from typing import Optional
+from pydantic import BaseModel
+
+class DashboardSummary(BaseModel):
+    role: str
+    product_count: int
+    low_stock_count: Optional[int] = None  # Not tracked for stores
+    pending_orders: int
+    # Sales over the reporting period
+    period_start: date
+    period_end: date
+    orders: int
+    units: int
+    revenue: float
+    margin: float
+    generated_at: datetime
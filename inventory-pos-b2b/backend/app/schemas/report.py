@@ -0,0 +1,15 @@
+from datetime import date
+from pydantic import BaseModel
+
+class DailySales(BaseModel):
+    day: date
+    orders: int
+    units: int
+    revenue: float
+    margin: float
+
+class ProductSales(BaseModel):
+    product_id: int
+    units: int
+    revenue: float
+    margin: float
@@ -0,0 +1,21 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+class StockEventCreate(BaseModel):
+    event_id: str = Field(min_length=1, max_length=128)
+    product_id: Optional[int] = None
+    barcode: Optional[str] = None
+    quantity_change: int  # Negative for sales
+
+class StockEventBatch(BaseModel):
+    events: List[StockEventCreate] = Field(max_length=10000)
+
+class RejectedStockEvent(BaseModel):
+    event_id: str
+    detail: str
+
+class StockEventBatchResult(BaseModel):
+    applied: int
+    duplicates: int
+    products_updated: int
+    rejected: List[RejectedStockEvent]
@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from app.models.stock_movement import StockMovementReason
+
+class StockMovement(BaseModel):
+    id: int
+    product_id: int
+    quantity_change: int
+    reason: StockMovementReason
+    order_id: Optional[int] = None
+    user_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,36 +1,36 @@
-from typing import Optional
-from pydantic import BaseModel, EmailStr
-from app.models.user import UserRole
-
-class UserBase(BaseModel):
-    email: Optional[EmailStr] = None
-    full_name: Optional[str] = None
-    role: Optional[UserRole] = None
-    company_name: Optional[str] = None
-    phone: Optional[str] = None
-    address: Optional[str] = None
-    is_active: Optional[bool] = True
-
-class UserCreate(UserBase):
-    email: EmailStr
-    password: str
-    full_name: str
-    role: UserRole
-    company_name: Optional[str] = None
-    phone: Optional[str] = None
-    address: Optional[str] = None
-
-class UserUpdate(UserBase):
-    password: Optional[str] = None
-
-class UserInDBBase(UserBase):
-    id: Optional[int] = None
-
-    class Config:
-        from_attributes = True
-
-class User(UserInDBBase):
-    pass
-
-class UserInDB(UserInDBBase):
+from typing import Optional
+from pydantic import BaseModel, EmailStr
+from app.models.user import UserRole
+
+class UserBase(BaseModel):
+    email: Optional[EmailStr] = None
+    full_name: Optional[str] = None
+    role: Optional[UserRole] = None
+    company_name: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    is_active: Optional[bool] = True
+
+class UserCreate(UserBase):
+    email: EmailStr
+    password: str
+    full_name: str
+    role: UserRole
+    company_name: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+
+class UserUpdate(UserBase):
+    password: Optional[str] = None
+
+class UserInDBBase(UserBase):
+    id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class User(UserInDBBase):
+    pass
+
+class UserInDB(UserInDBBase):
     hashed_password: str 
\ No newline at end of file
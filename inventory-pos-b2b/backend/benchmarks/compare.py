@@ -0,0 +1,74 @@
+"""
+Compare two benchmarks.run result files, e.g. from before and after a
+change:
+
+    python -m benchmarks.compare BASE.json NEW.json [--threshold 10]
+
+Prints throughput and latency per scenario with the relative change, and
+exits with status 1 if any p95 latency regressed by more than --threshold
+percent.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+METRICS = (
+    ("throughput_rps", None),
+    ("mean", "latency_ms"),
+    ("p50", "latency_ms"),
+    ("p95", "latency_ms"),
+    ("p99", "latency_ms"),
+)
+
+def metric(scenario: Dict[str, Any], name: str, group: Optional[str]) -> Optional[float]:
+    values = scenario.get(group, {}) if group else scenario
+    return values.get(name)
+
+def change(base: Optional[float], new: Optional[float]) -> Optional[float]:
+    if base is None or new is None or base == 0:
+        return None
+    return (new - base) / base * 100
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print the comparison and return the scenarios whose p95 regressed.
+    """
+    print(f"base {base.get('commit')} ({base.get('timestamp')}) dataset {base.get('dataset')}")
+    print(f"new  {new.get('commit')} ({new.get('timestamp')}) dataset {new.get('dataset')}")
+    regressions = []
+    for name in base["scenarios"]:
+        if name not in new["scenarios"]:
+            print(f"\n{name}: missing from the new results")
+            continue
+        print(f"\n{name}")
+        for metric_name, group in METRICS:
+            before = metric(base["scenarios"][name], metric_name, group)
+            after = metric(new["scenarios"][name], metric_name, group)
+            delta = change(before, after)
+            print(
+                f"  {metric_name:15} {before!s:>12} {after!s:>12} "
+                + (f"{delta:+8.1f}%" if delta is not None else "")
+            )
+            if metric_name == "p95" and delta is not None and delta > threshold:
+                regressions.append(name)
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print(f"\np95 regressed by more than {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Synthetic dataset generator for the benchmarks.
+
+Rows are written with multi-row INSERTs on the Core tables, one statement
+per batch, so a dataset of a few hundred thousand rows takes seconds rather
+than the hours the API would need. Every synthetic user shares one password
+(hashed once) and every synthetic row is tagged with a "bench" SKU, order
+number or email, so a dataset can be found again by the benchmark runner.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Sequence
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import get_password_hash
+from app.crud.crud_sales import sales as crud_sales
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.stock_movement import StockMovement, StockMovementReason
+from app.models.user import User, UserRole
+
+BENCH_PASSWORD = "bench123"
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+BENCH_PREFIX = "BENCH-"
+
+# Dataset sizes selectable with --scale
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {
+        "manufacturers": 5,
+        "stores": 20,
+        "products": 2000,
+        "orders": 2000,
+        "items_per_order": 3,
+    },
+    "medium": {
+        "manufacturers": 50,
+        "stores": 500,
+        "products": 50000,
+        "orders": 50000,
+        "items_per_order": 4,
+    },
+    "large": {
+        "manufacturers": 200,
+        "stores": 5000,
+        "products": 500000,
+        "orders": 500000,
+        "items_per_order": 4,
+    },
+}
+
+# Share of generated orders per status
+ORDER_STATUS_WEIGHTS = {
+    OrderStatus.PENDING: 30,
+    OrderStatus.CONFIRMED: 30,
+    OrderStatus.SHIPPED: 20,
+    OrderStatus.DELIVERED: 15,
+    OrderStatus.CANCELLED: 5,
+}
+
+WORDS = (
+    "steel", "cotton", "organic", "premium", "compact", "classic", "wireless",
+    "bolt", "cable", "shirt", "coffee", "filter", "lamp", "bottle", "glove",
+    "panel", "sensor", "tape", "brush", "valve", "widget", "gadget", "sprocket",
+)
+
+def bench_email(role: UserRole, number: int) -> str:
+    return f"{role.value}-{number}@{BENCH_EMAIL_DOMAIN}"
+
+def batches(rows: Sequence[Any], size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+async def count_existing(db: AsyncSession) -> Dict[str, int]:
+    """
+    Size of the synthetic dataset already in the database.
+    """
+    users = await db.execute(
+        select(User.role, func.count())
+        .where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+        .group_by(User.role)
+    )
+    by_role = dict(users.all())
+    products = await db.execute(
+        select(func.count()).select_from(Product).where(Product.sku.like(f"{BENCH_PREFIX}%"))
+    )
+    orders = await db.execute(
+        select(func.count()).select_from(Order).where(
+            Order.order_number.like(f"{BENCH_PREFIX}%")
+        )
+    )
+    return {
+        "manufacturers": by_role.get(UserRole.MANUFACTURER, 0),
+        "stores": by_role.get(UserRole.STORE, 0),
+        "products": products.scalar_one(),
+        "orders": orders.scalar_one(),
+    }
+
+async def generate(
+    db: AsyncSession,
+    *,
+    manufacturers: int,
+    stores: int,
+    products: int,
+    orders: int,
+    items_per_order: int,
+    seed: int = 0,
+    days: int = 90,
+    batch_size: int = 5000,
+) -> Dict[str, Any]:
+    """
+    Insert a synthetic dataset and return its size and how long each part
+    took. The same seed always produces the same rows.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    user_rows = [
+        {
+            "email": bench_email(role, number),
+            "hashed_password": hashed_password,
+            "full_name": f"Bench {role.value.title()} {number}",
+            "role": role,
+            "is_active": True,
+            "company_name": f"Bench {role.value.title()} {number}",
+            "phone": f"555{number:07d}",
+            "address": f"{number} Bench Street",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for role, count in ((UserRole.MANUFACTURER, manufacturers), (UserRole.STORE, stores))
+        for number in range(count)
+    ]
+    for batch in batches(user_rows, batch_size):
+        await db.execute(insert(User.__table__), batch)
+    result = await db.execute(
+        select(User.id, User.role)
+        .where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+        .order_by(User.id)
+    )
+    users = result.all()
+    manufacturer_ids = [user_id for user_id, role in users if role == UserRole.MANUFACTURER]
+    store_ids = [user_id for user_id, role in users if role == UserRole.STORE]
+    await db.commit()
+    timings["users"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    product_rows = []
+    for number in range(products):
+        price = round(rng.uniform(1, 500), 2)
+        product_rows.append({
+            "name": " ".join(rng.sample(WORDS, 3)).title(),
+            "description": " ".join(rng.choices(WORDS, k=12)),
+            "sku": f"{BENCH_PREFIX}{number:08d}",
+            "barcode": f"2{number:012d}",
+            "price": price,
+            "cost": round(price * rng.uniform(0.4, 0.8), 2),
+            "quantity": rng.randint(0, 2000),
+            "min_quantity": rng.choice((0, 5, 10, 25)),
+            "manufacturer_id": rng.choice(manufacturer_ids),
+            "is_active": rng.random() > 0.05,
+            "stock_shards": 0,
+            "created_at": now,
+            "updated_at": now,
+        })
+    for batch in batches(product_rows, batch_size):
+        await db.execute(insert(Product.__table__), batch)
+    # Open the stock ledger like product creation does
+    await db.execute(
+        insert(StockMovement.__table__).from_select(
+            ["product_id", "quantity_change", "reason", "created_at", "updated_at"],
+            select(
+                Product.id,
+                Product.quantity,
+                literal(StockMovementReason.INITIAL, StockMovement.reason.type),
+                Product.created_at,
+                Product.updated_at,
+            ).where(Product.sku.like(f"{BENCH_PREFIX}%"), Product.quantity != 0),
+        )
+    )
+    result = await db.execute(
+        select(Product.id, Product.price, Product.cost)
+        .where(Product.sku.like(f"{BENCH_PREFIX}%"))
+        .order_by(Product.id)
+    )
+    catalog = result.all()
+    await db.commit()
+    timings["products"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    statuses = list(ORDER_STATUS_WEIGHTS)
+    weights = list(ORDER_STATUS_WEIGHTS.values())
+    items_written = 0
+    for first in range(0, orders, batch_size):
+        numbers = range(first, min(first + batch_size, orders))
+        order_rows: List[Dict[str, Any]] = []
+        lines_by_number: Dict[str, List[Dict[str, Any]]] = {}
+        for number in numbers:
+            order_number = f"{BENCH_PREFIX}{number:08d}"
+            lines = []
+            for product_id, price, cost in rng.sample(catalog, min(items_per_order, len(catalog))):
+                quantity = rng.randint(1, 10)
+                lines.append({
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "unit_price": price,
+                    "unit_cost": cost,
+                    "subtotal": round(price * quantity, 2),
+                })
+            created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+            order_rows.append({
+                "order_number": order_number,
+                "store_id": rng.choice(store_ids),
+                "status": rng.choices(statuses, weights)[0],
+                "total_amount": round(sum(line["subtotal"] for line in lines), 2),
+                "shipping_address": "1 Bench Street",
+                "notes": None,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+            lines_by_number[order_number] = lines
+        await db.execute(insert(Order.__table__), order_rows)
+        result = await db.execute(
+            select(Order.id, Order.order_number).where(
+                Order.order_number.in_(list(lines_by_number))
+            )
+        )
+        item_rows = [
+            {"order_id": order_id, **line, "created_at": now, "updated_at": now}
+            for order_id, order_number in result.all()
+            for line in lines_by_number[order_number]
+        ]
+        for batch in batches(item_rows, batch_size):
+            await db.execute(insert(OrderItem.__table__), batch)
+        items_written += len(item_rows)
+        await db.commit()
+    timings["orders"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if orders:
+        await crud_sales.backfill(db, start=(now - timedelta(days=days)).date(), end=now.date())
+    timings["sales_rollups"] = time.perf_counter() - start
+
+    return {
+        "manufacturers": len(manufacturer_ids),
+        "stores": len(store_ids),
+        "products": len(catalog),
+        "orders": orders,
+        "order_items": items_written,
+        "seed": seed,
+        "seconds": {name: round(seconds, 3) for name, seconds in timings.items()},
+    }
@@ -0,0 +1,134 @@
+"""
+End-to-end benchmark, run from the backend directory:
+
+    python -m benchmarks.run [--scale small|medium|large] [--requests 500]
+        [--concurrency 10] [--scenario NAME ...] [--seed 0]
+        [--database URI] [--skip-generate] [--output results.json]
+
+Generates a synthetic dataset (see benchmarks.datagen), then drives the
+login, catalog listing, barcode scan and order create/confirm scenarios
+through the application with an in-process client and writes the
+latencies and throughput as JSON. Compare two result files with
+benchmarks.compare.
+
+Without --database a fresh SQLite file is used; point it at a PostgreSQL
+database to benchmark the production setup. --skip-generate reuses a
+dataset generated by an earlier run against the same database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Kept in step with benchmarks.datagen.SCALES and benchmarks.scenarios.REQUEST_SHARE,
+# which can't be imported before the database is chosen
+SCALES = ("small", "medium", "large")
+SCENARIOS = ("login", "catalog_list", "barcode_scan", "order_create_confirm")
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # The settings are read on import, so the app is imported only once
+    # SQLALCHEMY_DATABASE_URI points at the benchmark database
+    import httpx
+    from app.main import app
+    from app.core.database import SessionLocal, engine
+    from benchmarks.datagen import SCALES, count_existing, generate
+    from benchmarks.scenarios import (
+        REQUEST_SHARE, ScenarioContext, run_operation, scenario_operations,
+    )
+
+    await app.router.startup()
+    try:
+        # Don't let the startup cache warm-up race the data generation
+        if hasattr(app.state, "product_cache_task"):
+            await app.state.product_cache_task
+        async with SessionLocal() as db:
+            if args.skip_generate:
+                dataset = await count_existing(db)
+            else:
+                dataset = await generate(db, seed=args.seed, **SCALES[args.scale])
+                dataset["scale"] = args.scale
+
+        results: Dict[str, Any] = {}
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            context = ScenarioContext()
+            async with SessionLocal() as db:
+                await context.load(db, client)
+            operations = scenario_operations(context)
+            for name in args.scenario:
+                requests = max(1, int(args.requests * REQUEST_SHARE[name]))
+                results[name] = await run_operation(
+                    client,
+                    operations[name],
+                    requests=requests,
+                    concurrency=args.concurrency,
+                    seed=args.seed,
+                )
+                print(f"{name:22} {json.dumps(results[name])}", file=sys.stderr)
+    finally:
+        await app.router.shutdown()
+        await engine.dispose()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "database": engine.url.get_backend_name(),
+        "dataset": dataset,
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database")
+    parser.add_argument("--skip-generate", action="store_true")
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or list(SCENARIOS)
+
+    if args.database:
+        os.environ["SQLALCHEMY_DATABASE_URI"] = args.database
+    else:
+        if args.skip_generate:
+            parser.error("--skip-generate needs --database")
+        directory = tempfile.mkdtemp(prefix="inventory-bench-")
+        os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{directory}/bench.db"
+
+    start = time.perf_counter()
+    results = asyncio.run(run(args))
+    results["seconds"] = round(time.perf_counter() - start, 3)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Latency/throughput scenarios driven through the real application routers
+with an in-process ASGI client, so the numbers cover routing, dependencies,
+validation, the database and serialization, but no network.
+"""
+import asyncio
+import random
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.product import Product
+from app.models.user import User, UserRole
+from benchmarks.datagen import BENCH_EMAIL_DOMAIN, BENCH_PASSWORD, BENCH_PREFIX
+
+API = "/api/v1"
+
+# One request of a scenario; returns the response to check its status
+Operation = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies: List[float], errors: int, elapsed: float, concurrency: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    stats = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+    if ordered:
+        stats["latency_ms"] = {
+            "mean": round(statistics.mean(ordered) * 1000, 3),
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3),
+        }
+    return stats
+
+async def run_operation(
+    client: httpx.AsyncClient,
+    operation: Operation,
+    *,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> Dict[str, Any]:
+    """
+    Issue `requests` operations from `concurrency` workers and summarize
+    the latencies of the successful (2xx/304) ones.
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(worker_seed: int) -> None:
+        nonlocal remaining, errors
+        rng = random.Random(worker_seed)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await operation(client, rng)
+            elapsed = time.perf_counter() - start
+            if response.is_success or response.status_code == 304:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(seed * 1000 + i) for i in range(concurrency)])
+    return summarize(latencies, errors, time.perf_counter() - start, concurrency)
+
+async def login(client: httpx.AsyncClient, email: str) -> Dict[str, str]:
+    response = await client.post(
+        f"{API}/auth/login", data={"username": email, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+class ScenarioContext:
+    """
+    Users, tokens and products the scenarios pick from, loaded once from
+    the synthetic dataset.
+    """
+
+    def __init__(self) -> None:
+        self.store_emails: List[str] = []
+        self.manufacturer_emails: List[str] = []
+        # (auth headers, store id) of the logged-in stores
+        self.store_sessions: List[Any] = []
+        self.barcodes: List[str] = []
+        # manufacturer id -> (auth headers, [(product id, price)])
+        self.sellers: Dict[int, Any] = {}
+
+    async def load(self, db: AsyncSession, client: httpx.AsyncClient, *, sellers: int = 5) -> None:
+        result = await db.execute(
+            select(User.id, User.email, User.role)
+            .where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+            .order_by(User.id)
+        )
+        store_ids = []
+        for user_id, email, role in result.all():
+            if role == UserRole.STORE:
+                self.store_emails.append(email)
+                store_ids.append(user_id)
+            else:
+                self.manufacturer_emails.append(email)
+        if not self.store_emails or not self.manufacturer_emails:
+            raise RuntimeError("No synthetic dataset found, generate one first")
+        result = await db.execute(
+            select(Product.barcode).where(Product.sku.like(f"{BENCH_PREFIX}%")).limit(10000)
+        )
+        self.barcodes = list(result.scalars().all())
+
+        # A few logged-in sessions, so the other scenarios don't pay for bcrypt
+        for email, store_id in zip(self.store_emails[:sellers], store_ids):
+            self.store_sessions.append((await login(client, email), store_id))
+        result = await db.execute(
+            select(User.id, User.email).where(
+                User.email.in_(self.manufacturer_emails[:sellers])
+            )
+        )
+        for manufacturer_id, email in result.all():
+            products = await db.execute(
+                select(Product.id, Product.price)
+                .where(
+                    Product.manufacturer_id == manufacturer_id,
+                    Product.is_active.is_(True),
+                    Product.quantity >= 100,
+                )
+                .limit(200)
+            )
+            self.sellers[manufacturer_id] = (await login(client, email), products.all())
+
+def scenario_operations(context: ScenarioContext) -> Dict[str, Operation]:
+    cursors: Dict[int, Optional[str]] = {}
+
+    async def login_op(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        return await client.post(
+            f"{API}/auth/login",
+            data={"username": rng.choice(context.store_emails), "password": BENCH_PASSWORD},
+        )
+
+    async def catalog_list(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        # Each worker pages through the catalog with cursors, starting over
+        # once it runs out
+        worker = id(rng)
+        params = {"limit": 100}
+        if cursors.get(worker):
+            params["cursor"] = cursors[worker]
+        response = await client.get(
+            f"{API}/products/", params=params, headers=rng.choice(context.store_sessions)[0]
+        )
+        cursors[worker] = response.headers.get("x-next-cursor")
+        return response
+
+    async def barcode_scan(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        return await client.get(
+            f"{API}/products/barcode/{rng.choice(context.barcodes)}",
+            headers=rng.choice(context.store_sessions)[0],
+        )
+
+    async def order_create_confirm(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+        seller_headers, products = context.sellers[rng.choice(list(context.sellers))]
+        headers, store_id = rng.choice(context.store_sessions)
+        items = [
+            {"product_id": product_id, "quantity": 1, "unit_price": price, "subtotal": price}
+            for product_id, price in rng.sample(products, min(3, len(products)))
+        ]
+        response = await client.post(
+            f"{API}/orders/",
+            headers=headers,
+            json={
+                "store_id": store_id,
+                "shipping_address": "1 Bench Street",
+                "items": items,
+            },
+        )
+        if not response.is_success:
+            return response
+        return await client.put(
+            f"{API}/orders/{response.json()['id']}/status",
+            params={"status": "confirmed"},
+            headers=seller_headers,
+        )
+
+    return {
+        "login": login_op,
+        "catalog_list": catalog_list,
+        "barcode_scan": barcode_scan,
+        "order_create_confirm": order_create_confirm,
+    }
+
+# Requests per scenario relative to --requests; logins are bcrypt-bound
+REQUEST_SHARE = {
+    "login": 0.1,
+    "catalog_list": 1.0,
+    "barcode_scan": 1.0,
+    "order_create_confirm": 0.5,
+}
@@ -0,0 +1,114 @@
+"""
+Microbenchmark of list response serialization, run from the backend
+directory:
+
+    python -m benchmarks.serialization [--rows 1000] [--repeat 50]
+
+Compares FastAPI's default path for a `response_model=List[...]` route
+(validate from attributes, jsonable_encoder, json.dumps) with the
+pydantic-core path app.core.serialization takes under FAST_LIST_RESPONSES,
+on transient ORM objects so no database is involved.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Callable, List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.core.serialization import json_list_response
+# Registers every model so the relationships between them resolve
+from app.models import catalog, order, product, sales, stock_event, stock_movement, user
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.schemas.order import Order as OrderSchema
+from app.schemas.product import Product as ProductSchema
+
+def make_products(rows: int) -> List[Product]:
+    now = datetime.utcnow()
+    return [
+        Product(
+            id=i,
+            name=f"Product {i}",
+            description="A product used to benchmark serialization",
+            sku=f"SKU-{i}",
+            barcode=f"{i:013d}",
+            price=9.99,
+            cost=4.5,
+            quantity=i % 100,
+            min_quantity=10,
+            manufacturer_id=1,
+            is_active=True,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(rows)
+    ]
+
+def make_orders(rows: int, items: int = 3) -> List[Order]:
+    now = datetime.utcnow()
+    return [
+        Order(
+            id=i,
+            order_number=f"ORD-{i}",
+            store_id=2,
+            status=OrderStatus.PENDING,
+            total_amount=30.0,
+            shipping_address="1 Main Street",
+            notes=None,
+            created_at=now,
+            updated_at=now,
+            items=[
+                OrderItem(id=i * items + j, order_id=i, product_id=j, quantity=1, unit_price=10.0, subtotal=10.0)
+                for j in range(items)
+            ],
+        )
+        for i in range(rows)
+    ]
+
+async def default_path(schema: Any, items: List[Any]) -> bytes:
+    field = create_response_field(name="Response", type_=List[schema])
+    content = await serialize_response(field=field, response_content=items)
+    return JSONResponse(content).body
+
+async def fast_path(schema: Any, items: List[Any]) -> bytes:
+    return json_list_response(schema, items).body
+
+def measure(run: Callable[[], Any], repeat: int) -> List[float]:
+    import asyncio
+    
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())  # warm-up, builds the field plans
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            loop.run_until_complete(run())
+            timings.append(time.perf_counter() - start)
+        return timings
+    finally:
+        loop.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    
+    cases = [
+        ("products", ProductSchema, make_products(args.rows)),
+        ("orders", OrderSchema, make_orders(args.rows)),
+    ]
+    for name, schema, items in cases:
+        default = measure(lambda: default_path(schema, items), args.repeat)
+        fast = measure(lambda: fast_path(schema, items), args.repeat)
+        default_ms = statistics.median(default) * 1000
+        fast_ms = statistics.median(fast) * 1000
+        print(
+            f"{name} x{args.rows}: default {default_ms:.2f} ms, "
+            f"fast {fast_ms:.2f} ms, speedup {default_ms / fast_ms:.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Cold start check, run from the backend directory:
+
+    python -m benchmarks.startup [--runs 5] [--target SECONDS] [--database URI]
+        [--output results.json]
+
+Starts the application in fresh interpreters, sends one request to each
+and reports the startup phases and the time to the first response, as
+seen by the application and by the parent process (which includes
+interpreter start-up). Exits with status 1 if the median time to the first
+response is over the target, STARTUP_TARGET_SECONDS by default.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+CHILD = """
+import asyncio, json
+from app.main import app
+import httpx
+
+async def main():
+    from app.core.startup import startup_timer
+    await app.router.startup()
+    async with httpx.AsyncClient(app=app, base_url="http://startup") as client:
+        response = await client.get("/")
+        response.raise_for_status()
+    report = startup_timer.report()
+    await app.router.shutdown()
+    print(json.dumps(report))
+
+asyncio.run(main())
+"""
+
+def start_once(env: Dict[str, str]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - start
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["process"] = round(wall, 4)
+    return report
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float)
+    parser.add_argument("--database")
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.database:
+        env["SQLALCHEMY_DATABASE_URI"] = args.database
+    else:
+        directory = tempfile.mkdtemp(prefix="inventory-startup-")
+        env["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{directory}/startup.db"
+    if args.target is not None:
+        env["STARTUP_TARGET_SECONDS"] = str(args.target)
+
+    # The first run compiles bytecode and creates the SQLite schema
+    start_once(env)
+    runs = [start_once(env) for _ in range(args.runs)]
+    target = runs[0]["target"]
+    phases = {
+        name: round(statistics.median(run["phases"][name] for run in runs), 4)
+        for name in runs[0]["phases"]
+    }
+    results = {
+        "runs": args.runs,
+        "target": target,
+        "phases": phases,
+        "ready": round(statistics.median(run["ready"] for run in runs), 4),
+        "first_request": round(statistics.median(run["first_request"] for run in runs), 4),
+        "process": round(statistics.median(run["process"] for run in runs), 4),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if results["first_request"] > target:
+        print(
+            f"time to first request {results['first_request']}s is over the "
+            f"{target}s target",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+The tests run against a throwaway SQLite database. The settings are read
+when app.core.config is first imported, so the environment is set up here,
+before any test module imports the application.
+"""
+import os
+import tempfile
+import httpx
+import pytest
+
+DATABASE_DIRECTORY = tempfile.mkdtemp(prefix="inventory-tests-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DATABASE_DIRECTORY}/test.db"
+# Background work would race the statement counts and data of the tests
+os.environ["PRODUCT_CACHE_WARM_COUNT"] = "0"
+os.environ["STOCK_SNAPSHOT_INTERVAL_SECONDS"] = "0"
+os.environ["CATALOG_FOLD_INTERVAL_SECONDS"] = "0"
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+async def app(anyio_backend):
+    """
+    The application, started, with the sample users and products of
+    `python -m app.cli seed`.
+    """
+    from app.core.database import SessionLocal
+    from app.core.init_db import init_db
+    from app.main import app
+    await app.router.startup()
+    async with SessionLocal() as db:
+        await init_db(db)
+    yield app
+    await app.router.shutdown()
+
+@pytest.fixture(scope="session")
+async def client(app):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    response = await client.post(
+        "/api/v1/auth/login", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+async def store_headers(client):
+    return await login(client, "store@example.com", "store123")
+
+@pytest.fixture(scope="session")
+async def manufacturer_headers(client):
+    return await login(client, "manufacturer@example.com", "manufacturer123")
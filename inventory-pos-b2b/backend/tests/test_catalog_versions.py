@@ -0,0 +1,37 @@
+"""
+Catalog ETags: every committed write changes them, folding the pending
+changes into the version rows doesn't.
+"""
+import pytest
+from app.core.database import SessionLocal
+from app.crud.crud_catalog import catalog_version
+
+pytestmark = pytest.mark.anyio
+
+async def etag(client, headers) -> str:
+    response = await client.get("/api/v1/products/", headers=headers)
+    assert response.status_code == 200
+    return response.headers["etag"]
+
+async def test_writes_change_the_etag_and_folding_keeps_it(
+    client, store_headers, manufacturer_headers
+):
+    before = await etag(client, store_headers)
+    response = await client.post(
+        "/api/v1/products/1/update-stock",
+        params={"quantity_change": 1},
+        headers=manufacturer_headers,
+    )
+    assert response.status_code == 200
+    after = await etag(client, store_headers)
+    assert after != before
+
+    async with SessionLocal() as db:
+        assert await catalog_version.fold(db) >= 1
+        assert await catalog_version.fold(db) == 0
+    assert await etag(client, store_headers) == after
+
+    response = await client.get(
+        "/api/v1/products/", headers={**store_headers, "If-None-Match": after}
+    )
+    assert response.status_code == 304
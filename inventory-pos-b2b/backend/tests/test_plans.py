@@ -0,0 +1,107 @@
+"""
+The EXPLAIN checks of app.core.plan_check, on a SQLite database of its own
+holding a fixed dataset shaped like production: many products per
+manufacturer with a few of them low on stock, and orders of a few lines.
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import create_engine
+from app.core.plan_check import PLAN_CHECKS, check_plans
+# Registers every model so the relationships between them resolve
+from app.models import catalog, order, product, sales, stock_event, stock_movement, user
+from app.models.base import Base
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.user import User, UserRole
+
+pytestmark = pytest.mark.anyio
+
+MANUFACTURERS = 10
+STORES = 10
+PRODUCTS = 2000
+ORDERS = 2000
+ITEMS_PER_ORDER = 3
+# One product in LOW_STOCK_EVERY is at or below its minimum
+LOW_STOCK_EVERY = 20
+
+async def fill(db: AsyncSession) -> None:
+    roles = [UserRole.MANUFACTURER] * MANUFACTURERS + [UserRole.STORE] * STORES
+    await db.execute(insert(User), [
+        {
+            "id": user_id,
+            "email": f"user{user_id}@example.com",
+            "hashed_password": "-",
+            "full_name": f"User {user_id}",
+            "role": role,
+        }
+        for user_id, role in enumerate(roles, start=1)
+    ])
+    await db.execute(insert(Product), [
+        {
+            "id": product_id,
+            "name": f"Product {product_id}",
+            "sku": f"SKU{product_id}",
+            "barcode": f"{product_id:013d}",
+            "price": 10.0,
+            "quantity": 1 if product_id % LOW_STOCK_EVERY == 0 else 100,
+            "min_quantity": 5,
+            "manufacturer_id": 1 + product_id % MANUFACTURERS,
+        }
+        for product_id in range(1, PRODUCTS + 1)
+    ])
+    statuses = list(OrderStatus)
+    start = datetime(2024, 1, 1)
+    await db.execute(insert(Order), [
+        {
+            "id": order_id,
+            "order_number": f"ORD-{order_id}",
+            "store_id": MANUFACTURERS + 1 + order_id % STORES,
+            "status": statuses[order_id % len(statuses)],
+            "total_amount": 10.0 * ITEMS_PER_ORDER,
+            "created_at": start + timedelta(minutes=order_id),
+        }
+        for order_id in range(1, ORDERS + 1)
+    ])
+    await db.execute(insert(OrderItem), [
+        {
+            "order_id": order_id,
+            # Spread the lines over the whole catalog
+            "product_id": 1 + (order_id * ITEMS_PER_ORDER + line) * 7919 % PRODUCTS,
+            "quantity": 1,
+            "unit_price": 10.0,
+            "subtotal": 10.0,
+        }
+        for order_id in range(1, ORDERS + 1)
+        for line in range(ITEMS_PER_ORDER)
+    ])
+    await db.commit()
+
+@pytest.fixture(scope="module")
+async def plans(anyio_backend, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("plans")
+    engine = create_engine(f"sqlite:///{directory}/plans.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        await fill(db)
+        results = await check_plans(db)
+    await engine.dispose()
+    return {result["name"]: result for result in results}
+
+@pytest.mark.parametrize("name", [check.name for check in PLAN_CHECKS])
+async def test_plan(plans, name):
+    result = plans[name]
+    assert result["skipped"] is None
+    assert result["problems"] == [], "\n".join(result["plan"])
+
+async def test_small_tables_are_skipped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/empty.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        results = await check_plans(db)
+    await engine.dispose()
+    assert all(result["skipped"] for result in results)
+    assert all(not result["problems"] for result in results)
@@ -0,0 +1,32 @@
+"""
+CSV records of the product import: quoted fields spanning lines, and the
+size limit that stops a stray quote from swallowing the rest of the file.
+"""
+import pytest
+from app.core import product_import
+from app.core.product_import import ImportFormatError, iter_csv_records
+
+pytestmark = pytest.mark.anyio
+
+async def lines_of(*lines: str):
+    for line in lines:
+        yield line
+
+async def records(*lines: str):
+    return [record async for record in iter_csv_records(lines_of(*lines))]
+
+async def test_quoted_fields_span_lines():
+    assert await records('sku,description\n', 'A1,"two\n', 'lines"\n', 'A2,\n') == [
+        (1, {"sku": "A1", "description": "two\nlines"}, None),
+        (2, {"sku": "A2", "description": None}, None),
+    ]
+
+async def test_unterminated_quote_at_the_end():
+    assert await records('sku,description\n', 'A1,"open\n') == [
+        (1, None, "Unterminated quoted field"),
+    ]
+
+async def test_unterminated_quote_is_bounded(monkeypatch):
+    monkeypatch.setattr(product_import, "MAX_RECORD_LENGTH", 100)
+    with pytest.raises(ImportFormatError, match="Record longer than 100"):
+        await records('sku,description\n', 'A1,"open\n', *["A2,text\n"] * 20)
@@ -0,0 +1,71 @@
+"""
+Statement counts of the hot endpoints, held to their QUERY_BUDGETS entries
+with query_budget(), and the repeated-statement (N+1) detector.
+"""
+import logging
+import pytest
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.query_trace import QUERY_BUDGETS, check_request, query_budget, trace
+from app.models.product import Product
+
+pytestmark = pytest.mark.anyio
+
+async def test_login(client):
+    with query_budget(QUERY_BUDGETS["POST /api/v1/auth/login"]):
+        response = await client.post(
+            "/api/v1/auth/login",
+            data={"username": "store@example.com", "password": "store123"},
+        )
+    assert response.status_code == 200
+
+async def test_read_products(client, store_headers):
+    with query_budget(QUERY_BUDGETS["GET /api/v1/products/"]):
+        response = await client.get("/api/v1/products/", headers=store_headers)
+    assert response.status_code == 200
+    assert len(response.json()) >= 3
+
+async def create_order(client, store_headers) -> int:
+    items = [
+        {"product_id": product_id, "quantity": 1, "unit_price": 10, "subtotal": 10}
+        for product_id in (1, 2, 3)
+    ]
+    with query_budget(QUERY_BUDGETS["POST /api/v1/orders/"]):
+        response = await client.post(
+            "/api/v1/orders/",
+            headers=store_headers,
+            json={"store_id": 2, "shipping_address": "Store Address", "items": items},
+        )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+async def test_create_order(client, store_headers):
+    await create_order(client, store_headers)
+
+@pytest.mark.parametrize("statuses", [("confirmed", "shipped"), ("confirmed", "cancelled")])
+async def test_update_order_status(client, store_headers, manufacturer_headers, statuses):
+    order_id = await create_order(client, store_headers)
+    for status in statuses:
+        with query_budget(QUERY_BUDGETS["PUT /api/v1/orders/{order_id}/status"]):
+            response = await client.put(
+                f"/api/v1/orders/{order_id}/status",
+                params={"status": status},
+                headers=manufacturer_headers,
+            )
+        assert response.status_code == 200, response.text
+
+async def test_repeated_statements_are_flagged(caplog):
+    threshold = settings.QUERY_TRACE_REPEAT_THRESHOLD
+    async with SessionLocal() as db:
+        with trace("per-row lookups") as current:
+            # One lookup per product instead of a single IN query
+            for product_id in range(1, threshold + 1):
+                await db.execute(select(Product.name).where(Product.id == product_id))
+            await db.execute(select(Product.name).where(Product.id.in_([1, 2, 3])))
+    repeated = current.repeated(threshold)
+    assert len(repeated) == 1
+    assert repeated[0][1] == threshold
+    with caplog.at_level(logging.WARNING, logger="app.core.query_trace"):
+        check_request(current, None)
+    assert f"per-row lookups ran the same statement {threshold} times" in caplog.text
@@ -0,0 +1,35 @@
+"""
+POS stock event batches mixing increments, decrements and rejections.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def quantity(client, headers, product_id: int) -> int:
+    response = await client.get(f"/api/v1/products/{product_id}", headers=headers)
+    return response.json()["quantity"]
+
+async def test_ingest_applies_each_product_once(client, manufacturer_headers):
+    before = {p: await quantity(client, manufacturer_headers, p) for p in (1, 2, 3)}
+    events = [
+        {"event_id": "mixed-1", "product_id": 1, "quantity_change": 3},
+        {"event_id": "mixed-2", "product_id": 2, "quantity_change": -1},
+        {"event_id": "mixed-3", "product_id": 1, "quantity_change": 1},
+        {"event_id": "mixed-4", "product_id": 3, "quantity_change": -before[3] - 1},
+        {"event_id": "mixed-5", "product_id": 999999, "quantity_change": 1},
+    ]
+    response = await client.post(
+        "/api/v1/products/stock-events",
+        json={"events": events},
+        headers=manufacturer_headers,
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["applied"] == 3
+    assert result["products_updated"] == 2
+    assert {r["event_id"]: r["detail"] for r in result["rejected"]} == {
+        "mixed-4": "Insufficient stock",
+        "mixed-5": "Product not found",
+    }
+    after = {p: await quantity(client, manufacturer_headers, p) for p in (1, 2, 3)}
+    assert after == {1: before[1] + 4, 2: before[2] - 1, 3: before[3]}
@@ -0,0 +1,71 @@
+"""
+Sharded products are shown and checked with their exact stock, not the
+snapshot in their quantity column.
+"""
+from typing import Optional
+import pytest
+from app.core.database import SessionLocal
+from app.crud.crud_product import product as crud_product
+
+pytestmark = pytest.mark.anyio
+
+async def order(client, headers, product_id: int, quantity: int, also: Optional[int] = None):
+    items = [
+        {"product_id": product_id, "quantity": quantity, "unit_price": 5, "subtotal": 5}
+    ]
+    if also is not None:
+        items.append({"product_id": also, "quantity": 1, "unit_price": 5, "subtotal": 5})
+    return await client.post(
+        "/api/v1/orders/",
+        headers=headers,
+        json={"store_id": 2, "shipping_address": "Store Address", "items": items},
+    )
+
+async def test_sharded_stock_is_exact(client, store_headers, manufacturer_headers):
+    response = await client.post(
+        "/api/v1/products/",
+        headers=manufacturer_headers,
+        json={
+            "name": "Sharded product",
+            "sku": "SHARDED-1",
+            "barcode": "9990000000011",
+            "price": 5,
+            "quantity": 20,
+            "min_quantity": 10,
+            "manufacturer_id": 3,
+        },
+    )
+    assert response.status_code == 200, response.text
+    product_id = response.json()["id"]
+    async with SessionLocal() as db:
+        assert await crud_product.set_stock_shards(db, product_id=product_id, shards=4) == 20
+
+    # Leaves the snapshot at 20, as STOCK_SNAPSHOT_INTERVAL_SECONDS is 0
+    response = await client.post(
+        "/api/v1/products/stock-events",
+        headers=manufacturer_headers,
+        json={"events": [
+            {"event_id": "sharded-1", "product_id": product_id, "quantity_change": -15},
+        ]},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["applied"] == 1
+
+    response = await client.get(f"/api/v1/products/{product_id}", headers=store_headers)
+    assert response.json()["quantity"] == 5
+    response = await client.get("/api/v1/products/low-stock/", headers=manufacturer_headers)
+    assert product_id in [product["id"] for product in response.json()]
+    response = await order(client, store_headers, product_id, 6)
+    assert response.status_code == 400
+
+    # Sharded and unsharded lines are taken together on confirmation
+    response = await order(client, store_headers, product_id, 3, also=1)
+    assert response.status_code == 200, response.text
+    response = await client.put(
+        f"/api/v1/orders/{response.json()['id']}/status",
+        params={"status": "confirmed"},
+        headers=manufacturer_headers,
+    )
+    assert response.status_code == 200, response.text
+    response = await client.get(f"/api/v1/products/{product_id}", headers=store_headers)
+    assert response.json()["quantity"] == 2